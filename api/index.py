@@ -1,69 +1,381 @@
-from flask import Flask, request, redirect, url_for, render_template, flash, jsonify
+from flask import Flask, Blueprint, Request, request, redirect, url_for, render_template, flash, jsonify, make_response, g
+from werkzeug.datastructures import FileStorage
 from werkzeug.utils import secure_filename
-from pymongo import MongoClient
-from bs4 import BeautifulSoup
-from datetime import datetime
-from github import Github, GithubException
+from jinja2.utils import htmlsafe_json_dumps
+from pymongo import DESCENDING, UpdateOne
+from pymongo.errors import DuplicateKeyError
+from bson import ObjectId
+from bson.errors import InvalidId
+from datetime import datetime, timezone
+from github import GithubException
 import os
 import base64
-from dotenv import load_dotenv
-# Removed the hashing import as it's no longer used
-# from werkzeug.security import generate_password_hash
-
-# .env 파일 로드
-load_dotenv()
-
-# 환경 변수에서 값을 가져옴
-GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
-GITHUB_REPO = os.getenv('GITHUB_REPO')
-MONGO_URI = os.getenv('MONGO_URI')
-
-# Flask 애플리케이션 설정
-app = Flask(__name__, template_folder='../templates')
-app.secret_key = os.getenv('FLASK_SECRET_KEY', 'fallback_secret_key')  # 환경 변수에서 비밀 키 가져오기
-
-# 업로드 설정
-ALLOWED_EXTENSIONS_HTML = {'html', 'htm'}
-ALLOWED_EXTENSIONS_IMAGES = {'png', 'jpg', 'jpeg', 'gif', 'svg'}
-
-# MongoDB 클라이언트 설정
-client = MongoClient(MONGO_URI)
-db = client.pages
-collection = db.HoMe
-
-# GitHub 설정
-g = Github(GITHUB_TOKEN)
-try:
-    repo = g.get_repo(GITHUB_REPO)
-except GithubException as e:
-    print(f"GitHub 리포지토리 접근 중 오류 발생: {e}")
-    repo = None
-
-def allowed_file(filename, allowed_set):
-    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_set
-
-def upload_to_github_binary(path, content, commit_message, is_binary=False):
-    try:
-        encoded_content = base64.b64encode(content).decode('utf-8') if is_binary else content
+import hashlib
+import json
+import logging
+import mimetypes
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+# 라우트가 쓰는 기능은 프로젝트 루트의 homeset/ 패키지에 있음 (Vercel은 이 파일을 api/에서 바로 실행함)
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from homeset.clients import app_state, configure_clients, get_collection, get_repo, with_app_context
+from homeset.commits import PRECOMPRESSED_ENCODINGS, compressed_variant_path, fetch_remote_sha, ignore_progress, upload_files_to_github
+from homeset.feeds import FEED_ENTRY_PROJECTION, feed_response, update_feeds
+from homeset.files import (ALLOWED_EXTENSIONS_HTML, ALLOWED_EXTENSIONS_IMAGES, allowed_file, content_addressed_filename,
+                           hash_stream, stream_size)
+from homeset.images import image_variant_path, image_variants_result, submit_image_optimization
+from homeset.jobs import UPLOAD_JOBS, enqueue_upload_job, ensure_upload_workers, job_query
+from homeset.metrics import METRICS_ENABLED, SERVER_TIMING, TIMING_ENABLED, observe_duration, render_metrics, span
+from homeset.rewriter import image_reference_key, local_image_url, rewrite_image_paths
+from homeset.scheduler import GITHUB_SERVE_MAX_WAIT, github_call_with_retry, github_error_message, github_fail_fast
+from homeset.sha_index import indexed_sha, locked_sha_index, try_refresh_sha_index
+from homeset.simulations import (SIMULATION_JOBS, SIMULATIONS, claim_simulation_job, run_simulation_job, simulation_key,
+                                 simulation_module, simulation_params, simulation_query)
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 값을 가져옴 (.env는 homeset 패키지가 불러옴. 기능별 설정은 해당 homeset 모듈에 있음)
+# 이미지를 내용 해시 이름(public/images/<sha256 앞 32자>.<확장자>)으로 저장해 중복 업로드를 막을지 여부
+CONTENT_ADDRESSED_IMAGES = os.getenv('CONTENT_ADDRESSED_IMAGES', 'true').lower() == 'true'
+# 홈 화면 렌더링 결과를 프로세스 안에 캐시할 시간(초)과 CDN용 Cache-Control 헤더
+HOME_CACHE_TTL = float(os.getenv('HOME_CACHE_TTL', '60'))
+HOME_CACHE_CONTROL = os.getenv('HOME_CACHE_CONTROL', 'public, max-age=0, s-maxage=60, stale-while-revalidate=300')
+# /posts 목록 한 페이지에 보여줄 글 수
+POSTS_PAGE_SIZE = int(os.getenv('POSTS_PAGE_SIZE', '20'))
+# /pages, /images 제공: 내용 해시 이름의 이미지는 내용이 바뀌지 않으므로 1년 immutable,
+# 그 밖의 파일은 ETag로 재검증. SHA 인덱스(브랜치 ref)는 SERVE_INDEX_TTL초에 한 번만 확인
+PAGE_CACHE_CONTROL = os.getenv('PAGE_CACHE_CONTROL', 'public, max-age=0, s-maxage=60, stale-while-revalidate=300')
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+SERVE_INDEX_TTL = float(os.getenv('SERVE_INDEX_TTL', '30'))
+# 내려받은 blob을 프로세스 안에 캐시할 최대 크기(바이트). blob은 SHA가 같으면 내용도 같음
+SERVE_CACHE_BYTES = int(os.getenv('SERVE_CACHE_BYTES', str(32 * 1024 * 1024)))
+# 업로드 크기 제한(바이트)과, 업로드 파일을 메모리에 둘 최대 크기(넘으면 임시 파일로 내려씀)
+MAX_UPLOAD_FILE_SIZE = int(os.getenv('MAX_UPLOAD_FILE_SIZE', str(10 * 1024 * 1024)))
+MAX_UPLOAD_REQUEST_SIZE = int(os.getenv('MAX_UPLOAD_REQUEST_SIZE', str(50 * 1024 * 1024)))
+UPLOAD_SPOOL_SIZE = int(os.getenv('UPLOAD_SPOOL_SIZE', str(512 * 1024)))
+# 이어 올리기 업로드: 파일을 조각(CHUNKED_UPLOAD_CHUNK_SIZE)으로 나눠 따로 보내고 마지막에 한 번에 처리.
+# 조각은 이 서버의 CHUNKED_UPLOAD_DIR에 모으므로, 요청마다 다른 인스턴스가 받을 수 있는
+# 서버리스 환경(Vercel 등)에서는 끄고 디스크를 공유하는 상주 서버에서 켤 것
+CHUNKED_UPLOADS = os.getenv('CHUNKED_UPLOADS', 'false').lower() == 'true'
+CHUNKED_UPLOAD_DIR = os.getenv('CHUNKED_UPLOAD_DIR', os.path.join(tempfile.gettempdir(), 'homeset-chunked-uploads'))
+CHUNKED_UPLOAD_CHUNK_SIZE = int(os.getenv('CHUNKED_UPLOAD_CHUNK_SIZE', str(2 * 1024 * 1024)))
+# 끝나지 않은 이어 올리기 업로드를 보관할 시간(초)
+CHUNKED_UPLOAD_RETENTION = float(os.getenv('CHUNKED_UPLOAD_RETENTION', str(24 * 60 * 60)))
+
+class SpooledRequest(Request):
+    # 업로드 파일마다 일정 크기까지만 메모리에 두고 나머지는 임시 파일로 내려씀
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return tempfile.SpooledTemporaryFile(max_size=UPLOAD_SPOOL_SIZE)
+
+# 라우트는 블루프린트에 등록하고, 애플리케이션은 파일 끝의 create_app()이 만듦
+bp = Blueprint('main', __name__)
+
+@bp.before_app_request
+def start_request_timer():
+    if TIMING_ENABLED:
+        g.request_started = time.perf_counter()
+
+@bp.after_app_request
+def record_request_timing(response):
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    elapsed = time.perf_counter() - started
+    timings = g.pop('server_timing', {})
+    observe_duration('request', elapsed, {'endpoint': request.endpoint or 'unknown', 'method': request.method,
+                                          'status': response.status_code})
+    if SERVER_TIMING:
+        entries = [f"{token};dur={seconds * 1000:.1f}" for token, seconds in timings.items()]
+        entries.append(f"total;dur={elapsed * 1000:.1f}")
+        response.headers['Server-Timing'] = ', '.join(entries)
+    return response
+
+@bp.route('/metrics')
+def metrics():
+    if not METRICS_ENABLED:
+        return 'Not Found', 404
+    response = make_response(render_metrics())
+    response.mimetype = 'text/plain'
+    response.headers['Content-Type'] = 'text/plain; version=0.0.4; charset=utf-8'
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# 홈 화면 캐시: 업로드로 글이 바뀌면 invalidate_home_cache()로 비움
+HOME_PROJECTION = {'_id': 0, 'title': 1, 'filename': 1, 'date': 1}
+POSTS_PROJECTION = {'name': 1, 'title': 1, 'filename': 1, 'date': 1}
+CHECK_EXISTING_PROJECTION = {'_id': 0, 'name': 1, 'title': 1, 'content': 1, 'date': 1}
+_home_cache_lock = threading.Lock()
+
+def invalidate_home_cache():
+    with _home_cache_lock:
+        app_state()['home_cache']['expires'] = 0.0
+
+def merged_image_hashes(image_hashes):
+    # 새 항목 + 저장된 항목 중 이름이 겹치지 않는 것. 서버에서 합치므로 같은 글의 업로드가 겹쳐도 항목을 잃지 않음
+    names = [entry['name'] for entry in image_hashes]
+    return {'$concatArrays': [
+        {'$literal': image_hashes},
+        {'$filter': {'input': {'$ifNull': ['$image_hashes', []]},
+                     'cond': {'$not': {'$in': ['$$this.name', names]}}}},
+    ]}
+
+def upsert_post(name, fields, image_hashes=None):
+    """글 문서를 name 기준으로 요청 한 번에 넣거나 갱신합니다. 새로 넣었으면 True를 반환합니다.
+
+    image_hashes를 넘기면 저장된 image_hashes 중 이번에 없는 이름의 항목을 이어 붙여 저장합니다.
+    """
+    if image_hashes is None:
+        update = {'$set': fields}
+    else:
+        # 파이프라인 갱신에서는 '$'로 시작하는 문자열을 필드 경로로 읽으므로 값을 $literal로 감쌈
+        values = {key: {'$literal': value} for key, value in fields.items()}
+        update = [{'$set': dict(values, image_hashes=merged_image_hashes(image_hashes))}]
+    for attempt in range(2):
         try:
-            existing_file = repo.get_contents(path)
-            repo.update_file(path, commit_message, encoded_content, existing_file.sha, branch="main")
-        except GithubException as e:
-            if e.status == 404:
-                repo.create_file(path, commit_message, encoded_content, branch="main")
-            else:
-                raise e
-    except GithubException as e:
-        print(f"GitHub 업로드 중 오류 발생: {e}")
-        raise
+            previous = get_collection().find_one_and_update(
+                {'name': name}, update, projection={'_id': 1}, upsert=True)
+            return previous is None
+        except DuplicateKeyError:
+            # 같은 이름의 업로드 두 개가 동시에 insert하려 함 (name unique 인덱스) -> 다시 하면 update가 됨
+            if attempt:
+                raise
 
-@app.route('/')
+def bulk_upsert_posts(posts, batch_size=1000):
+    """여러 글을 bulk_write로 한꺼번에 upsert합니다.
+
+    Parameters:
+    - posts: (name, $set 필드, $setOnInsert 필드) 튜플 리스트.
+    - batch_size: bulk_write 한 번에 보낼 최대 문서 수.
+
+    Returns:
+    - (새로 넣은 글 수, 내용이 바뀐 글 수)
+    """
+    inserted = modified = 0
+    operations = []
+    for name, fields, insert_fields in posts:
+        update = {'$set': fields}
+        if insert_fields:
+            update['$setOnInsert'] = insert_fields
+        operations.append(UpdateOne({'name': name}, update, upsert=True))
+    for start in range(0, len(operations), batch_size):
+        # ordered=False: 한 문서가 실패해도 나머지는 계속 씀
+        result = get_collection().bulk_write(operations[start:start + batch_size], ordered=False)
+        inserted += result.upserted_count
+        modified += result.modified_count
+    if operations:
+        invalidate_home_cache()
+        # 피드 항목에 필요한 필드는 이번에 쓴 글만 다시 읽음 ($setOnInsert로 넣은 제목/날짜 포함)
+        names = [name for name, _, _ in posts]
+        update_feeds(list(get_collection().find({'name': {'$in': names}}, FEED_ENTRY_PROJECTION)))
+    return inserted, modified
+
+@bp.route('/feed.xml')
+def feed():
+    return feed_response('feed', 'feed.xml')
+
+@bp.route('/sitemap.xml')
+def sitemap():
+    return feed_response('sitemap', 'sitemap.xml')
+
+@bp.route('/')
 def index():
-    # 최근 5개의 게시물만 가져오도록 수정
-    posts = collection.find().sort('date', -1).limit(5)
-    return render_template('index.html', posts=posts)
+    now = time.monotonic()
+    home_cache = app_state()['home_cache']
+    with _home_cache_lock:
+        body, etag, expires = home_cache['body'], home_cache['etag'], home_cache['expires']
+    if body is None or expires <= now:
+        # 최근 5개의 게시물만, 템플릿에서 쓰는 필드만 가져옴
+        posts = list(get_collection().find({}, HOME_PROJECTION).sort('date', DESCENDING).limit(5))
+        with span('template_render', template='index.html'):
+            body = render_template('index.html', posts=posts)
+        etag = hashlib.sha1(body.encode('utf-8')).hexdigest()
+        with _home_cache_lock:
+            home_cache.update(body=body, etag=etag, expires=now + HOME_CACHE_TTL)
+
+    response = make_response(body)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = HOME_CACHE_CONTROL
+    return response.make_conditional(request)
+
+def encode_cursor(post):
+    # 마지막으로 보여준 글의 (date, _id)를 다음 페이지의 시작점으로 씀
+    data = {'d': post['date'].isoformat(), 'i': str(post['_id'])}
+    return base64.urlsafe_b64encode(json.dumps(data).encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor):
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        return datetime.fromisoformat(data['d']), ObjectId(data['i'])
+    except (ValueError, KeyError, TypeError, InvalidId):
+        return None
+
+def find_posts_page(cursor=None, query=None, page_size=POSTS_PAGE_SIZE):
+    """키셋 페이지네이션: (date, _id)가 커서보다 작은 글을 인덱스 순서대로 page_size개 가져옵니다.
+
+    건너뛸 문서를 세는 skip과 달리 몇 번째 페이지든 비용이 같습니다.
+    Returns:
+    - (글 리스트, 다음 페이지 커서 또는 None)
+    """
+    # 날짜가 없거나 문자열인 예전 문서는 (date, _id) 순서와 커서를 만들 수 없으므로 목록에서 뺌
+    conditions = [{'date': {'$type': 'date'}}]
+    if query:
+        conditions.append({'$text': {'$search': query}})
+    if cursor:
+        date, post_id = cursor
+        conditions.append({'$or': [{'date': {'$lt': date}}, {'date': date, '_id': {'$lt': post_id}}]})
+    filter_ = {'$and': conditions} if len(conditions) > 1 else conditions[0]
+    # 한 개 더 가져와서 다음 페이지가 있는지 확인
+    posts = list(get_collection().find(filter_, POSTS_PROJECTION)
+                 .sort([('date', DESCENDING), ('_id', DESCENDING)])
+                 .limit(page_size + 1))
+    next_cursor = encode_cursor(posts[page_size - 1]) if len(posts) > page_size else None
+    return posts[:page_size], next_cursor
+
+def posts_page_from_request():
+    cursor_value = request.args.get('cursor')
+    cursor = decode_cursor(cursor_value) if cursor_value else None
+    if cursor_value and cursor is None:
+        return None
+    query = request.args.get('q', '').strip() or None
+    post_list, next_cursor = find_posts_page(cursor, query)
+    return post_list, next_cursor, query
+
+@bp.route('/posts')
+def all_posts():
+    page = posts_page_from_request()
+    if page is None:
+        return redirect(url_for('main.all_posts'))
+    post_list, next_cursor, query = page
+    next_url = url_for('main.all_posts', cursor=next_cursor, q=query) if next_cursor else None
+    with span('template_render', template='index.html'):
+        return render_template('index.html', posts=post_list, next_url=next_url, query=query or '', show_search=True)
+
+@bp.route('/api/posts')
+def posts_api():
+    page = posts_page_from_request()
+    if page is None:
+        return jsonify({'error': '잘못된 cursor 값입니다.'}), 400
+    post_list, next_cursor, _ = page
+    return jsonify({
+        'posts': [{
+            'name': post.get('name', ''),
+            'title': post.get('title', ''),
+            'filename': post.get('filename', ''),
+            'date': format_date(post.get('date')),
+        } for post in post_list],
+        'next_cursor': next_cursor,
+    })
+
+# 해시 이름의 이미지: <sha256 앞 32자>.<확장자> 또는 최적화 변형 <sha256 앞 32자>-<너비>w.<형식>
+HASHED_IMAGE_RE = re.compile(r'[0-9a-f]{32}(-\d+w)?\.[a-z0-9]+')
+_serve_state = {'checked': 0.0, 'cached_bytes': 0}
+_blob_cache = OrderedDict()  # blob SHA -> 내용 (LRU)
+_blob_cache_lock = threading.Lock()
+
+def refresh_sha_index_for_serving():
+    # 요청마다 브랜치 ref를 확인하지 않도록 SERVE_INDEX_TTL초에 한 번만 확인
+    now = time.monotonic()
+    if now - _serve_state['checked'] < SERVE_INDEX_TTL:
+        return
+    _serve_state['checked'] = now
+    try_refresh_sha_index()
 
-@app.route('/upload', methods=['GET', 'POST'])
+def fetch_blob(blob_sha):
+    with _blob_cache_lock:
+        content = _blob_cache.get(blob_sha)
+        if content is not None:
+            _blob_cache.move_to_end(blob_sha)
+            return content
+    blob = github_call_with_retry(get_repo().get_git_blob, blob_sha)
+    content = base64.b64decode(blob.content)
+    if len(content) <= SERVE_CACHE_BYTES:
+        with _blob_cache_lock:
+            _blob_cache[blob_sha] = content
+            _serve_state['cached_bytes'] += len(content)
+            while _serve_state['cached_bytes'] > SERVE_CACHE_BYTES:
+                _, evicted = _blob_cache.popitem(last=False)
+                _serve_state['cached_bytes'] -= len(evicted)
+    return content
+
+def github_serve_error(e):
+    # 한도가 부족해 보내지 않은 요청(429)은 방문자가 나중에 다시 오도록 503 + Retry-After
+    if e.status == 429:
+        response = make_response('Service Unavailable', 503)
+        response.headers['Retry-After'] = (e.headers or {}).get('retry-after', '60')
+        return response
+    return 'Bad Gateway', 502
+
+def serve_public_file(path, cache_control):
+    """GitHub에 저장된 파일을 blob SHA를 ETag로 붙여 제공합니다. If-None-Match가 맞으면 내용 없이 304."""
+    if '..' in path.split('/'):
+        return 'Not Found', 404
+    with github_fail_fast(GITHUB_SERVE_MAX_WAIT):
+        return serve_github_file(path, cache_control)
+
+def serve_github_file(path, cache_control):
+    try:
+        refresh_sha_index_for_serving()
+        with locked_sha_index() as paths:
+            index_ready = paths is not None
+        blob_sha = indexed_sha(path) if index_ready else fetch_remote_sha(path)
+    except GithubException as e:
+        logger.error("GitHub 파일 조회 중 오류 발생 (%s): %s", path, e)
+        return github_serve_error(e)
+    if blob_sha is None:
+        return 'Not Found', 404
+
+    # 미리 압축한 변형이 있고 클라이언트가 받을 수 있으면 그것을 제공 (변형마다 ETag가 다름)
+    encoding = None
+    variants_exist = False
+    for name, suffix in PRECOMPRESSED_ENCODINGS:
+        variant_sha = indexed_sha(compressed_variant_path(blob_sha, suffix))
+        if variant_sha:
+            variants_exist = True
+            if encoding is None and request.accept_encodings[name]:
+                encoding, blob_sha = name, variant_sha
+
+    response = make_response()
+    response.set_etag(blob_sha)
+    response.headers['Cache-Control'] = cache_control
+    if variants_exist:
+        response.vary.add('Accept-Encoding')
+    if request.if_none_match.contains(blob_sha):
+        response.status_code = 304
+        return response
+
+    try:
+        response.set_data(fetch_blob(blob_sha))
+    except GithubException as e:
+        logger.error("GitHub blob 조회 중 오류 발생 (%s): %s", path, e)
+        return github_serve_error(e)
+    response.mimetype = mimetypes.guess_type(path)[0] or 'application/octet-stream'
+    if response.mimetype.startswith('text/'):
+        response.charset = 'utf-8'
+    if encoding:
+        response.content_encoding = encoding
+    return response
+
+@bp.route('/pages/<path:filename>')
+def serve_page(filename):
+    return serve_public_file(f"public/pages/{filename}", PAGE_CACHE_CONTROL)
+
+@bp.route('/images/<path:filename>')
+def serve_image(filename):
+    # 해시 이름의 이미지는 경로가 같으면 내용도 같으므로 브라우저/CDN이 다시 묻지 않도록 함
+    cache_control = IMMUTABLE_CACHE_CONTROL if HASHED_IMAGE_RE.fullmatch(filename) else PAGE_CACHE_CONTROL
+    return serve_public_file(f"public/images/{filename}", cache_control)
+
+@bp.route('/upload', methods=['GET', 'POST'])
 def upload():
     if request.method == 'POST':
         if 'html_file' not in request.files:
@@ -80,53 +392,198 @@ def upload():
 
     return render_template('upload.html')
 
-def handle_error(message):
+def handle_error(message, status=400):
     if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return jsonify({'success': False, 'message': message}), 400
+        return jsonify({'success': False, 'message': message}), status
     flash(message)
     return redirect(request.url)
 
-def process_upload(html_file):
-    html_filename = secure_filename(html_file.filename)
-    html_content = html_file.read().decode('utf-8')
+@bp.app_errorhandler(413)
+def request_too_large(e):
+    return handle_error(f'업로드 전체 크기가 제한({MAX_UPLOAD_REQUEST_SIZE // (1024 * 1024)}MB)을 넘습니다.', 413)
 
-    # HTML 파일 내 이미지 경로 수정
-    soup = BeautifulSoup(html_content, 'html.parser')
-    images = soup.find_all('img')
-    for img in images:
-        src = img.get('src')
-        if src:
-            image_filename = os.path.basename(src)
-            new_src = f"/images/{image_filename}"
-            img['src'] = new_src
-
-    modified_html = str(soup)
-
-    # GitHub에 HTML 파일 업로드
-    html_path = f"public/pages/{html_filename}"
-    try:
-        upload_to_github_binary(html_path, modified_html, f"Add/update HTML file: {html_filename}", False)
-    except GithubException as e:
-        return handle_error(f"GitHub 업로드 중 오류 발생: {e.data.get('message', '알 수 없는 오류')}")
 
-    # 이미지 파일 업로드 처리
-    image_files = request.files.getlist('image_files')
-    uploaded_images = []
+def process_upload(html_file, image_files=None, form=None):
+    """업로드된 HTML/이미지 파일을 검사한 뒤 업로드를 실행하고 응답을 돌려줍니다.
+
+    image_files(FileStorage 리스트)와 form을 주지 않으면 현재 요청의 파일/폼 값을 씁니다.
+    """
+    html_filename = secure_filename(html_file.filename)
+    if stream_size(html_file.stream) > MAX_UPLOAD_FILE_SIZE:
+        return handle_error(f'HTML 파일이 최대 크기({MAX_UPLOAD_FILE_SIZE // (1024 * 1024)}MB)를 넘습니다.', 413)
+
+    # 이미지 파일 수집
+    # upload.html 폼은 'image_files[]' 이름으로 보내므로 두 이름을 모두 받음
+    if image_files is None:
+        image_files = request.files.getlist('image_files') + request.files.getlist('image_files[]')
+    images = []
     for image in image_files:
         if image and allowed_file(image.filename, ALLOWED_EXTENSIONS_IMAGES):
-            image_filename = secure_filename(image.filename)
-            image_content = image.read()
-            image_path = f"public/images/{image_filename}"
-            try:
-                upload_to_github_binary(image_path, image_content, f"Add/update image file: {image_filename}", True)
-                uploaded_images.append(image_filename)
-            except GithubException as e:
-                flash(f"{image.filename} 업로드 중 오류 발생: {e.data.get('message', '알 수 없는 오류')}")
+            if stream_size(image.stream) > MAX_UPLOAD_FILE_SIZE:
+                flash(f"{image.filename}은(는) 최대 파일 크기({MAX_UPLOAD_FILE_SIZE // (1024 * 1024)}MB)를 넘습니다.")
+                continue
+            images.append((image.filename, secure_filename(image.filename), image.stream))
         else:
             flash(f"{image.filename}은(는) 허용되지 않는 파일 형식입니다.")
+    if form is None:
+        form = {key: request.form.get(key) for key in ('title', 'content', 'date', 'password')}
+
+    if UPLOAD_JOBS:
+        # 파일을 작업 디렉터리에 옮겨 두고 바로 응답. GitHub/MongoDB 단계는 작업 워커가 실행
+        job_id = enqueue_upload_job(html_filename, html_file.stream, images, form, run_upload)
+        message = '업로드 작업을 접수했습니다. 잠시 후 반영됩니다.'
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+            return jsonify({
+                'success': True,
+                'message': message,
+                'job_id': job_id,
+                'status_url': url_for('main.job_status', job_id=job_id),
+            }), 202
+        flash(message)
+        return redirect(url_for('main.index'))
+
+    html_content = html_file.read().decode('utf-8')
+    try:
+        success_message, messages = run_upload(html_filename, html_content, images, form)
+    except GithubException as e:
+        return handle_error(f"GitHub 업로드 중 오류 발생: {github_error_message(e)}")
+    for message in messages:
+        flash(message)
+
+    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
+        return jsonify({'success': True, 'message': success_message}), 200
+    flash(success_message)
+    return redirect(url_for('main.index'))
+
+def stage_images(images):
+    """이미지를 해시/최적화하고, GitHub에 올릴 파일과 HTML에서 가리킬 경로를 정합니다.
+
+    Parameters:
+    - images: (원래 이름, 안전한 파일 이름, 읽을 수 있는 스트림) 튜플 리스트.
+
+    Returns:
+    - 다음 키를 가진 딕셔너리.
+      'uploads': GitHub에 올릴 (path, content, is_binary) 리스트
+      'names': 대표 저장 경로 -> [(원래 이름, 안전한 파일 이름, sha256)]
+      'upload_paths': 대표 저장 경로 -> 실제로 올리는 경로들 (최적화 변형 포함)
+      'urls': HTML에서 참조하는 파일 이름 -> 웹 경로
+      'srcsets': HTML에서 참조하는 파일 이름 -> srcset 값
+    """
+    staged_images = []
+    for original_name, image_filename, stream in images:
+        digest = hash_stream(stream) if CONTENT_ADDRESSED_IMAGES else None
+        # 최적화(인코딩)는 프로세스 풀에서 모든 이미지를 동시에 진행
+        optimization = submit_image_optimization(image_filename, stream, digest)
+        staged_images.append((original_name, image_filename, stream, digest, optimization))
+
+    staged = {'uploads': [], 'names': {}, 'upload_paths': {}, 'urls': {}, 'srcsets': {}}
+    for original_name, image_filename, stream, digest, optimization in staged_images:
+        variants = image_variants_result(image_filename, optimization)
+        if variants:
+            image_path = image_variant_path(digest, variants[-1][0])
+            if len(variants) > 1:
+                staged['srcsets'][image_filename] = ', '.join(
+                    f"/images/{os.path.basename(image_variant_path(digest, width))} {width}w" for width, _ in variants)
+            uploads = [(image_variant_path(digest, width), content, True) for width, content in variants if content is not None]
+        else:
+            stored_filename = content_addressed_filename(digest, image_filename) if digest else image_filename
+            image_path = f"public/images/{stored_filename}"
+            # 같은 내용이 이미 저장돼 있으면(다른 글, 다른 이름이라도) 다시 올리지 않음
+            # 내용을 메모리로 읽지 않고 임시 파일 스트림 그대로 넘김
+            uploads = [] if (digest and indexed_sha(image_path)) else [(image_path, stream, True)]
+        staged['urls'][image_filename] = f"/images/{os.path.basename(image_path)}"
+        if image_path not in staged['names']:
+            staged['names'][image_path] = []
+            staged['upload_paths'][image_path] = [path for path, _, _ in uploads]
+            staged['uploads'] += uploads
+        staged['names'][image_path].append((original_name, image_filename, digest))
+    return staged
+
+def rewrite_post_html(html_content, image_urls, image_srcsets, referenced=None):
+    """HTML 안의 이미지 경로를 업로드된 경로로 바꿉니다. referenced(set)를 넘기면 참조된 이미지 이름을 모아 줍니다."""
+    def resolve_image_url(src):
+        url = local_image_url(src)
+        if url is None:
+            return None
+        key = image_reference_key(src)
+        if referenced is not None:
+            referenced.add(key)
+        return image_urls.get(key, url)
+
+    def image_srcset(src):
+        return image_srcsets.get(image_reference_key(src)) if local_image_url(src) else None
+
+    # 바뀌는 속성 값만 갈아 끼움
+    with span('html_rewrite'):
+        return rewrite_image_paths(html_content, resolve_image_url, image_srcset)
+
+def uploaded_image_entries(staged, failed):
+    """업로드 결과로 (올라간 이미지 이름들, image_hashes 항목들, [(원래 이름, 실패 원인 예외)])를 만듭니다."""
+    uploaded_images = []
+    image_hashes = []
+    failures = []
+    for image_path, references in staged['names'].items():
+        failed_path = next((path for path in staged['upload_paths'][image_path] if path in failed), None)
+        for original_name, image_filename, digest in references:
+            if failed_path:
+                failures.append((original_name, failed[failed_path]))
+                continue
+            uploaded_images.append(image_filename)
+            if digest:
+                entry = {'name': image_filename, 'sha256': digest, 'path': staged['urls'][image_filename]}
+                if image_filename in staged['srcsets']:
+                    entry['srcset'] = staged['srcsets'][image_filename]
+                image_hashes.append(entry)
+    return uploaded_images, image_hashes, failures
+
+def run_upload(html_filename, html_content, images, form, progress=ignore_progress):
+    """요청 객체 없이 업로드의 나머지 단계(이미지 처리, 경로 재작성, GitHub 커밋, MongoDB 저장)를 실행합니다.
+
+    Parameters:
+    - html_filename: 안전한 HTML 파일 이름.
+    - html_content: HTML 내용(str).
+    - images: (원래 이름, 안전한 파일 이름, 읽을 수 있는 스트림) 튜플 리스트.
+    - form: 'title', 'content', 'date', 'password' 키를 가진 딕셔너리.
+    - progress: GitHub 경로별 진행 상황을 progress(path, status)로 받는 콜백.
+
+    Returns:
+    - (성공 메시지, 사용자에게 보여줄 경고 메시지 리스트).
+      HTML 업로드가 실패하면 GithubException을 그대로 올립니다.
+    """
+    name = os.path.splitext(html_filename)[0]
+    with span('upload_stage', stage='sha_index'):
+        try_refresh_sha_index()
+    with span('upload_stage', stage='images'):
+        staged = stage_images(images)
+
+    # HTML 파일 내 이미지 경로 수정
+    image_urls = dict(staged['urls'])
+    image_srcsets = dict(staged['srcsets'])
+    referenced = set()
+    modified_html = rewrite_post_html(html_content, image_urls, image_srcsets, referenced)
+    if referenced - image_urls.keys():
+        # 이번에 올리지 않은 이미지는 같은 글의 이전 업로드에서 저장한 경로를 그대로 사용.
+        # 그런 이미지가 있을 때만 이전 image_hashes를 읽음 (이미지를 모두 함께 올리면 MongoDB 요청 없음)
+        previous_doc = get_collection().find_one({'name': name}, {'image_hashes': 1}) or {}
+        for entry in previous_doc.get('image_hashes', []):
+            image_urls.setdefault(entry['name'], entry['path'])
+            if entry.get('srcset'):
+                image_srcsets.setdefault(entry['name'], entry['srcset'])
+        modified_html = rewrite_post_html(html_content, image_urls, image_srcsets)
+    html_path = f"public/pages/{html_filename}"
+    files = [(html_path, modified_html, False)] + staged['uploads']
+    for path, _, _ in files:
+        progress(path, 'pending')
+
+    # GitHub에 HTML과 이미지를 한 번에 업로드
+    with span('upload_stage', stage='github'):
+        failed = upload_files_to_github(files, f"Add/update post: {html_filename}", progress)
+
+    uploaded_images, image_hashes, failures = uploaded_image_entries(staged, failed)
+    messages = [f"{original_name} 업로드 중 오류 발생: {github_error_message(e)}" for original_name, e in failures]
 
     # 비밀번호 처리
-    password = request.form.get('password')
+    password = form.get('password')
     # Removed the mandatory password check
     # if not password:
     #     return handle_error('비밀번호는 필수 입력 사항입니다.')
@@ -138,31 +595,253 @@ def process_upload(html_file):
         plain_password = None
 
     # MongoDB에 데이터 저장 또는 업데이트
-    name = os.path.splitext(html_filename)[0]
     document = {
-        'name': name,
-        'title': request.form.get('title'),
-        'content': request.form.get('content'),
-        'date': parse_date(request.form.get('date')),
+        'title': form.get('title'),
+        'content': form.get('content'),
+        'date': parse_date(form.get('date')),
         'filename': html_filename,
-        'images': uploaded_images
+        'images': uploaded_images,
     }
 
     if plain_password:
         document['password'] = plain_password  # 평문 비밀번호 추가
 
-    existing_doc = collection.find_one({'name': name})
-    if existing_doc:
-        collection.update_one({'_id': existing_doc['_id']}, {'$set': document})
+    with span('upload_stage', stage='database'):
+        # image_hashes(내용 해시 -> 저장 경로): 다음에 HTML만 다시 올려도 같은 경로를 가리키도록 이전 항목과 합쳐 저장
+        inserted = upsert_post(name, document, image_hashes)
+        # 피드/사이트맵은 다른 컬렉션이라 글 upsert와 한 요청으로 묶을 수 없음 (MongoDB 요청이 네 번 더 듦)
+        update_feeds([dict(document, name=name)])
+    if inserted:
+        success_message = '파일 업로드 및 데이터베이스 저장 완료'
+    else:
         success_message = '파일 업로드 및 데이터베이스 업데이트 완료'
+    invalidate_home_cache()
+    return success_message, messages
+
+@bp.route('/jobs/<job_id>')
+def job_status(job_id):
+    if not UPLOAD_JOBS:
+        return jsonify({'success': False, 'message': '비동기 업로드가 꺼져 있습니다.'}), 404
+    rows = job_query('SELECT * FROM upload_jobs WHERE id = ?', (job_id,))
+    if not rows:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'}), 404
+    job = rows[0]
+    if job['status'] in ('queued', 'running'):
+        ensure_upload_workers(run_upload)  # 서버가 다시 시작되기 전에 남아 있던 작업도 이어서 처리
+    response = jsonify({
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'status': job['status'],
+        'message': job['message'],
+        'messages': json.loads(job['messages']),
+        'files': json.loads(job['files']),
+        'attempts': job['attempts'],
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+# --- 이어 올리기(청크) 업로드 ---
+# POST /uploads: HTML과 이미지의 이름/크기를 받아 upload_id와 조각 크기를 돌려줌
+# PUT /uploads/<id>/<파일 번호>?offset=N: 조각 하나 (X-Chunk-SHA256 헤더로 내용 확인)
+# GET /uploads/<id>: 파일별로 받은/빠진 조각의 offset (연결이 끊긴 뒤 빠진 조각만 다시 보낼 때)
+# POST /uploads/<id>/finalize: 조각을 이어 붙여 /upload와 같은 process_upload로 처리
+# 조각 내용은 chunks/<sha256>에 한 번만 저장하고 파일의 각 위치는 parts/<파일 번호>-<offset>에 그 해시만
+# 기록하므로, 같은 조각을 다시 받아도(재시도, 같은 내용의 파일) 다시 쓰지 않음.
+# 모든 파일을 임시 파일에 쓴 뒤 os.replace로 바꿔치기하므로 병렬 요청이 잠금 없이 같은 업로드를 다룰 수 있음
+UPLOAD_ID_RE = re.compile(r'[0-9a-f]{32}')
+SHA256_RE = re.compile(r'[0-9a-f]{64}')
+
+def replace_file(path, data):
+    temp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(temp_path, 'wb') as file:
+        file.write(data)
+    os.replace(temp_path, path)
+
+def chunked_upload_manifest(upload_id):
+    """upload_id의 디렉터리와 매니페스트를 돌려줍니다. 꺼져 있거나 없는 업로드면 (None, None)."""
+    if not CHUNKED_UPLOADS or not UPLOAD_ID_RE.fullmatch(upload_id):
+        return None, None
+    upload_dir = os.path.join(CHUNKED_UPLOAD_DIR, upload_id)
+    try:
+        with open(os.path.join(upload_dir, 'manifest.json'), encoding='utf-8') as file:
+            return upload_dir, json.load(file)
+    except FileNotFoundError:
+        return None, None
+
+def received_chunks(upload_dir):
+    """파일 번호 -> {offset: sha256} (지금까지 받은 조각)."""
+    received = {}
+    for name in os.listdir(os.path.join(upload_dir, 'parts')):
+        if name.endswith('.tmp'):
+            continue
+        file_index, offset = map(int, name.split('-'))
+        with open(os.path.join(upload_dir, 'parts', name), encoding='ascii') as file:
+            received.setdefault(file_index, {})[offset] = file.read()
+    return received
+
+def missing_chunks(manifest, received):
+    """파일 번호 -> 아직 받지 못한 조각의 offset 리스트 (빠진 조각이 있는 파일만)."""
+    missing = {}
+    for file_index, entry in enumerate(manifest['files']):
+        offsets = [offset for offset in range(0, entry['size'], manifest['chunk_size'])
+                   if offset not in received.get(file_index, {})]
+        if offsets:
+            missing[file_index] = offsets
+    return missing
+
+def remove_stale_chunked_uploads():
+    cutoff = time.time() - CHUNKED_UPLOAD_RETENTION
+    try:
+        names = os.listdir(CHUNKED_UPLOAD_DIR)
+    except FileNotFoundError:
+        return
+    for name in names:
+        path = os.path.join(CHUNKED_UPLOAD_DIR, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                shutil.rmtree(path, ignore_errors=True)
+        except OSError:
+            pass
+
+def chunked_upload_disabled():
+    return jsonify({'success': False, 'message': '이어 올리기 업로드가 꺼져 있거나 없는 업로드입니다.'}), 404
+
+@bp.route('/uploads', methods=['POST'])
+def start_chunked_upload():
+    if not CHUNKED_UPLOADS:
+        return chunked_upload_disabled()
+    data = request.get_json(silent=True) or {}
+    html_entry = data.get('html') or {}
+    entries = [('html', html_entry)] + [('image', entry) for entry in data.get('images') or []]
+    files = []
+    for kind, entry in entries:
+        name = entry.get('name') or ''
+        size = entry.get('size')
+        digest = (entry.get('sha256') or '').lower() or None
+        allowed = ALLOWED_EXTENSIONS_HTML if kind == 'html' else ALLOWED_EXTENSIONS_IMAGES
+        if not name or not allowed_file(name, allowed):
+            return handle_error(f"{name or 'HTML 파일'}은(는) 허용되지 않는 파일 형식입니다.")
+        if not isinstance(size, int) or size < 0:
+            return handle_error(f"{name}의 크기가 올바르지 않습니다.")
+        if size > MAX_UPLOAD_FILE_SIZE:
+            return handle_error(f"{name}은(는) 최대 파일 크기({MAX_UPLOAD_FILE_SIZE // (1024 * 1024)}MB)를 넘습니다.", 413)
+        if digest and not SHA256_RE.fullmatch(digest):
+            return handle_error(f"{name}의 sha256 값이 올바르지 않습니다.")
+        files.append({'name': name, 'size': size, 'sha256': digest})
+    if sum(entry['size'] for entry in files) > MAX_UPLOAD_REQUEST_SIZE:
+        return handle_error(f'업로드 전체 크기가 제한({MAX_UPLOAD_REQUEST_SIZE // (1024 * 1024)}MB)을 넘습니다.', 413)
+
+    remove_stale_chunked_uploads()
+    upload_id = uuid.uuid4().hex
+    upload_dir = os.path.join(CHUNKED_UPLOAD_DIR, upload_id)
+    os.makedirs(os.path.join(upload_dir, 'parts'))
+    os.makedirs(os.path.join(upload_dir, 'chunks'))
+    manifest = {'files': files, 'chunk_size': CHUNKED_UPLOAD_CHUNK_SIZE, 'created': time.time()}
+    replace_file(os.path.join(upload_dir, 'manifest.json'), json.dumps(manifest).encode('utf-8'))
+    return jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'chunk_size': CHUNKED_UPLOAD_CHUNK_SIZE,
+        'status_url': url_for('main.chunked_upload_status', upload_id=upload_id),
+        'finalize_url': url_for('main.finish_chunked_upload', upload_id=upload_id),
+    }), 201
+
+@bp.route('/uploads/<upload_id>')
+def chunked_upload_status(upload_id):
+    upload_dir, manifest = chunked_upload_manifest(upload_id)
+    if manifest is None:
+        return chunked_upload_disabled()
+    received = received_chunks(upload_dir)
+    missing = missing_chunks(manifest, received)
+    response = jsonify({
+        'success': True,
+        'upload_id': upload_id,
+        'chunk_size': manifest['chunk_size'],
+        'files': [
+            {
+                'name': entry['name'],
+                'size': entry['size'],
+                'received': sorted(received.get(file_index, {})),
+                'missing': missing.get(file_index, []),
+            }
+            for file_index, entry in enumerate(manifest['files'])
+        ],
+    })
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+@bp.route('/uploads/<upload_id>/<int:file_index>', methods=['PUT'])
+def put_upload_chunk(upload_id, file_index):
+    upload_dir, manifest = chunked_upload_manifest(upload_id)
+    if manifest is None or file_index >= len(manifest['files']):
+        return chunked_upload_disabled()
+    size = manifest['files'][file_index]['size']
+    chunk_size = manifest['chunk_size']
+    offset = request.args.get('offset', type=int)
+    if offset is None or offset < 0 or offset >= size or offset % chunk_size:
+        return handle_error(f"offset은 {chunk_size}의 배수이고 파일 크기({size})보다 작아야 합니다.")
+    digest = request.headers.get('X-Chunk-SHA256', '').lower()
+    if not SHA256_RE.fullmatch(digest):
+        return handle_error('X-Chunk-SHA256 헤더가 없거나 올바르지 않습니다.')
+
+    part_path = os.path.join(upload_dir, 'parts', f"{file_index}-{offset}")
+    chunk_path = os.path.join(upload_dir, 'chunks', digest)
+    expected_size = min(chunk_size, size - offset)
+    duplicate = os.path.exists(chunk_path)
+    if duplicate:
+        # 같은 내용의 조각을 이미 받았으면 본문을 읽지 않고 위치만 기록
+        if os.path.getsize(chunk_path) != expected_size:
+            return handle_error('조각의 크기가 이 위치에 맞지 않습니다.')
     else:
-        collection.insert_one(document)
-        success_message = '파일 업로드 및 데이터베이스 저장 완료'
+        data = request.get_data(cache=False)
+        if len(data) != expected_size or hashlib.sha256(data).hexdigest() != digest:
+            return handle_error('조각의 크기나 내용이 X-Chunk-SHA256과 맞지 않습니다. 다시 보내 주세요.')
+        replace_file(chunk_path, data)
+    replace_file(part_path, digest.encode('ascii'))
+    return jsonify({'success': True, 'offset': offset, 'duplicate': duplicate})
 
-    if request.headers.get('X-Requested-With') == 'XMLHttpRequest':
-        return jsonify({'success': True, 'message': success_message}), 200
-    flash(success_message)
-    return redirect(url_for('index'))
+@bp.route('/uploads/<upload_id>/finalize', methods=['POST'])
+def finish_chunked_upload(upload_id):
+    upload_dir, manifest = chunked_upload_manifest(upload_id)
+    if manifest is None:
+        return chunked_upload_disabled()
+    received = received_chunks(upload_dir)
+    missing = missing_chunks(manifest, received)
+    if missing:
+        return jsonify({'success': False, 'message': '아직 받지 못한 조각이 있습니다.', 'missing': missing}), 409
+
+    # 조각을 순서대로 이어 붙여 파일로 만들고, 전체 해시를 받았으면 확인
+    paths = []
+    for file_index, entry in enumerate(manifest['files']):
+        path = os.path.join(upload_dir, f"file-{file_index}")
+        digest = hashlib.sha256()
+        with open(path, 'wb') as file:
+            for offset in range(0, entry['size'], manifest['chunk_size']):
+                with open(os.path.join(upload_dir, 'chunks', received[file_index][offset]), 'rb') as chunk:
+                    data = chunk.read()
+                digest.update(data)
+                file.write(data)
+        if entry['sha256'] and digest.hexdigest() != entry['sha256']:
+            # 이 파일의 조각 기록을 지워 상태 조회에서 모두 빠진 것으로 보이게 함 (처음부터 다시 보냄)
+            for offset in received[file_index]:
+                os.remove(os.path.join(upload_dir, 'parts', f"{file_index}-{offset}"))
+            return handle_error(f"{entry['name']}의 내용이 sha256과 맞지 않습니다. 다시 보내 주세요.", 409)
+        paths.append(path)
+
+    streams = [open(path, 'rb') for path in paths]
+    try:
+        html_file = FileStorage(stream=streams[0], filename=manifest['files'][0]['name'], name='html_file')
+        image_files = [FileStorage(stream=stream, filename=entry['name'], name='image_files[]')
+                       for stream, entry in zip(streams[1:], manifest['files'][1:])]
+        form = {key: request.form.get(key) for key in ('title', 'content', 'date', 'password')}
+        response = make_response(process_upload(html_file, image_files, form))
+    finally:
+        for stream in streams:
+            stream.close()
+    # 실패하면 조각을 남겨 두어 finalize만 다시 시도할 수 있게 함
+    if response.status_code < 400:
+        shutil.rmtree(upload_dir, ignore_errors=True)
+    return response
 
 def parse_date(date_str):
     try:
@@ -170,11 +849,12 @@ def parse_date(date_str):
     except (ValueError, TypeError):
         return datetime.now()
 
-@app.route('/check_existing', methods=['POST'])
+@bp.route('/check_existing', methods=['POST'])
 def check_existing():
     filename = request.json.get('filename')
     name = os.path.splitext(filename)[0]
-    existing_doc = collection.find_one({'name': name})
+    # 폼을 채우는 데 필요한 필드만 가져옴 (HTML 이미지 목록 등은 받지 않음)
+    existing_doc = get_collection().find_one({'name': name}, CHECK_EXISTING_PROJECTION)
     if existing_doc:
         return jsonify({
             'exists': True,
@@ -185,7 +865,7 @@ def check_existing():
         })
     return jsonify({'exists': False})
 
-@app.template_filter('format_date')
+@bp.app_template_filter('format_date')
 def format_date(value):
     if isinstance(value, datetime):
         return value.strftime('%Y-%m-%d')
@@ -194,8 +874,125 @@ def format_date(value):
     except (ValueError, TypeError):
         return value
 
+@bp.app_template_filter('iso_datetime')
+def iso_datetime(value):
+    # 피드/사이트맵의 시각 (RFC 3339). feeds 문서의 시각은 UTC로 저장되고 MongoDB에서는 시간대 없이 읽힘
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime('%Y-%m-%dT%H:%M:%SZ')
+
+@bp.app_template_filter('compact_json')
+def compact_json(value):
+    # tojson과 같이 <, >, &, '를 이스케이프해 <script> 안에 넣어도 안전하지만, 공백 없이 한글도 그대로 씀
+    return htmlsafe_json_dumps(value, dumps=json.dumps, separators=(',', ':'), ensure_ascii=False)
+
+# --- 시뮬레이션 보고서 ---
+def render_report_stream(template_name, **context):
+    """templates/의 보고서 템플릿을 앱과 같은 Jinja 환경(필터, 자동 이스케이프)으로 렌더링하며
+    문자열 조각을 차례로 돌려줍니다. 요청 컨텍스트 없이도 쓸 수 있습니다."""
+    return app.jinja_env.get_template(template_name).generate(**context)
+
+def write_report(target, template_name, **context):
+    """보고서를 target(파일 경로 또는 쓰기 가능한 텍스트 파일)에 렌더링되는 대로 조각 단위로 씁니다."""
+    if isinstance(target, (str, os.PathLike)):
+        with open(target, 'w', encoding='utf-8') as file:
+            file.writelines(render_report_stream(template_name, **context))
+    else:
+        target.writelines(render_report_stream(template_name, **context))
+
+def publish_report(html_filename, template_name, form, progress=ignore_progress, **context):
+    """보고서를 렌더링해 /upload와 같은 경로(GitHub 커밋, MongoDB 저장)로 바로 게시합니다.
+
+    form은 run_upload와 같이 'title', 'content', 'date', 'password' 키를 가진 딕셔너리이고,
+    반환값도 run_upload와 같습니다.
+    """
+    html_content = ''.join(render_report_stream(template_name, **context))
+    return run_upload(secure_filename(html_filename), html_content, [], form, progress)
+
+# --- 시뮬레이션 작업 ---
+# POST /simulations/<이름>: 파라미터(JSON 또는 폼)를 받아 작업을 시작하고 job_id를 돌려줌.
+#   같은 (시뮬레이션, 파라미터, 시드)는 같은 job_id이므로 끝난 작업이면 게시된 페이지 주소를 바로 돌려줌
+# GET /simulations/jobs/<job_id>: 작업 상태 ('running' -> 'done' 또는 'failed'). 실패한 작업은 같은 요청으로 다시 시작
+# 계산은 프로세스 풀에서, 게시는 작업마다 띄운 스레드에서 함. 계산 결과(보고서 값)도 저장하므로
+# 게시만 실패한 작업은 다시 요청하면 계산 없이 게시만 다시 함 (작업 실행과 기록은 homeset/simulations.py)
+def simulation_job_response(job, status=200):
+    body = {
+        'success': job['status'] != 'failed',
+        'job_id': job['id'],
+        'simulation': job['simulation'],
+        'params': json.loads(job['params']),
+        'status': job['status'],
+        'message': job['message'],
+        'messages': json.loads(job['messages']),
+        'status_url': url_for('main.simulation_status', job_id=job['id']),
+    }
+    if job['filename']:
+        body['url'] = url_for('main.serve_page', filename=job['filename'])
+    response = jsonify(body)
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status
+
+@bp.route('/simulations/<name>', methods=['POST'])
+def start_simulation(name):
+    if not SIMULATION_JOBS:
+        return jsonify({'success': False, 'message': '시뮬레이션 작업이 꺼져 있습니다.'}), 404
+    if name not in SIMULATIONS:
+        return jsonify({'success': False, 'message': f"없는 시뮬레이션입니다. ({', '.join(SIMULATIONS)} 중 하나)"}), 404
+    values = request.get_json(silent=True)
+    if not isinstance(values, dict):
+        values = request.form.to_dict()
+    try:
+        params = simulation_params(SIMULATIONS[name], values)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    try:
+        simulation_module(name)  # numpy 등 필요한 모듈이 있는지 작업을 만들기 전에 확인
+    except ImportError as e:
+        return jsonify({'success': False, 'message': f"시뮬레이션에 필요한 모듈이 없습니다: {e.name}"}), 503
+
+    job_id = simulation_key(name, params)
+    job, claimed = claim_simulation_job(job_id, name, params)
+    if claimed:
+        result = json.loads(job['result']) if job['result'] else None
+        threading.Thread(target=with_app_context(run_simulation_job),
+                         args=(job_id, job['claim'], name, params, publish_report, result),
+                         name='simulation-job', daemon=True).start()
+    return simulation_job_response(job, 200 if job['status'] == 'done' else 202)
+
+@bp.route('/simulations/jobs/<job_id>')
+def simulation_status(job_id):
+    if not SIMULATION_JOBS:
+        return jsonify({'success': False, 'message': '시뮬레이션 작업이 꺼져 있습니다.'}), 404
+    rows = simulation_query('SELECT * FROM simulation_jobs WHERE id = ?', (job_id,))
+    if not rows:
+        return jsonify({'success': False, 'message': '작업을 찾을 수 없습니다.'}), 404
+    return simulation_job_response(rows[0])
+
+def create_app(config=None, db=None, repo=None):
+    """Flask 애플리케이션 팩토리.
+
+    Parameters:
+    - config: app.config에 덮어쓸 설정 딕셔너리.
+    - db: MongoDB 데이터베이스 대신 쓸 객체 (예: mongomock.MongoClient().pages).
+    - repo: GitHub 리포지토리 대신 쓸 객체 (예: bench/fake_github.py의 FakeRepo).
+    """
+    app = Flask(__name__, template_folder='../templates')
+    app.secret_key = os.getenv('FLASK_SECRET_KEY', 'fallback_secret_key')  # 환경 변수에서 비밀 키 가져오기
+    app.request_class = SpooledRequest
+    # 요청 전체 크기 제한: Content-Length를 보고 본문을 읽기 전에 413으로 거절
+    app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_REQUEST_SIZE
+    if config:
+        app.config.update(config)
+    configure_clients(app, db, repo)
+    app.register_blueprint(bp)
+    return app
+
+# Vercel과 `flask run`이 찾는 모듈 수준 애플리케이션 (import만으로는 DB/GitHub에 연결하지 않음)
+app = create_app()
+
 if __name__ == '__main__':
-    if repo is None:
-        print("GitHub 리포지토리에 접근할 수 없습니다. 환경 변수를 확인하세요.")
+    if get_repo() is None:
+        logger.error("GitHub 리포지토리에 접근할 수 없습니다. 환경 변수를 확인하세요.")
     else:
         app.run(debug=True)
+
@@ -0,0 +1,62 @@
+"""
+일괄 커밋(batch)과 파일별 커밋(per_file) 모드의 GitHub API 호출 수를 비교합니다.
+
+이미지 N개와 HTML 하나를 새로 올릴 때 (SHA 인덱스 조회 2번 포함):
+- per_file: 파일마다 create_file 1번 -> 호출 N + 3번, 커밋 N + 1개
+- batch: 이미지마다 blob 1번(HTML은 트리 요청에 실림) + ref/커밋 조회, 트리, 커밋, ref 이동 -> 호출 N + 7번, 커밋 1개
+batch는 호출이 4번 더 들지만 커밋이 하나라 업로드 중간 상태가 브랜치에 남지 않습니다.
+모드마다 업로드가 성공하고 HTML과 이미지가 모두 들어갔는지, 호출 수와 커밋 수가 위와 같은지 확인합니다.
+
+실행: python bench/bench_commit.py [이미지 수]
+"""
+import io
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import index
+from homeset import clients, commits
+import fake_mongo
+from fake_github import FakeRepo
+
+
+def run(mode, image_count):
+    commits.GITHUB_COMMIT_MODE = mode
+    fake = FakeRepo()
+    app = index.create_app(db=fake_mongo.MongoClient().pages, repo=fake)
+
+    data = {
+        'html_file': (io.BytesIO(b'<html><body><img src="img/photo0.png"></body></html>'), 'post.html'),
+        'title': 'bench',
+        'date': '2024-09-20',
+        'image_files': [(io.BytesIO(os.urandom(2048)), f'photo{i}.png') for i in range(image_count)],
+    }
+    response = app.test_client().post(
+        '/upload', data=data, content_type='multipart/form-data',
+        headers={'X-Requested-With': 'XMLHttpRequest'})
+    assert response.status_code == 200, response.get_json()
+    assert fake.read_file('public/pages/post.html'), mode
+    with app.app_context():
+        stored = clients.get_collection().find_one({'name': 'post'})
+    assert len(stored['images']) == image_count, stored['images']
+    if mode == 'batch':
+        assert (fake.total_calls, fake.commit_count) == (image_count + 7, 1), (fake.total_calls, fake.commit_count)
+    else:
+        assert (fake.total_calls, fake.commit_count) == (image_count + 3, image_count + 1), \
+            (fake.total_calls, fake.commit_count)
+    return fake
+
+
+def main():
+    image_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    print(f"이미지 {image_count}개 업로드")
+    print(f"{'mode':<10}{'API 호출':>10}{'커밋':>6}")
+    for mode in ('per_file', 'batch'):
+        fake = run(mode, image_count)
+        print(f"{mode:<10}{fake.total_calls:>10}{fake.commit_count:>6}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,121 @@
+"""
+글 메타데이터 쓰기 방식별 소요 시간과 MongoDB 왕복 횟수를 비교합니다.
+
+- find+write: 예전 방식. find_one으로 확인한 뒤 update_one 또는 insert_one (글마다 왕복 2번)
+- upsert: upsert_post()의 find_one_and_update(upsert=True) (글마다 왕복 1번)
+- bulk: bulk_upsert_posts()의 bulk_write (1000개마다 왕복 1번)
+그리고 /check_existing의 조회를 문서 전체와 필요한 필드만(projection) 가져오는 경우로 비교합니다.
+
+MONGO_URI가 설정돼 있으면 그 MongoDB(로컬 mongod 권장)의 bench_pages 데이터베이스를, 없으면 mongomock을 씁니다.
+mongomock에서는 네트워크 왕복이 없어 차이가 작게 나오고 왕복 횟수도 셀 수 없습니다.
+
+실행: MONGO_URI=mongodb://localhost:27017 python bench/bench_metadata.py [글 수]
+"""
+import os
+import sys
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pymongo import monitoring
+
+from api import index
+from homeset import clients
+
+
+class CommandCounter(monitoring.CommandListener):
+    def __init__(self):
+        self.count = 0
+
+    def started(self, event):
+        self.count += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+
+def post_fields(i, round_number):
+    return {
+        'title': f'글 {i}',
+        'content': f'벤치마크용 내용 {i} ' * 50,
+        'date': datetime(2024, 1, 1),
+        'filename': f'post{i}.html',
+        'images': [f'photo{j}.png' for j in range(20)],
+        'image_hashes': [{'name': f'photo{j}.png', 'sha256': f'{round_number:064x}', 'path': f'/images/{j}.png'}
+                         for j in range(20)],
+    }
+
+
+def find_then_write(count, round_number):
+    collection = clients.get_collection()
+    for i in range(count):
+        document = dict(post_fields(i, round_number), name=f'post{i}')
+        existing_doc = collection.find_one({'name': f'post{i}'})
+        if existing_doc:
+            collection.update_one({'_id': existing_doc['_id']}, {'$set': document})
+        else:
+            collection.insert_one(document)
+
+
+def upsert_each(count, round_number):
+    for i in range(count):
+        index.upsert_post(f'post{i}', post_fields(i, round_number))
+
+
+def bulk_upsert(count, round_number):
+    index.bulk_upsert_posts([(f'post{i}', post_fields(i, round_number), None) for i in range(count)])
+
+
+def check_existing_full(count, round_number):
+    for i in range(count):
+        clients.get_collection().find_one({'name': f'post{i}'})
+
+
+def check_existing_projected(count, round_number):
+    for i in range(count):
+        clients.get_collection().find_one({'name': f'post{i}'}, index.CHECK_EXISTING_PROJECTION)
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    counter = CommandCounter()
+    if os.getenv('MONGO_URI'):
+        from pymongo import MongoClient
+        db = MongoClient(os.getenv('MONGO_URI'), event_listeners=[counter]).bench_pages
+        backend = 'mongod'
+    else:
+        import fake_mongo
+        db = fake_mongo.MongoClient().bench_pages
+        backend = 'mongomock'
+    # 주입한 db는 그 앱에만 적용되므로, 이 스크립트 전체를 앱 컨텍스트 안에서 실행
+    index.create_app(db=db).app_context().push()
+    print(f"{backend}: 글 {count}개")
+    print(f"{'방식':<16}{'새로 넣기(ms)':>14}{'갱신(ms)':>10}{'왕복/글':>9}")
+
+    for name, func in (('find+write', find_then_write), ('upsert', upsert_each), ('bulk', bulk_upsert)):
+        clients.get_collection().drop()
+        clients.ensure_indexes()
+        timings = []
+        counter.count = 0
+        for round_number in (1, 2):  # 1: 모두 새 글, 2: 모두 기존 글 갱신
+            start = time.perf_counter()
+            func(count, round_number)
+            timings.append(time.perf_counter() - start)
+        assert clients.get_collection().count_documents({}) == count, name
+        trips = f"{counter.count / (2 * count):>9.3f}" if backend == 'mongod' else f"{'-':>9}"
+        print(f"{name:<16}{timings[0] * 1000:>14.1f}{timings[1] * 1000:>10.1f}{trips}")
+
+    print(f"\n{'/check_existing':<16}{'시간(ms)':>14}")
+    for name, func in (('전체 문서', check_existing_full), ('projection', check_existing_projected)):
+        start = time.perf_counter()
+        func(count, 0)
+        print(f"{name:<16}{(time.perf_counter() - start) * 1000:>14.1f}")
+
+
+if __name__ == '__main__':
+    main()
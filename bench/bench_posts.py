@@ -0,0 +1,94 @@
+"""
+/posts 목록의 키셋 페이지네이션과 skip(offset) 방식의 페이지 깊이별 조회 시간을 비교합니다.
+
+MONGO_URI가 설정돼 있으면 그 MongoDB(로컬 mongod 권장)의 bench_pages.HoMe 컬렉션을,
+없으면 mongomock을 씁니다. mongomock은 인덱스를 쓰지 않으므로 두 방식 모두 전체를 훑어
+깊이에 따른 차이가 드러나지 않습니다. 의미 있는 비교는 로컬 mongod에서 하세요.
+
+실행: MONGO_URI=mongodb://localhost:27017 python bench/bench_posts.py [문서 수]
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from pymongo import DESCENDING
+
+from api import index
+from homeset import clients
+
+BASE_DATE = datetime(2020, 1, 1)
+
+
+def seed(collection, count):
+    collection.drop()
+    batch = []
+    for i in range(count):
+        batch.append({
+            'name': f'post{i}',
+            'title': f'글 {i}',
+            'content': f'벤치마크용 내용 {i}',
+            'date': BASE_DATE + timedelta(seconds=i),
+            'filename': f'post{i}.html',
+            'images': [],
+        })
+        if len(batch) == 10000:
+            collection.insert_many(batch)
+            batch = []
+    if batch:
+        collection.insert_many(batch)
+
+
+def best_of(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    page_size = index.POSTS_PAGE_SIZE
+    if os.getenv('MONGO_URI'):
+        from pymongo import MongoClient
+        db = MongoClient(os.getenv('MONGO_URI')).bench_pages
+        backend = 'mongod'
+    else:
+        import fake_mongo
+        db = fake_mongo.MongoClient().bench_pages
+        backend = 'mongomock'
+    # 주입한 db는 그 앱에만 적용되므로, 이 스크립트 전체를 앱 컨텍스트 안에서 실행
+    index.create_app(db=db).app_context().push()
+    collection = clients.get_collection()
+
+    print(f"{backend}: 문서 {count}개 넣는 중...")
+    seed(collection, count)
+    clients.ensure_indexes()
+
+    print(f"{'페이지':>8}{'keyset(ms)':>12}{'skip(ms)':>10}")
+    last_page = count // page_size
+    for page in sorted({p for p in (1, 10, 100, 1000) if p < last_page} | {last_page}):
+        depth = (page - 1) * page_size
+        if page == 1:
+            cursor = None
+        else:
+            # 바로 앞 페이지의 마지막 글 = 최신 순으로 depth번째 글
+            last = collection.find_one({'date': BASE_DATE + timedelta(seconds=count - depth)})
+            cursor = (last['date'], last['_id'])
+
+        keyset = best_of(lambda: index.find_posts_page(cursor))
+        skip = best_of(lambda: list(collection.find({}, index.POSTS_PROJECTION)
+                                    .sort([('date', DESCENDING), ('_id', DESCENDING)])
+                                    .skip(depth).limit(page_size)))
+        posts, _ = index.find_posts_page(cursor)
+        assert posts[0]['name'] == f'post{count - 1 - depth}', posts[0]['name']
+        print(f"{page:>8}{keyset * 1000:>12.1f}{skip * 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
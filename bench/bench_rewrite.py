@@ -0,0 +1,77 @@
+"""
+HTML 이미지 경로 재작성: 예전 BeautifulSoup 왕복 방식과 HTMLParser 기반 부분 치환 방식을 비교합니다.
+
+각 문서에 대해 다음을 확인한 뒤 소요 시간을 출력합니다.
+- 새 방식의 결과를 BeautifulSoup으로 다시 직렬화하면 예전 방식의 결과와 바이트 단위로 같음
+- 경로를 바꾸지 않는 resolve를 넘기면 입력과 바이트 단위로 같음 (손대지 않은 부분은 재포맷되지 않음)
+어긋나면 AssertionError로 끝납니다. 같은 확인을 tests/test_rewrite.py가 작은 문서로 합니다.
+
+실행: python bench/bench_rewrite.py  (beautifulsoup4 필요: pip install -r bench/requirements.txt)
+"""
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bs4 import BeautifulSoup
+
+from homeset import rewriter
+
+
+def rewrite_with_soup(html_content):
+    # user-005 이전 process_upload의 동작
+    soup = BeautifulSoup(html_content, 'html.parser')
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if src:
+            img['src'] = f"/images/{os.path.basename(src)}"
+    return str(soup)
+
+
+def synthetic_page(sections):
+    rows = []
+    for i in range(sections):
+        rows.append(
+            f'<div class="post" id="p{i}"><h2>섹션 {i}</h2>\n'
+            f'<p>Lorem ipsum &amp; dolor <b>sit</b> amet, {i}.</p>\n'
+            f'<img src="assets/img/photo{i}.png" alt="사진 {i}" width=320>\n'
+            f"<img src='../shared/icon{i % 7}.svg' title=\"icon\"/>\n"
+            f'<table><tr><td>{i}</td><td>{i * i}</td></tr></table></div>\n'
+        )
+    return '<!DOCTYPE html>\n<html><head><meta charset="utf-8"></head><body>\n' + ''.join(rows) + '</body></html>\n'
+
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def main():
+    documents = {}
+    for name in ('pagesimages/simulation_result.html', 'pagesimages/coin_reverse.html',
+                 'simulation_result.html', 'test.html', 'upload.html'):
+        with open(os.path.join(ROOT, name), encoding='utf-8') as file:
+            documents[name] = file.read()
+    documents['synthetic (2000 sections)'] = synthetic_page(2000)
+
+    print(f"{'문서':<34}{'크기(KB)':>10}{'soup(ms)':>10}{'parser(ms)':>12}{'배속':>7}")
+    for name, html_content in documents.items():
+        soup_time, expected = timed(rewrite_with_soup, html_content)
+        parser_time, actual = timed(rewriter.rewrite_image_paths, html_content, rewriter.local_image_url)
+
+        assert str(BeautifulSoup(actual, 'html.parser')) == expected, name
+        assert rewriter.rewrite_image_paths(html_content, lambda url: None) == html_content, name
+
+        size = len(html_content.encode('utf-8')) / 1024
+        print(f"{name:<34}{size:>10.1f}{soup_time * 1000:>10.1f}{parser_time * 1000:>12.1f}"
+              f"{soup_time / parser_time:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+"""
+지연(latency)을 주입한 가짜 GitHub에 대해 이미지 blob 업로드 워커 수별 소요 시간을 측정합니다.
+일부 blob 요청에 403 secondary rate limit / 502 오류를 주입해 재시도 경로도 함께 확인합니다.
+
+실행: python bench/bench_upload.py [이미지 수] [호출당 지연(초)]
+"""
+import io
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import index
+from homeset import clients, commits, scheduler
+import fake_mongo
+from fake_github import FakeRepo
+
+
+def run(workers, image_count, latency, inject_errors=False):
+    commits.GITHUB_UPLOAD_WORKERS = workers
+    scheduler.GITHUB_BACKOFF_BASE = 0.01
+    fake = FakeRepo(latency=latency)
+    app = index.create_app(db=fake_mongo.MongoClient().pages, repo=fake)
+    if inject_errors:
+        fake.fail_next('create_git_blob', 403, {'retry-after': '0'},
+                       'You have exceeded a secondary rate limit')
+        fake.fail_next('create_git_blob', 502, message='Server Error')
+
+    data = {
+        'html_file': (io.BytesIO(b'<html><body><img src="photo0.png"></body></html>'), 'post.html'),
+        'title': 'bench',
+        'date': '2024-09-20',
+        'image_files[]': [(io.BytesIO(os.urandom(4096)), f'photo{i}.png') for i in range(image_count)],
+    }
+    client = app.test_client()
+    start = time.perf_counter()
+    response = client.post('/upload', data=data, content_type='multipart/form-data',
+                           headers={'X-Requested-With': 'XMLHttpRequest'})
+    elapsed = time.perf_counter() - start
+    assert response.status_code == 200, response.get_json()
+    with app.app_context():
+        stored = clients.get_collection().find_one({'name': 'post'})
+    assert len(stored['images']) == image_count, stored['images']
+    return elapsed, fake
+
+
+def main():
+    image_count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    print(f"이미지 {image_count}개, GitHub 호출당 지연 {latency * 1000:.0f}ms")
+    print(f"{'workers':>8}{'시간(초)':>10}{'blob 호출':>10}")
+    for workers in (1, 4, 8, 16):
+        elapsed, fake = run(workers, image_count, latency)
+        print(f"{workers:>8}{elapsed:>10.2f}{fake.calls['create_git_blob']:>10}")
+
+    elapsed, fake = run(8, image_count, latency, inject_errors=True)
+    print(f"오류 주입(403 rate limit + 502): {elapsed:.2f}초, "
+          f"blob 호출 {fake.calls['create_git_blob']}회 (재시도 2회 포함)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,251 @@
+"""
+GitHub 리포지토리를 흉내 내는 로컬 대역(fake)입니다.
+
+api/index.py와 homeset/ 패키지가 사용하는 PyGithub Repository 메서드만 구현하며,
+메모리 안에 브랜치/커밋/트리/blob을 보관하고 API 호출 횟수를 셉니다.
+latency로 호출마다 네트워크 지연을 흉내 낼 수 있고, fail_next()로 특정 호출에
+GitHub 오류(403 rate limit, 5xx 등)를 주입할 수 있습니다.
+rate_limit을 주면 rate_window초마다 그 수만큼만 호출을 받고, 넘으면 GitHub처럼
+x-ratelimit-remaining: 0 / x-ratelimit-reset 헤더가 붙은 403을 올립니다.
+벤치마크와 수동 테스트에서 `index.create_app(repo=FakeRepo())`처럼 주입해 사용합니다.
+"""
+import base64
+import hashlib
+import itertools
+import threading
+import time
+from collections import Counter, defaultdict
+from types import SimpleNamespace
+
+from github import GithubException
+
+
+def git_blob_sha(content):
+    return hashlib.sha1(b"blob %d\0" % len(content) + content).hexdigest()
+
+
+class FakeRepo:
+    def __init__(self, branch='main', latency=0.0, rate_limit=None, rate_window=60.0):
+        self.branch = branch
+        self.latency = latency
+        self.rate_limit = rate_limit
+        self.rate_window = rate_window
+        self.rate_reset = time.time() + rate_window
+        self.rate_used = 0
+        self.rate_limited = 0  # rate limit으로 거절한 호출 수
+        self.blobs = {}       # blob sha -> bytes
+        self.trees = {}       # tree sha -> {path: blob sha}
+        self.commits = {}     # commit sha -> (tree sha, parent shas, message)
+        self.refs = {}
+        self.calls = Counter()
+        self.failures = defaultdict(list)  # 메서드 이름 -> 다음 호출에서 올릴 예외들
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+        root_tree = self._store_tree({})
+        root_commit = self._store_commit(root_tree, [], 'Initial commit')
+        self.refs[f"heads/{branch}"] = root_commit
+
+    # --- 내부 저장소 ---
+
+    def _next_sha(self, prefix):
+        return hashlib.sha1(f"{prefix}{next(self._ids)}".encode()).hexdigest()
+
+    def _store_tree(self, entries):
+        sha = self._next_sha('tree')
+        self.trees[sha] = dict(entries)
+        return sha
+
+    def _store_commit(self, tree_sha, parents, message):
+        sha = self._next_sha('commit')
+        self.commits[sha] = (tree_sha, list(parents), message)
+        return sha
+
+    def _store_blob(self, content):
+        sha = git_blob_sha(content)
+        self.blobs[sha] = content
+        return sha
+
+    def _head_tree(self):
+        tree_sha, _, _ = self.commits[self.refs[f"heads/{self.branch}"]]
+        return self.trees[tree_sha]
+
+    def _commit_files(self, changes, message):
+        entries = dict(self._head_tree())
+        entries.update(changes)
+        tree_sha = self._store_tree(entries)
+        head = self.refs[f"heads/{self.branch}"]
+        commit_sha = self._store_commit(tree_sha, [head], message)
+        self.refs[f"heads/{self.branch}"] = commit_sha
+        return commit_sha
+
+    def _count(self, name):
+        with self._lock:
+            self.calls[name] += 1
+            failure = self.failures[name].pop(0) if self.failures[name] else None
+            if failure is None and self.rate_limit is not None:
+                failure = self._take_rate_limit()
+        if self.latency:
+            time.sleep(self.latency)
+        if failure is not None:
+            raise failure
+
+    def _take_rate_limit(self):
+        now = time.time()
+        if now >= self.rate_reset:
+            self.rate_reset = now + self.rate_window
+            self.rate_used = 0
+        if self.rate_used >= self.rate_limit:
+            self.rate_limited += 1
+            headers = {'x-ratelimit-remaining': '0', 'x-ratelimit-limit': str(self.rate_limit),
+                       'x-ratelimit-reset': str(int(self.rate_reset) + 1)}
+            return GithubException(403, {'message': 'API rate limit exceeded'}, headers)
+        self.rate_used += 1
+        return None
+
+    def fail_next(self, name, status, headers=None, message='Injected failure', times=1):
+        for _ in range(times):
+            self.failures[name].append(GithubException(status, {'message': message}, headers or {}))
+
+    @property
+    def total_calls(self):
+        return sum(self.calls.values())
+
+    @property
+    def commit_count(self):
+        # 초기 커밋은 제외
+        return len(self.commits) - 1
+
+    def read_file(self, path):
+        return self.blobs[self._head_tree()[path]]
+
+    # --- Contents API ---
+
+    def get_contents(self, path, ref=None):
+        self._count('get_contents')
+        with self._lock:
+            tree = self._head_tree()
+            if path not in tree:
+                raise GithubException(404, {'message': 'Not Found'})
+            content = self.blobs[tree[path]]
+        return SimpleNamespace(path=path, sha=tree[path], decoded_content=content)
+
+    def create_file(self, path, message, content, branch=None):
+        self._count('create_file')
+        data = content if isinstance(content, bytes) else content.encode('utf-8')
+        with self._lock:
+            if path in self._head_tree():
+                raise GithubException(422, {'message': '"sha" wasn\'t supplied.'})
+            commit_sha = self._commit_files({path: self._store_blob(data)}, message)
+        return {'content': SimpleNamespace(path=path, sha=git_blob_sha(data)), 'commit': SimpleNamespace(sha=commit_sha)}
+
+    def update_file(self, path, message, content, sha, branch=None):
+        self._count('update_file')
+        data = content if isinstance(content, bytes) else content.encode('utf-8')
+        with self._lock:
+            if self._head_tree().get(path) != sha:
+                raise GithubException(409, {'message': f'{path} does not match {sha}'})
+            commit_sha = self._commit_files({path: self._store_blob(data)}, message)
+        return {'content': SimpleNamespace(path=path, sha=git_blob_sha(data)), 'commit': SimpleNamespace(sha=commit_sha)}
+
+    def delete_file(self, path, message, sha, branch=None):
+        self._count('delete_file')
+        with self._lock:
+            if self._head_tree().get(path) != sha:
+                raise GithubException(409, {'message': f'{path} does not match {sha}'})
+            entries = dict(self._head_tree())
+            del entries[path]
+            head = self.refs[f"heads/{self.branch}"]
+            commit_sha = self._store_commit(self._store_tree(entries), [head], message)
+            self.refs[f"heads/{self.branch}"] = commit_sha
+        return {'commit': SimpleNamespace(sha=commit_sha)}
+
+    # --- Git Data API ---
+
+    def get_git_ref(self, ref):
+        self._count('get_git_ref')
+        with self._lock:
+            sha = self.refs[ref]
+        return FakeRef(self, ref, sha)
+
+    def get_git_commit(self, sha):
+        self._count('get_git_commit')
+        tree_sha, parents, message = self.commits[sha]
+        return SimpleNamespace(sha=sha, tree=SimpleNamespace(sha=tree_sha), parents=parents, message=message)
+
+    def get_git_tree(self, sha, recursive=False):
+        self._count('get_git_tree')
+        with self._lock:
+            # 커밋 SHA를 넘겨도 해당 커밋의 트리를 돌려줌 (GitHub API와 동일)
+            tree_sha = self.commits[sha][0] if sha in self.commits else sha
+            entries = sorted(self.trees[tree_sha].items())
+        elements = [SimpleNamespace(path=path, sha=blob_sha, type='blob') for path, blob_sha in entries]
+        return SimpleNamespace(sha=tree_sha, tree=elements, truncated=False)
+
+    def get_git_blob(self, sha):
+        self._count('get_git_blob')
+        with self._lock:
+            if sha not in self.blobs:
+                raise GithubException(404, {'message': 'Not Found'})
+            content = self.blobs[sha]
+        return SimpleNamespace(sha=sha, content=base64.b64encode(content).decode('ascii'), encoding='base64', size=len(content))
+
+    def create_git_blob(self, content, encoding):
+        self._count('create_git_blob')
+        data = base64.b64decode(content) if encoding == 'base64' else content.encode('utf-8')
+        with self._lock:
+            sha = self._store_blob(data)
+        return SimpleNamespace(sha=sha)
+
+    def create_git_tree(self, tree, base_tree=None):
+        self._count('create_git_tree')
+        with self._lock:
+            entries = dict(self.trees[base_tree.sha]) if base_tree is not None else {}
+            for element in tree:
+                item = element._identity
+                if 'content' in item:
+                    entries[item['path']] = self._store_blob(item['content'].encode('utf-8'))
+                elif item.get('sha') is None:
+                    entries.pop(item['path'], None)
+                else:
+                    if item['sha'] not in self.blobs:
+                        raise GithubException(422, {'message': f"Invalid sha {item['sha']}"})
+                    entries[item['path']] = item['sha']
+            sha = self._store_tree(entries)
+        return SimpleNamespace(sha=sha)
+
+    def create_git_commit(self, message, tree, parents):
+        self._count('create_git_commit')
+        with self._lock:
+            sha = self._store_commit(tree.sha, [p.sha for p in parents], message)
+        return SimpleNamespace(sha=sha, tree=tree)
+
+
+class FakeRef:
+    def __init__(self, repo, ref, sha):
+        self._repo = repo
+        self.ref = f"refs/{ref}"
+        self._name = ref
+        self.object = SimpleNamespace(sha=sha)
+
+    def update(self):
+        # 조건부 요청(If-None-Match) 흉내: ref가 바뀌었을 때만 True
+        repo = self._repo
+        repo._count('update_git_ref')
+        with repo._lock:
+            current = repo.refs[self._name]
+        if current == self.object.sha:
+            return False
+        self.object = SimpleNamespace(sha=current)
+        return True
+
+    def edit(self, sha, force=False):
+        repo = self._repo
+        repo._count('edit_git_ref')
+        with repo._lock:
+            current = repo.refs[self._name]
+            _, parents, _ = repo.commits[sha]
+            if not force and current not in parents:
+                raise GithubException(422, {'message': 'Update is not a fast forward'})
+            repo.refs[self._name] = sha
+        self.object = SimpleNamespace(sha=sha)
@@ -0,0 +1,26 @@
+"""
+벤치마크와 테스트에서 MongoDB 대신 쓰는 mongomock 클라이언트입니다.
+
+pymongo 4.11부터 UpdateOne 등은 bulk_write에서 항상 sort= 인자를 넘기는데,
+mongomock의 BulkOperationBuilder.add_update는 이 인자를 받지 않아 TypeError가 납니다.
+api/index.py는 unique한 name으로만 upsert하므로 sort를 쓰지 않으며, 여기서는 sort가
+None일 때만 버리고 넘깁니다 (값이 있으면 mongomock이 흉내 낼 수 없으므로 그대로 오류).
+`index.create_app(db=fake_mongo.MongoClient().pages)`처럼 사용합니다.
+"""
+import mongomock
+from mongomock.collection import BulkOperationBuilder
+
+_add_update = BulkOperationBuilder.add_update
+
+
+def _add_update_without_sort(self, *args, sort=None, **kwargs):
+    if sort is not None:
+        raise NotImplementedError('mongomock은 bulk_write 업데이트의 sort를 지원하지 않습니다')
+    return _add_update(self, *args, **kwargs)
+
+
+BulkOperationBuilder.add_update = _add_update_without_sort
+
+
+def MongoClient(*args, **kwargs):
+    return mongomock.MongoClient(*args, **kwargs)
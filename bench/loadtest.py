@@ -0,0 +1,166 @@
+"""
+Flask 앱의 /, /upload, /check_existing을 여러 스레드로 동시에 호출해 부하 테스트를 합니다.
+
+GitHub은 지연/rate limit을 주입할 수 있는 가짜(FakeRepo)로, MongoDB는 MONGO_URI가 있으면
+그 MongoDB(로컬 mongod 권장)의 bench_pages 데이터베이스를, 없으면 mongomock을 씁니다.
+엔드포인트별/전체 p50/p95/p99 지연, 처리량(요청/초), 최대 메모리(tracemalloc의 Python 힙 최고치와
+프로세스 최대 RSS)를 출력하므로 process_upload의 성능 저하를 실행 전후로 비교할 수 있습니다.
+
+실행 예:
+  python bench/loadtest.py --requests 400 --concurrency 8 --mix index=70,upload=10,check=20
+  python bench/loadtest.py --latency 0.05 --rate-limit 300 --images 4 --image-size 65536
+"""
+import argparse
+import io
+import os
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from api import index
+from fake_github import FakeRepo
+
+ENDPOINTS = ('index', 'upload', 'check')
+
+
+def parse_mix(text):
+    weights = {}
+    for part in text.split(','):
+        name, _, weight = part.partition('=')
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"알 수 없는 엔드포인트: {name} ({', '.join(ENDPOINTS)} 중 하나)")
+        weights[name] = float(weight)
+    return weights
+
+
+def percentile(sorted_values, fraction):
+    # 최근접 순위(nearest-rank) 방식
+    if not sorted_values:
+        return float('nan')
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def make_upload(args, rng, post_number):
+    images = [(io.BytesIO(rng.randbytes(args.image_size)), f'photo{i}.png') for i in range(args.images)]
+    body = ''.join(f'<p>문단 {i}</p><img src="img/photo{i % max(args.images, 1)}.png">\n' for i in range(args.html_sections))
+    return {
+        'html_file': (io.BytesIO(f'<html><body>{body}</body></html>'.encode('utf-8')), f'load{post_number}.html'),
+        'title': f'부하 테스트 {post_number}',
+        'content': '부하 테스트',
+        'date': '2024-09-20',
+        'image_files[]': images,
+    }
+
+
+def worker(app, args, schedule, results, lock, seed):
+    rng = random.Random(seed)
+    client = app.test_client()
+    while True:
+        with lock:
+            if not schedule:
+                return
+            endpoint = schedule.pop()
+        post_number = rng.randrange(args.posts)
+        start = time.perf_counter()
+        if endpoint == 'index':
+            response = client.get('/')
+        elif endpoint == 'check':
+            response = client.post('/check_existing', json={'filename': f'load{post_number}.html'},
+                                   headers={'X-Requested-With': 'XMLHttpRequest'})
+        else:
+            response = client.post('/upload', data=make_upload(args, rng, post_number),
+                                   content_type='multipart/form-data',
+                                   headers={'X-Requested-With': 'XMLHttpRequest'})
+        elapsed = time.perf_counter() - start
+        with lock:
+            results[endpoint].append((elapsed, response.status_code))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 GitHub/MongoDB로 Flask 앱에 부하를 주고 지연/처리량/메모리를 측정합니다.')
+    parser.add_argument('--requests', type=int, default=300, help='전체 요청 수')
+    parser.add_argument('--concurrency', type=int, default=8, help='동시에 요청하는 스레드 수')
+    parser.add_argument('--mix', type=parse_mix, default=parse_mix('index=70,upload=10,check=20'),
+                        help='엔드포인트별 비율 (예: index=70,upload=10,check=20)')
+    parser.add_argument('--posts', type=int, default=50, help='업로드/조회에 돌려 쓰는 글 이름 수')
+    parser.add_argument('--images', type=int, default=2, help='업로드마다 첨부할 이미지 수')
+    parser.add_argument('--image-size', type=int, default=16 * 1024, help='이미지 하나의 크기(바이트)')
+    parser.add_argument('--html-sections', type=int, default=200, help='업로드 HTML의 문단 수')
+    parser.add_argument('--latency', type=float, default=0.0, help='가짜 GitHub 호출당 지연(초)')
+    parser.add_argument('--rate-limit', type=int, default=None, help='가짜 GitHub이 rate-window초마다 받는 최대 호출 수')
+    parser.add_argument('--rate-window', type=float, default=60.0)
+    parser.add_argument('--no-home-cache', action='store_true', help='홈 화면 캐시를 끄고 매번 렌더링')
+    parser.add_argument('--no-tracemalloc', action='store_true', help='tracemalloc을 끔 (측정 오버헤드 제거)')
+    parser.add_argument('--seed', type=int, default=1)
+    args = parser.parse_args()
+
+    if os.getenv('MONGO_URI'):
+        from pymongo import MongoClient
+        db = MongoClient(os.getenv('MONGO_URI')).bench_pages
+        db.HoMe.drop()
+        backend = 'mongod'
+    else:
+        import fake_mongo
+        db = fake_mongo.MongoClient().bench_pages
+        backend = 'mongomock'
+    fake = FakeRepo(latency=args.latency, rate_limit=args.rate_limit, rate_window=args.rate_window)
+    app = index.create_app(db=db, repo=fake)
+    if args.no_home_cache:
+        index.HOME_CACHE_TTL = 0
+
+    rng = random.Random(args.seed)
+    names = list(args.mix)
+    schedule = rng.choices(names, weights=[args.mix[name] for name in names], k=args.requests)
+    results = defaultdict(list)
+    lock = threading.Lock()
+
+    if not args.no_tracemalloc:
+        tracemalloc.start()
+    threads = [threading.Thread(target=worker, args=(app, args, schedule, results, lock, args.seed + i))
+               for i in range(args.concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1] if not args.no_tracemalloc else None
+    tracemalloc.stop()
+    # Linux는 KB, macOS는 바이트 단위
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    max_rss_mb = max_rss / (1024 * 1024) if sys.platform == 'darwin' else max_rss / 1024
+
+    print(f"{backend}, 요청 {args.requests}개, 동시 {args.concurrency}, GitHub 지연 {args.latency * 1000:.0f}ms"
+          + (f", rate limit {args.rate_limit}/{args.rate_window:.0f}s" if args.rate_limit else ""))
+    print(f"{'엔드포인트':<12}{'요청':>6}{'오류':>6}{'p50(ms)':>10}{'p95(ms)':>10}{'p99(ms)':>10}{'최대(ms)':>10}")
+    everything = []
+    for name in ENDPOINTS:
+        if not results[name]:
+            continue
+        latencies = sorted(latency for latency, _ in results[name])
+        errors = sum(1 for _, status in results[name] if status >= 400)
+        everything += latencies
+        print(f"{name:<12}{len(latencies):>6}{errors:>6}"
+              f"{percentile(latencies, 0.50) * 1000:>10.1f}{percentile(latencies, 0.95) * 1000:>10.1f}"
+              f"{percentile(latencies, 0.99) * 1000:>10.1f}{latencies[-1] * 1000:>10.1f}")
+    everything.sort()
+    print(f"{'전체':<12}{len(everything):>6}{'':>6}"
+          f"{percentile(everything, 0.50) * 1000:>10.1f}{percentile(everything, 0.95) * 1000:>10.1f}"
+          f"{percentile(everything, 0.99) * 1000:>10.1f}{everything[-1] * 1000:>10.1f}")
+    print(f"처리량: {len(everything) / elapsed:.1f} 요청/초 ({elapsed:.2f}초)")
+    if peak is not None:
+        print(f"Python 힙 최고치(tracemalloc): {peak / (1024 * 1024):.1f}MB")
+    print(f"프로세스 최대 RSS: {max_rss_mb:.1f}MB")
+    print(f"GitHub 호출 {fake.total_calls}회, 커밋 {fake.commit_count}개, rate limit 거절 {fake.rate_limited}회")
+
+
+if __name__ == '__main__':
+    main()
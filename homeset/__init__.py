@@ -0,0 +1,17 @@
+"""
+api/index.py(Flask 앱)가 쓰는 모듈들입니다. 라우트는 api/index.py에 있고, 여기에는 라우트가 부르는 기능을 둡니다.
+
+- metrics: 구간 시간/카운터 계측과 /metrics(Prometheus 형식) 렌더링
+- clients: MongoDB/GitHub 클라이언트, 앱별 상태, 글 컬렉션 인덱스
+- scheduler: 모든 GitHub 요청이 공유하는 요청 예산, ETag 캐시, 재시도
+- sha_index: GitHub에 있는 파일의 경로 -> blob SHA 인덱스
+- commits: GitHub 커밋(일괄/파일별)과 미리 압축한 변형
+- files, images, rewriter: 업로드 파일 처리, 이미지 최적화, HTML 이미지 경로 재작성
+- feeds: 피드와 사이트맵
+- jobs, simulations: SQLite 작업 대기열(비동기 업로드, 시뮬레이션)
+
+설정은 각 모듈이 import될 때 환경 변수에서 읽으므로 .env도 여기서 먼저 불러옵니다.
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
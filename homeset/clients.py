@@ -0,0 +1,198 @@
+"""
+MongoDB/GitHub 클라이언트와 앱별 상태, 글 컬렉션(HoMe)의 인덱스를 다룹니다.
+"""
+import functools
+import logging
+import os
+import threading
+import time
+
+import pymongo
+from flask import current_app, has_app_context
+from github import Auth, Github
+from github.Repository import Repository
+from pymongo import MongoClient, DESCENDING, TEXT
+from pymongo.errors import ConnectionFailure, PyMongoError
+
+from homeset.metrics import MongoCommandTimer, TIMING_ENABLED
+from homeset.scheduler import schedule_github_requests
+
+logger = logging.getLogger(__name__)
+
+# 환경 변수에서 값을 가져옴
+GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
+GITHUB_REPO = os.getenv('GITHUB_REPO')
+MONGO_URI = os.getenv('MONGO_URI')
+GITHUB_BRANCH = os.getenv('GITHUB_BRANCH', 'main')
+# MongoDB 연결 풀 크기와 타임아웃(ms). 응답 없는 DB를 서버리스 함수가 오래 기다리지 않도록 짧게 둠
+MONGO_MAX_POOL_SIZE = int(os.getenv('MONGO_MAX_POOL_SIZE', '20'))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000'))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000'))
+# 글 컬렉션을 처음 쓸 때 인덱스를 만드는 데 쓸 최대 시간(초). 넘으면 INDEX_RETRY_SECONDS 뒤에 다시 시도
+MONGO_INDEX_TIMEOUT = float(os.getenv('MONGO_INDEX_TIMEOUT', '2'))
+# GitHub 요청 타임아웃(초)
+GITHUB_TIMEOUT = int(os.getenv('GITHUB_TIMEOUT', '15'))
+# 이미지 blob을 동시에 올릴 최대 워커 수 (워커 스레드마다 GitHub 연결 하나)
+GITHUB_UPLOAD_WORKERS = int(os.getenv('GITHUB_UPLOAD_WORKERS', '8'))
+
+# MongoDB / GitHub 클라이언트: import 시점에는 만들지 않고 처음 쓸 때 만들어 재사용
+# create_app(db=..., repo=...)로 로컬 대역을 주입하면 그 앱(app.extensions['homeset'])에서만 그것을 씀
+_clients = {'db': None, 'repo': None}
+_clients_lock = threading.Lock()
+
+def new_app_state(db=None, repo=None):
+    # 앱에 주입한 클라이언트와, 그 DB의 내용에 따라 달라지는 앱별 상태(인덱스 확인, 홈/피드 캐시)
+    return {
+        'db': db,
+        'repo': repo,
+        'indexes': {'ready': False, 'retry_at': 0.0},  # 실패하면 retry_at(monotonic) 이후의 요청에서 다시 시도
+        'home_cache': {'body': None, 'etag': None, 'expires': 0.0},
+        'feed_cache': {},  # (종류, 사이트 주소) -> {'body', 'etag', 'last_modified', 'expires'}
+    }
+
+# 대역을 주입하지 않은 앱과 앱 컨텍스트 밖(sync.py 등)은 지연 생성하는 전역 클라이언트와 이 상태를 같이 씀
+_default_state = new_app_state()
+
+def app_state():
+    if has_app_context():
+        return current_app.extensions.get('homeset', _default_state)
+    return _default_state
+
+def with_app_context(func):
+    """func를 지금의 앱 컨텍스트 안에서 실행하도록 감쌉니다. 스레드/스레드 풀로 넘기는 작업이
+    호출한 앱에 주입된 클라이언트를 쓰게 합니다. 앱 컨텍스트 밖이면 func를 그대로 돌려줍니다."""
+    if not has_app_context():
+        return func
+    app = current_app._get_current_object()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with app.app_context():
+            return func(*args, **kwargs)
+    return wrapper
+
+def get_db():
+    # pymongo의 Database 객체는 bool() 평가를 지원하지 않으므로 None과 직접 비교
+    db = app_state()['db']
+    if db is None:
+        db = _clients['db']
+    if db is None:
+        with _clients_lock:
+            if _clients['db'] is None:
+                # connect=False: 첫 쿼리 때 연결하므로 여기서는 네트워크 요청이 없음
+                client = MongoClient(
+                    MONGO_URI,
+                    maxPoolSize=MONGO_MAX_POOL_SIZE,
+                    connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    connect=False,
+                    event_listeners=[MongoCommandTimer()] if TIMING_ENABLED else [],
+                )
+                _clients['db'] = client.pages
+            db = _clients['db']
+    return db
+
+def get_collection():
+    collection = get_db().HoMe
+    ensure_indexes_once(collection)
+    return collection
+
+def new_github_repo():
+    # lazy=True: 리포지토리 정보를 미리 조회하지 않음 (첫 API 호출 때까지 네트워크 요청 없음)
+    github = Github(
+        auth=Auth.Token(GITHUB_TOKEN) if GITHUB_TOKEN else None,
+        timeout=GITHUB_TIMEOUT,
+        pool_size=GITHUB_UPLOAD_WORKERS,
+        # 요청 간격은 클라이언트마다 따로 재는 PyGithub의 지연 대신 모든 스레드가 공유하는 요청 예산이 정함
+        seconds_between_requests=None,
+        seconds_between_writes=None,
+        retry=None,  # 재시도는 github_call_with_retry()가 요청 예산을 거쳐 함
+        # get_repo(lazy=True)가 Requester를 새로 만들지 않고 아래에서 바꾼 것을 그대로 쓰도록 함
+        lazy=True,
+    )
+    schedule_github_requests(github.requester)
+    return github.get_repo(GITHUB_REPO, lazy=True)
+
+def get_repo():
+    # GITHUB_REPO가 설정되지 않았으면 None
+    repo = app_state()['repo']
+    if repo is None:
+        repo = _clients['repo']
+    if repo is None and GITHUB_REPO:
+        with _clients_lock:
+            if _clients['repo'] is None:
+                _clients['repo'] = new_github_repo()
+            repo = _clients['repo']
+    return repo
+
+def configure_clients(app, db=None, repo=None):
+    """app에만 MongoDB/GitHub 대역을 주입합니다. 다른 앱과 모듈의 app에는 영향이 없습니다."""
+    app.extensions['homeset'] = new_app_state(db, repo) if db is not None or repo is not None else _default_state
+
+def _reset_clients_after_fork():
+    # MongoClient와 PyGithub 연결은 fork한 자식 프로세스에서 재사용하면 안 되므로 새로 만들도록 비움
+    global _clients_lock
+    _clients_lock = threading.Lock()
+    _clients.update(db=None, repo=None)
+
+os.register_at_fork(after_in_child=_reset_clients_after_fork)
+
+_thread_local = threading.local()
+
+def get_worker_repo():
+    # PyGithub의 연결 객체는 스레드 간에 공유할 수 없으므로 워커 스레드마다 별도 클라이언트를 둠
+    repo = get_repo()
+    if not isinstance(repo, Repository):
+        return repo  # 로컬 대역(fake) 등은 그대로 사용
+    worker_repo = getattr(_thread_local, 'repo', None)
+    if worker_repo is None or getattr(_thread_local, 'pid', None) != os.getpid():
+        worker_repo = new_github_repo()
+        _thread_local.repo = worker_repo
+        _thread_local.pid = os.getpid()
+    return worker_repo
+
+INDEX_RETRY_SECONDS = 60
+_indexes_lock = threading.Lock()
+POST_INDEXES = (
+    # 글 이름 중복을 막는 unique 인덱스 (upsert_post가 의존하므로 가장 먼저)
+    ('name', {'unique': True, 'name': 'name_unique'}),
+    # 목록 정렬/키셋 페이지네이션용 (date, _id) 내림차순 인덱스
+    ([('date', DESCENDING), ('_id', DESCENDING)], {'name': 'date_id_desc'}),
+    # 제목/내용 검색용 텍스트 인덱스 (한국어는 어간 분석을 하지 않도록 language 'none')
+    ([('title', TEXT), ('content', TEXT)], {'name': 'title_content_text', 'default_language': 'none'}),
+)
+
+def ensure_indexes(collection=None):
+    """글 컬렉션의 인덱스를 하나씩 만듭니다. 모두 만들었으면 True를 반환합니다.
+
+    인덱스 하나가 실패해도(중복된 이름 등) 나머지는 만들지만, MongoDB에 닿지 않으면 바로 그만둡니다.
+    전체를 MONGO_INDEX_TIMEOUT초 안에 끝내지 못하면 실패로 봅니다.
+    """
+    collection = get_db().HoMe if collection is None else collection
+    created = True
+    with pymongo.timeout(MONGO_INDEX_TIMEOUT):
+        for keys, options in POST_INDEXES:
+            try:
+                collection.create_index(keys, **options)
+            except PyMongoError as e:
+                hint = ' (중복된 이름이 있는지 확인하세요)' if options.get('unique') else ''
+                logger.error("MongoDB 인덱스 %s를 만들 수 없습니다%s: %s", options['name'], hint, e)
+                created = False
+                if isinstance(e, ConnectionFailure) or e.timeout:
+                    break
+    return created
+
+def ensure_indexes_once(collection):
+    # get_collection()이 부름. 실패했으면 INDEX_RETRY_SECONDS 뒤에 다시 시도 (쓸 때마다 시도하지 않음).
+    # 다른 스레드가 만드는 중이면 기다리지 않고 그냥 씀
+    state = app_state()['indexes']
+    if state['ready'] or time.monotonic() < state['retry_at']:
+        return
+    if not _indexes_lock.acquire(blocking=False):
+        return
+    try:
+        if not state['ready'] and time.monotonic() >= state['retry_at']:
+            ready = ensure_indexes(collection)
+            state.update(ready=ready, retry_at=time.monotonic() + INDEX_RETRY_SECONDS)
+    finally:
+        _indexes_lock.release()
@@ -0,0 +1,297 @@
+"""
+GitHub에 파일을 올리는 경로: Git Data API로 한 커밋에 담는 일괄 커밋, 파일마다 Contents API로 커밋하는
+대체 경로, 텍스트 파일의 gzip/brotli 변형.
+"""
+import base64
+import gzip
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from github import GithubException, InputGitTreeElement
+from github.Repository import Repository
+
+from homeset.clients import (GITHUB_BRANCH, GITHUB_TOKEN, GITHUB_UPLOAD_WORKERS, get_repo, get_worker_repo,
+                             with_app_context)
+from homeset.files import allowed_file, iter_content_chunks, read_content, stream_size
+from homeset.scheduler import (acquire_github_request, ensure_github_headroom, github_call_with_retry,
+                               github_session, observe_github_response)
+from homeset.sha_index import git_blob_sha, indexed_sha, locked_sha_index, record_github_write
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip 변형만 만듦
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# 'batch': 업로드 전체를 Git Data API로 하나의 커밋에 담음, 'per_file': 파일마다 Contents API로 커밋.
+# 이미지 N개 + HTML을 새로 올리면 batch는 API 호출 N + 5번(blob N, ref/커밋 조회, 트리, 커밋, ref 이동)에 커밋 1개,
+# per_file은 N + 1번에 커밋 N + 1개 (둘 다 SHA 인덱스 조회 별도). bench/bench_commit.py 참고
+GITHUB_COMMIT_MODE = os.getenv('GITHUB_COMMIT_MODE', 'batch')
+
+# 업로드할 때 텍스트 파일(HTML, SVG)의 gzip/brotli 변형(<경로>.gz, <경로>.br)을 함께 올릴지 여부와 최소 크기
+PRECOMPRESS = os.getenv('PRECOMPRESS', 'true').lower() == 'true'
+PRECOMPRESS_MIN_SIZE = int(os.getenv('PRECOMPRESS_MIN_SIZE', '1024'))
+
+_commit_lock = threading.Lock()
+
+def fetch_remote_sha(path):
+    # 인덱스를 쓸 수 없을 때의 기존 방식: 파일 내용까지 내려받아 SHA를 확인
+    repo = get_repo()
+    try:
+        return github_call_with_retry(repo.get_contents, path, ref=GITHUB_BRANCH).sha
+    except GithubException as e:
+        if e.status == 404:
+            return None
+        raise
+
+def write_file_to_github(path, commit_message, content, sha):
+    repo = get_repo()
+    if sha is None:
+        return github_call_with_retry(repo.create_file, path, commit_message, content, branch=GITHUB_BRANCH)
+    return github_call_with_retry(repo.update_file, path, commit_message, content, sha, branch=GITHUB_BRANCH)
+
+def delete_from_github(path, commit_message):
+    # 인덱스에 있는 파일만 지움. 실패해도 업로드는 실패로 치지 않음 (남은 파일은 쓰이지 않을 뿐)
+    try:
+        result = github_call_with_retry(get_repo().delete_file, path, commit_message, indexed_sha(path),
+                                        branch=GITHUB_BRANCH)
+        record_github_write({path: None}, result['commit'].sha)
+    except GithubException as e:
+        logger.error("GitHub 파일 삭제 중 오류 발생 (%s): %s", path, e)
+
+def upload_to_github_binary(path, content, commit_message, is_binary=False):
+    # PyGithub가 내용을 직접 base64로 인코딩하므로 바이너리도 bytes 그대로 넘김
+    try:
+        with locked_sha_index() as paths:
+            index_ready = paths is not None
+        sha = indexed_sha(path) if index_ready else fetch_remote_sha(path)
+        try:
+            result = write_file_to_github(path, commit_message, content, sha)
+        except GithubException as e:
+            # 409/422: 인덱스가 오래됨(다른 곳에서 파일이 바뀜) -> 실제 SHA를 조회해 한 번 더 시도
+            if not index_ready or e.status not in (409, 422):
+                raise
+            result = write_file_to_github(path, commit_message, content, fetch_remote_sha(path))
+        record_github_write({path: result['content'].sha}, result['commit'].sha)
+    except GithubException as e:
+        logger.error("GitHub 업로드 중 오류 발생: %s", e)
+        raise
+
+def ignore_progress(path, status):
+    pass
+
+def commit_files_to_github(files, commit_message, max_attempts=3, progress=ignore_progress, deletions=()):
+    """여러 파일을 Git Data API로 하나의 커밋에 담아 업로드합니다.
+
+    Parameters:
+    - files: (path, content, is_binary) 튜플 리스트. 첫 번째 항목은 HTML 파일입니다.
+    - commit_message: 커밋 메시지.
+    - deletions: 같은 커밋에서 지울 경로들. 바뀐 파일이 없어 커밋하지 않으면 지우지 않습니다.
+    - max_attempts: 브랜치가 그 사이에 움직였을 때 커밋을 다시 시도할 횟수.
+    - progress: 파일별 진행 상황을 progress(path, status)로 받는 콜백.
+      status는 'skipped'(내용이 같아 건너뜀), 'uploaded'(blob 생성됨), 'done'(커밋됨), 'failed' 중 하나입니다.
+
+    Returns:
+    - blob 생성에 실패해 커밋에서 빠진 파일의 {path: GithubException} 딕셔너리.
+      트리/커밋/ref 단계에서 실패하면 GithubException을 그대로 올립니다.
+    """
+    repo = get_repo()
+    tree_elements = []
+    binary_files = []
+    written = {}
+    for path, content, is_binary in files:
+        sha = git_blob_sha(content)
+        if indexed_sha(path) == sha:
+            progress(path, 'skipped')
+            continue  # GitHub에 있는 파일과 내용이 같으면 건너뜀
+        written[path] = sha
+        if is_binary:
+            binary_files.append((path, content))
+        else:
+            # 텍스트 파일은 트리 생성 요청에 내용을 직접 실어 blob 요청을 생략
+            tree_elements.append(InputGitTreeElement(path, '100644', 'blob', content=content))
+
+    # 이미지 blob은 제한된 크기의 스레드 풀에서 동시에 업로드
+    failed = {}
+    if binary_files:
+        with ThreadPoolExecutor(max_workers=max(1, min(GITHUB_UPLOAD_WORKERS, len(binary_files)))) as executor:
+            submit_blob = with_app_context(create_blob)  # 워커 스레드도 이 앱의 클라이언트를 씀
+            futures = [(path, executor.submit(submit_blob, content)) for path, content in binary_files]
+            for path, future in futures:
+                try:
+                    blob_sha = future.result()
+                except GithubException as e:
+                    logger.error("GitHub blob 생성 중 오류 발생 (%s): %s", path, e)
+                    failed[path] = e
+                    del written[path]
+                    progress(path, 'failed')
+                    continue
+                tree_elements.append(InputGitTreeElement(path, '100644', 'blob', sha=blob_sha))
+                progress(path, 'uploaded')
+
+    if not tree_elements:
+        return failed  # 바뀐 파일이 없으면 커밋하지 않음
+    # sha가 None인 항목은 트리에서 파일을 지움
+    tree_elements += [InputGitTreeElement(path, '100644', 'blob', sha=None) for path in deletions]
+
+    # 같은 프로세스의 업로드끼리는 커밋 단계를 차례로 진행해 ref 갱신 충돌(422)을 피함
+    # (blob 업로드는 잠금 밖에서 동시에 진행됨. 다른 프로세스와의 충돌은 아래 재시도로 처리)
+    with _commit_lock:
+        for attempt in range(1, max_attempts + 1):
+            ref = github_call_with_retry(repo.get_git_ref, f"heads/{GITHUB_BRANCH}")
+            base_commit = github_call_with_retry(repo.get_git_commit, ref.object.sha)
+            tree = github_call_with_retry(repo.create_git_tree, tree_elements, base_commit.tree)
+            commit = github_call_with_retry(repo.create_git_commit, commit_message, tree, [base_commit])
+            try:
+                github_call_with_retry(ref.edit, commit.sha)
+                record_github_write(dict(written, **dict.fromkeys(deletions)), commit.sha)
+                for path in written:
+                    progress(path, 'done')
+                return failed
+            except GithubException as e:
+                # 422: 다른 커밋이 먼저 들어가 fast-forward가 불가능 -> 새 HEAD 기준으로 다시 만듦
+                if e.status != 422 or attempt == max_attempts:
+                    raise
+    return failed
+
+class Base64JsonBody:
+    """blob 생성 요청 본문({"encoding": "base64", "content": "..."})을 조각 단위로 인코딩해 흘려보냅니다.
+
+    __len__이 있으므로 requests가 Content-Length를 붙이고, 파일 전체의 base64 사본은 메모리에 만들지 않습니다.
+    """
+    prefix = b'{"encoding": "base64", "content": "'
+    suffix = b'"}'
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.size = stream_size(stream)
+
+    def __len__(self):
+        return len(self.prefix) + 4 * ((self.size + 2) // 3) + len(self.suffix)
+
+    def __iter__(self):
+        yield self.prefix
+        for chunk in iter_content_chunks(self.stream):
+            yield base64.b64encode(chunk)
+        yield self.suffix
+
+def post_blob_stream(worker_repo, stream):
+    # PyGithub을 거치지 않는 요청이므로 요청 예산을 직접 받고 응답 헤더도 직접 알림
+    acquire_github_request('POST')
+    response = github_session().post(
+        f"{worker_repo.url}/git/blobs",
+        data=Base64JsonBody(stream),
+        headers={
+            'Authorization': f'token {GITHUB_TOKEN}',
+            'Accept': 'application/vnd.github+json',
+            'Content-Type': 'application/json',
+        },
+        timeout=60,
+    )
+    headers = {k.lower(): v for k, v in response.headers.items()}
+    observe_github_response(response.status_code, headers)
+    try:
+        data = response.json()
+    except ValueError:
+        data = {'message': response.text}
+    if response.status_code >= 400:
+        raise GithubException(response.status_code, data, headers)
+    return data['sha']
+
+def create_blob(content):
+    worker_repo = get_worker_repo()
+    if isinstance(worker_repo, Repository) and not isinstance(content, bytes):
+        # 실제 GitHub: 임시 파일에서 읽으면서 base64 본문을 흘려보냄 (재시도 때는 처음부터 다시 읽음)
+        return github_call_with_retry(post_blob_stream, worker_repo, content)
+    encoded_content = base64.b64encode(read_content(content)).decode('utf-8')
+    blob = github_call_with_retry(worker_repo.create_git_blob, encoded_content, 'base64')
+    return blob.sha
+
+def upload_files_individually(files, progress=ignore_progress, deletions=()):
+    """파일마다 Contents API로 커밋하는 기존 방식. 일괄 커밋이 실패했을 때의 대체 경로입니다.
+
+    첫 번째 파일(HTML) 업로드가 실패하면 나머지는 올리지 않고 예외를 올립니다.
+    deletions의 경로는 모든 파일을 처리한 뒤 파일마다 따로 지웁니다.
+    """
+    failed = {}
+    for index, (path, content, is_binary) in enumerate(files):
+        if indexed_sha(path) == git_blob_sha(content):
+            progress(path, 'skipped')
+            continue  # 내용이 같으면 커밋하지 않음
+        kind = 'image' if is_binary else 'HTML'
+        try:
+            upload_to_github_binary(path, read_content(content), f"Add/update {kind} file: {os.path.basename(path)}", is_binary)
+        except GithubException as e:
+            progress(path, 'failed')
+            if index == 0:
+                raise
+            failed[path] = e
+            continue
+        progress(path, 'done')
+    for path in deletions:
+        delete_from_github(path, f"Remove stale compressed file: {os.path.basename(path)}")
+    return failed
+
+# 미리 압축한 변형: (Accept-Encoding 이름, 파일 확장자). 앞쪽이 우선
+PRECOMPRESSED_ENCODINGS = (('br', 'br'), ('gzip', 'gz'))
+PRECOMPRESSIBLE_EXTENSIONS = {'html', 'htm', 'svg'}
+
+def compressed_variant_path(blob_sha, suffix):
+    # 원본 blob SHA로 이름을 붙이므로 변형이 원본과 어긋날 일이 없고, 같은 내용은 한 번만 저장됨
+    return f"public/compressed/{blob_sha}.{suffix}"
+
+def precompressed_files(files):
+    """텍스트 파일(HTML, SVG)마다 gzip/brotli로 미리 압축한 변형을 (path, content, is_binary) 리스트로 만듭니다."""
+    if not PRECOMPRESS:
+        return []
+    variants = []
+    for path, content, _ in files:
+        if not allowed_file(path, PRECOMPRESSIBLE_EXTENSIONS):
+            continue
+        data = read_content(content)
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        if len(data) < PRECOMPRESS_MIN_SIZE:
+            continue
+        blob_sha = git_blob_sha(data)
+        # mtime=0: 같은 내용이면 압축 결과도 같음
+        variants.append((compressed_variant_path(blob_sha, 'gz'), gzip.compress(data, compresslevel=9, mtime=0), True))
+        if brotli is not None:
+            variants.append((compressed_variant_path(blob_sha, 'br'), brotli.compress(data, quality=11), True))
+    return variants
+
+def stale_compressed_variants(files):
+    """files로 내용이 바뀌는 텍스트 파일의 이전 내용에 딸린 압축 변형 중, 다른 파일이 쓰지 않는 것의 경로들.
+
+    변형은 원본 blob SHA로 이름을 붙이므로 같은 내용의 다른 파일이 남아 있으면 지우지 않습니다.
+    인덱스를 아직 불러오지 못했으면 무엇이 남는지 알 수 없으므로 빈 리스트를 돌려줍니다.
+    """
+    new_shas = {path: git_blob_sha(content) for path, content, _ in files
+                if allowed_file(path, PRECOMPRESSIBLE_EXTENSIONS)}
+    with locked_sha_index() as paths:
+        if paths is None:
+            return []
+        old_shas = {paths[path] for path, sha in new_shas.items() if paths.get(path) not in (None, sha)}
+        if not old_shas:
+            return []
+        still_used = set(new_shas.values()) | {
+            sha for path, sha in paths.items()
+            if sha in old_shas and path not in new_shas and not path.startswith('public/compressed/')}
+        return [variant for sha in sorted(old_shas - still_used) for _, suffix in PRECOMPRESSED_ENCODINGS
+                if (variant := compressed_variant_path(sha, suffix)) in paths]
+
+def upload_files_to_github(files, commit_message, progress=ignore_progress):
+    # 호출하기 전에 try_refresh_sha_index()로 인덱스를 최신으로 맞춰 둘 것
+    # 텍스트 파일의 이전 내용에 딸린 압축 변형은 새 내용과 같은 커밋에서 지움
+    deletions = stale_compressed_variants(files)
+    files = files + precompressed_files(files)
+    # blob마다 1번 + ref 조회, 커밋 조회, 트리, 커밋, ref 갱신
+    ensure_github_headroom(len(files) + len(deletions) + 5)
+    if GITHUB_COMMIT_MODE == 'batch':
+        try:
+            return commit_files_to_github(files, commit_message, progress=progress, deletions=deletions)
+        except GithubException as e:
+            logger.warning("일괄 커밋 실패, 파일별 업로드로 전환합니다: %s", e)
+    return upload_files_individually(files, progress, deletions)
@@ -0,0 +1,148 @@
+"""
+Atom 피드(/feed.xml)와 사이트맵(/sitemap.xml): feeds 컬렉션의 문서를 유지하고 렌더링 결과를 캐시합니다.
+"""
+import hashlib
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from zoneinfo import ZoneInfo
+
+from flask import make_response, render_template, request
+from pymongo import DESCENDING, ReturnDocument
+from pymongo.errors import PyMongoError
+
+from homeset.clients import app_state, get_collection, get_db
+from homeset.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# /feed.xml(Atom)과 /sitemap.xml: 글을 쓸 때마다 feeds 컬렉션의 문서에서 바뀐 글의 항목만 고쳐($pull/$push) 유지하고,
+# 렌더링한 XML은 프로세스에 FEED_CACHE_TTL초 동안 두어 ETag/Last-Modified가 맞는 요청은 DB 조회 없이 304로 응답
+FEED_SIZE = int(os.getenv('FEED_SIZE', '20'))
+FEED_SUMMARY_LENGTH = int(os.getenv('FEED_SUMMARY_LENGTH', '200'))
+FEED_CACHE_TTL = float(os.getenv('FEED_CACHE_TTL', '60'))
+FEED_CACHE_CONTROL = os.getenv('FEED_CACHE_CONTROL', 'public, max-age=0, s-maxage=300, stale-while-revalidate=600')
+SITE_URL = os.getenv('SITE_URL')  # 피드/사이트맵에 쓸 사이트 주소 (예: https://example.com/). 없으면 요청 주소
+# 글의 날짜(시간대 없이 저장됨)를 읽을 시간대 (IANA 이름, 예: Asia/Seoul). 없으면 서버의 시간대
+SITE_TIMEZONE = os.getenv('SITE_TIMEZONE')
+
+# feeds 컬렉션의 문서 두 개를 글을 쓸 때마다 고침 (컬렉션 전체를 다시 읽지 않음)
+# - 'feed': 날짜순 최근 FEED_SIZE개 글의 항목
+# - 'sitemap': 모든 글의 (이름, 파일 이름, 마지막 수정 시각)
+# 시각은 모두 UTC로 저장. 'built'가 FEED_FORMAT이 아닌 문서(기능을 켜기 전부터 있던 글이나
+# 이전 형식)는 처음 읽을 때 한 번만 컬렉션에서 만듦
+FEED_FORMAT = 2  # 2: 글의 날짜도 UTC로 바꿔 저장
+FEED_ENTRY_PROJECTION = {'_id': 0, 'name': 1, 'title': 1, 'filename': 1, 'date': 1, 'content': 1}
+_feed_cache_lock = threading.Lock()
+
+def invalidate_feed_cache():
+    with _feed_cache_lock:
+        app_state()['feed_cache'].clear()
+
+def post_date_utc(value):
+    # 글의 date는 시간대 없는 현지 시각(parse_date)이므로 SITE_TIMEZONE(없으면 서버 시간대)으로 읽어 UTC로 바꿈
+    local = value.replace(tzinfo=ZoneInfo(SITE_TIMEZONE)) if SITE_TIMEZONE else value.astimezone()
+    return local.astimezone(timezone.utc)
+
+def feed_entry(post, now):
+    date = post.get('date')
+    return {
+        'name': post['name'],
+        'title': post.get('title') or post['name'],
+        'filename': post['filename'],
+        'date': post_date_utc(date) if isinstance(date, datetime) else now,
+        'summary': (post.get('content') or '')[:FEED_SUMMARY_LENGTH],
+        'updated': now,
+    }
+
+def recent_feed_entries(now, previous=()):
+    # 날짜순 최근 FEED_SIZE개 글의 항목. previous(기존 항목)에 있던 글은 마지막 수정 시각을 그대로 둠
+    updated = {entry['name']: entry['updated'] for entry in previous}
+    recent = get_collection().find({}, FEED_ENTRY_PROJECTION).sort('date', DESCENDING).limit(FEED_SIZE)
+    return [feed_entry(post, updated.get(post['name'], now)) for post in recent]
+
+def update_feeds(posts):
+    """쓰인 글 posts(name, title, filename, date, content 필드)를 피드와 사이트맵 문서에 반영합니다.
+
+    글마다 이전 항목을 빼고($pull) 새 항목을 넣으므로($push) 문서 크기와 관계없이 요청 네 번이면 됩니다.
+    쓴 글이 피드의 맨 끝에 들어가거나(날짜를 오래된 것으로 고친 경우 등) 항목이 FEED_SIZE보다 적으면
+    그 자리에 올 글이 피드 밖에 있을 수 있으므로, 그때만 최근 글을 다시 읽어 채웁니다.
+    실패해도 업로드는 실패로 치지 않습니다 (다음에 그 글을 쓸 때 다시 반영됨).
+    """
+    if not posts:
+        return
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    names = [post['name'] for post in posts]
+    feeds = get_db().feeds
+    try:
+        feeds.update_one({'_id': 'feed'}, {'$pull': {'entries': {'name': {'$in': names}}}}, upsert=True)
+        feed_doc = feeds.find_one_and_update({'_id': 'feed'}, {
+            '$push': {'entries': {'$each': [feed_entry(post, now) for post in posts],
+                                  '$sort': {'date': -1}, '$slice': FEED_SIZE}},
+            '$set': {'updated': now},
+        }, projection={'entries.name': 1, 'entries.updated': 1}, upsert=True, return_document=ReturnDocument.AFTER)
+        listed = feed_doc['entries']
+        # 맨 끝에 들어간 글보다 새 글이 피드 밖에 있을 수 있음 (빼고 넣는 사이 빈 자리를 채운 경우)
+        if len(listed) < FEED_SIZE or listed[-1]['name'] in names:
+            entries = recent_feed_entries(now, listed)
+            if [entry['name'] for entry in entries] != [entry['name'] for entry in listed]:
+                feeds.update_one({'_id': 'feed'}, {'$set': {'entries': entries}})
+        feeds.update_one({'_id': 'sitemap'}, {'$pull': {'entries': {'name': {'$in': names}}}}, upsert=True)
+        feeds.update_one({'_id': 'sitemap'}, {
+            '$push': {'entries': {'$each': [
+                {'name': post['name'], 'filename': post['filename'], 'lastmod': now} for post in posts]}},
+            '$set': {'updated': now},
+        }, upsert=True)
+    except PyMongoError as e:
+        logger.error("피드/사이트맵 갱신 중 오류 발생: %s", e)
+    invalidate_feed_cache()
+
+def build_feeds():
+    # 기능을 켜기 전부터 있던 글까지 담도록 컬렉션에서 한 번 만듦
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    everything = get_collection().find({}, {'_id': 0, 'name': 1, 'filename': 1})
+    feeds = get_db().feeds
+    feeds.replace_one({'_id': 'feed'}, {
+        'entries': recent_feed_entries(now), 'updated': now, 'built': FEED_FORMAT}, upsert=True)
+    feeds.replace_one({'_id': 'sitemap'}, {
+        'entries': [{'name': post['name'], 'filename': post['filename'], 'lastmod': now} for post in everything],
+        'updated': now, 'built': FEED_FORMAT}, upsert=True)
+
+def load_feed(kind):
+    doc = get_db().feeds.find_one({'_id': kind})
+    if doc is None or doc.get('built') != FEED_FORMAT:
+        build_feeds()
+        doc = get_db().feeds.find_one({'_id': kind})
+    return doc
+
+def feed_response(kind, template_name):
+    """피드/사이트맵을 ETag와 Last-Modified를 붙여 제공합니다. 캐시가 유효하면 DB를 조회하지 않습니다."""
+    site_url = SITE_URL or request.url_root
+    site_url = site_url if site_url.endswith('/') else f"{site_url}/"
+    key = (kind, site_url)
+    now = time.monotonic()
+    with _feed_cache_lock:
+        cached = app_state()['feed_cache'].get(key)
+    if cached is None or cached['expires'] <= now:
+        # 다른 인스턴스가 글을 썼는지 마지막 수정 시각만 확인하고, 바뀌었을 때만 항목을 읽어 다시 렌더링
+        latest = cached and get_db().feeds.find_one({'_id': kind, 'built': FEED_FORMAT}, {'updated': 1})
+        if not latest or latest['updated'] != cached['last_modified']:
+            doc = load_feed(kind)
+            with span('template_render', template=template_name):
+                body = render_template(template_name, entries=doc.get('entries', []), updated=doc['updated'],
+                                       site_url=site_url)
+            cached = {'body': body, 'etag': hashlib.sha1(body.encode('utf-8')).hexdigest(),
+                      'last_modified': doc['updated']}
+        cached = dict(cached, expires=now + FEED_CACHE_TTL)
+        with _feed_cache_lock:
+            app_state()['feed_cache'][key] = cached
+
+    response = make_response(cached['body'])
+    response.mimetype = 'application/atom+xml' if kind == 'feed' else 'application/xml'
+    response.charset = 'utf-8'
+    response.set_etag(cached['etag'])
+    response.last_modified = cached['last_modified']
+    response.headers['Cache-Control'] = FEED_CACHE_CONTROL
+    return response.make_conditional(request)
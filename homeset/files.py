@@ -0,0 +1,53 @@
+"""
+업로드 파일을 다루는 도우미: 허용 확장자 확인, 파일 객체/문자열을 조각 단위로 읽기, 내용 해시 이름.
+"""
+import hashlib
+import os
+
+# 업로드 설정
+ALLOWED_EXTENSIONS_HTML = {'html', 'htm'}
+ALLOWED_EXTENSIONS_IMAGES = {'png', 'jpg', 'jpeg', 'gif', 'svg'}
+# base64는 3바이트 단위로 끊어야 조각별 인코딩 결과를 이어 붙일 수 있음
+STREAM_CHUNK_SIZE = 3 * 64 * 1024
+
+def allowed_file(filename, allowed_set):
+    return '.' in filename and filename.rsplit('.', 1)[1].lower() in allowed_set
+
+def stream_size(stream):
+    stream.seek(0, os.SEEK_END)
+    size = stream.tell()
+    stream.seek(0)
+    return size
+
+def iter_content_chunks(content, chunk_size=STREAM_CHUNK_SIZE):
+    # content는 str/bytes 또는 임시 파일 같은 seek 가능한 파일 객체
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    if isinstance(content, bytes):
+        for start in range(0, len(content), chunk_size):
+            yield content[start:start + chunk_size]
+        return
+    content.seek(0)
+    while True:
+        chunk = content.read(chunk_size)
+        if not chunk:
+            break
+        yield chunk
+    content.seek(0)
+
+def read_content(content):
+    if isinstance(content, (str, bytes)):
+        return content
+    content.seek(0)
+    data = content.read()
+    content.seek(0)
+    return data
+
+def hash_stream(stream):
+    digest = hashlib.sha256()
+    for chunk in iter_content_chunks(stream):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def content_addressed_filename(digest, filename):
+    return f"{digest[:32]}.{filename.rsplit('.', 1)[1].lower()}"
@@ -0,0 +1,110 @@
+"""
+이미지 최적화: 업로드한 이미지를 프로세스 풀에서 줄이고 재인코딩해 너비별 변형을 만듭니다.
+"""
+import io
+import logging
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+
+from homeset.files import allowed_file, read_content
+from homeset.sha_index import locked_sha_index
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow가 없으면 이미지 최적화 단계를 건너뜀
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# 이미지 최적화: 최대 크기로 축소하고 WebP/AVIF로 재인코딩(메타데이터 제거)한 뒤 너비별 변형을 만들어 srcset으로 제공
+# (Pillow 필요, 내용 해시 이름 저장이 켜져 있어야 함)
+IMAGE_OPTIMIZE = os.getenv('IMAGE_OPTIMIZE', 'false').lower() == 'true'
+IMAGE_MAX_DIMENSION = int(os.getenv('IMAGE_MAX_DIMENSION', '2048'))
+IMAGE_FORMAT = os.getenv('IMAGE_FORMAT', 'webp').lower()
+IMAGE_QUALITY = int(os.getenv('IMAGE_QUALITY', '80'))
+IMAGE_VARIANT_WIDTHS = tuple(int(width) for width in os.getenv('IMAGE_VARIANT_WIDTHS', '480,960,1440').split(','))
+IMAGE_PROCESS_WORKERS = int(os.getenv('IMAGE_PROCESS_WORKERS', str(os.cpu_count() or 2)))
+
+OPTIMIZABLE_IMAGE_EXTENSIONS = {'png', 'jpg', 'jpeg'}
+
+_image_pool = None
+_image_pool_lock = threading.Lock()
+
+def optimize_image(data, max_dimension, image_format, quality, widths):
+    """프로세스 풀에서 실행됩니다. 회전 보정 후 최대 크기로 줄이고, 너비별로 메타데이터 없이 재인코딩합니다.
+
+    Returns:
+    - [(너비, 인코딩된 bytes)] 리스트 (너비 오름차순, 마지막이 가장 큰 이미지)
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original)
+        image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+        if image.mode not in ('RGB', 'RGBA'):
+            image = image.convert('RGBA' if image.mode in ('LA', 'P', 'PA') else 'RGB')
+        variants = []
+        for width in sorted({w for w in widths if w < image.width} | {image.width}):
+            height = max(1, round(image.height * width / image.width))
+            resized = image if width == image.width else image.resize((width, height), Image.LANCZOS)
+            buffer = io.BytesIO()
+            # exif/icc_profile을 넘기지 않으므로 메타데이터는 저장되지 않음
+            resized.save(buffer, format=image_format.upper(), quality=quality)
+            variants.append((width, buffer.getvalue()))
+    return variants
+
+def get_image_pool():
+    global _image_pool
+    with _image_pool_lock:
+        if _image_pool is None:
+            try:
+                _image_pool = ProcessPoolExecutor(max_workers=IMAGE_PROCESS_WORKERS)
+            except (OSError, NotImplementedError) as e:
+                # 서버리스 환경 등에서 프로세스를 띄울 수 없으면 요청 스레드에서 직접 처리
+                logger.warning("이미지 처리 프로세스 풀을 만들 수 없습니다: %s", e)
+                _image_pool = False
+        return _image_pool or None
+
+def image_variant_path(digest, width):
+    return f"public/images/{digest[:32]}-{width}w.{IMAGE_FORMAT}"
+
+def stored_image_variant_widths(digest):
+    # 같은 내용의 이미지가 이미 최적화돼 저장돼 있으면 그 너비 목록 (SHA 인덱스에서 찾음)
+    prefix = f"public/images/{digest[:32]}-"
+    suffix = f"w.{IMAGE_FORMAT}"
+    with locked_sha_index() as paths:
+        if not paths:
+            return []
+        candidates = [path[len(prefix):-len(suffix)] for path in paths if path.startswith(prefix) and path.endswith(suffix)]
+    return sorted(int(width) for width in candidates if width.isdigit())
+
+def submit_image_optimization(image_filename, stream, digest):
+    """최적화 대상이면 [(너비, 내용 또는 이미 저장돼 있으면 None)]을 돌려줄 Future를, 아니면 None을 반환합니다."""
+    if not (IMAGE_OPTIMIZE and Image is not None and digest
+            and allowed_file(image_filename, OPTIMIZABLE_IMAGE_EXTENSIONS)):
+        return None
+    future = Future()
+    stored_widths = stored_image_variant_widths(digest)
+    if stored_widths:
+        future.set_result([(width, None) for width in stored_widths])
+        return future
+    args = (read_content(stream), IMAGE_MAX_DIMENSION, IMAGE_FORMAT, IMAGE_QUALITY, IMAGE_VARIANT_WIDTHS)
+    pool = get_image_pool()
+    if pool is not None:
+        return pool.submit(optimize_image, *args)
+    try:
+        future.set_result(optimize_image(*args))
+    except Exception as e:
+        future.set_exception(e)
+    return future
+
+def image_variants_result(image_filename, future):
+    # 최적화에 실패하면(손상된 파일, 지원하지 않는 형식 등) None -> 원본을 그대로 저장
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except Exception as e:
+        logger.warning("이미지 최적화 실패, 원본을 저장합니다 (%s): %s", image_filename, e)
+        return None
+
+if IMAGE_OPTIMIZE and Image is None:
+    logger.warning("IMAGE_OPTIMIZE가 켜져 있지만 Pillow가 설치돼 있지 않아 이미지 최적화를 건너뜁니다.")
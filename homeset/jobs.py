@@ -0,0 +1,205 @@
+"""
+SQLite 작업 대기열: 업로드/시뮬레이션 작업이 함께 쓰는 작업 맡기(claim_job)와 기록(update_job),
+비동기 업로드 작업의 대기열과 워커 스레드를 다룹니다.
+"""
+import json
+import logging
+import os
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
+import uuid
+
+from github import GithubException
+
+from homeset.clients import with_app_context
+from homeset.files import STREAM_CHUNK_SIZE
+from homeset.scheduler import github_error_message
+
+logger = logging.getLogger(__name__)
+
+# 비동기 업로드 작업: /upload는 파일을 작업 디렉터리에 옮겨 두고 202로 바로 응답하고,
+# GitHub/MongoDB 단계는 SQLite 대기열을 읽는 워커 스레드가 실행함.
+# 응답 후 프로세스가 멈추는 서버리스 환경(Vercel 등)에서는 끄고, 상주하는 서버에서 켤 것
+UPLOAD_JOBS = os.getenv('UPLOAD_JOBS', 'false').lower() == 'true'
+UPLOAD_JOB_DIR = os.getenv('UPLOAD_JOB_DIR', os.path.join(tempfile.gettempdir(), 'homeset-upload-jobs'))
+UPLOAD_JOB_WORKERS = int(os.getenv('UPLOAD_JOB_WORKERS', '2'))
+UPLOAD_JOB_MAX_ATTEMPTS = int(os.getenv('UPLOAD_JOB_MAX_ATTEMPTS', '3'))
+# 진행 상황이 이 시간(초) 넘게 갱신되지 않은 실행 중 작업은 워커가 죽은 것으로 보고 다시 실행
+UPLOAD_JOB_STALE_SECONDS = float(os.getenv('UPLOAD_JOB_STALE_SECONDS', '600'))
+# 끝난 작업 기록을 보관할 시간(초)
+UPLOAD_JOB_RETENTION = float(os.getenv('UPLOAD_JOB_RETENTION', str(24 * 60 * 60)))
+
+# 작업 상태: 'queued' -> 'running' -> 'done' 또는 'failed'
+_sqlite_ready = set()
+_job_workers = {'pid': None}
+_job_workers_lock = threading.Lock()
+_job_wakeup = threading.Event()
+
+UPLOAD_JOB_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS upload_jobs ('
+    ' id TEXT PRIMARY KEY, status TEXT NOT NULL, payload TEXT NOT NULL,'
+    " files TEXT NOT NULL DEFAULT '{}', message TEXT, messages TEXT NOT NULL DEFAULT '[]',"
+    ' attempts INTEGER NOT NULL DEFAULT 0, claim TEXT,'
+    ' created REAL NOT NULL, updated REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS upload_jobs_status ON upload_jobs (status, created)',
+)
+
+def sqlite_query(path, schema, sql, params=()):
+    """path의 SQLite 데이터베이스에서 sql을 실행하고 모든 행을 돌려줍니다. 처음 열 때 schema의 문장을 실행합니다."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # SQLite 연결은 스레드 간에 공유할 수 없으므로 호출마다 열고 닫음
+    connection = sqlite3.connect(path, timeout=30)
+    connection.row_factory = sqlite3.Row
+    try:
+        with connection:
+            if path not in _sqlite_ready:
+                # WAL: 워커가 진행 상황을 쓰는 동안에도 상태 조회가 막히지 않음
+                connection.execute('PRAGMA journal_mode=WAL')
+                for statement in schema:
+                    connection.execute(statement)
+                _sqlite_ready.add(path)
+            return connection.execute(sql, params).fetchall()
+    finally:
+        connection.close()
+
+def job_query(sql, params=()):
+    return sqlite_query(os.path.join(UPLOAD_JOB_DIR, 'jobs.sqlite3'), UPLOAD_JOB_SCHEMA, sql, params)
+
+def save_stream(stream, path):
+    stream.seek(0)
+    with open(path, 'wb') as file:
+        shutil.copyfileobj(stream, file, STREAM_CHUNK_SIZE)
+
+def enqueue_upload_job(html_filename, html_stream, images, form, upload):
+    """업로드 파일을 작업 디렉터리에 복사하고 대기열에 작업을 넣은 뒤 작업 ID를 반환합니다.
+
+    upload는 작업 워커가 부를 업로드 함수입니다 (api/index.py의 run_upload와 같은 인자와 반환값).
+    """
+    job_id = uuid.uuid4().hex
+    job_dir = os.path.join(UPLOAD_JOB_DIR, job_id)
+    os.makedirs(job_dir)
+    save_stream(html_stream, os.path.join(job_dir, 'page.html'))
+    stored_images = []
+    for position, (original_name, image_filename, stream) in enumerate(images):
+        # 같은 이름의 이미지가 여러 번 올라와도 덮어쓰지 않도록 순번을 붙임
+        stored_name = f"{position}-{image_filename}"
+        save_stream(stream, os.path.join(job_dir, stored_name))
+        stored_images.append([original_name, image_filename, stored_name])
+    payload = {'html_filename': html_filename, 'html': 'page.html', 'images': stored_images, 'form': form}
+
+    now = time.time()
+    job_query("DELETE FROM upload_jobs WHERE status IN ('done', 'failed') AND updated < ?", (now - UPLOAD_JOB_RETENTION,))
+    job_query("INSERT INTO upload_jobs (id, status, payload, created, updated) VALUES (?, 'queued', ?, ?, ?)",
+              (job_id, json.dumps(payload), now, now))
+    ensure_upload_workers(upload)
+    _job_wakeup.set()
+    return job_id
+
+def claim_job(query, table, stale_seconds, job_id=None, statuses=('queued',), increment=None, **fields):
+    """table(업로드/시뮬레이션 작업)의 작업 하나를 새 claim으로 'running' 표시하고 그 행을 돌려줍니다. 맡지 못하면 None.
+
+    Parameters:
+    - query: table이 있는 데이터베이스에 쓸 job_query 또는 simulation_query.
+    - stale_seconds: 실행 중이지만 이 시간(초) 넘게 기록이 없으면 실행하던 곳이 죽은 것으로 보고 다시 맡음.
+    - job_id: 맡을 작업. None이면 맡을 수 있는 작업 중 가장 오래된 것.
+    - statuses: 맡을 수 있는 상태.
+    - increment: 맡을 때 1씩 늘릴 열 (예: 'attempts').
+    - fields: 맡을 때 함께 쓸 열 값.
+    """
+    claim = uuid.uuid4().hex
+    now = time.time()
+    fields.update(status='running', claim=claim, updated=now)
+    assignments = ', '.join(f"{key} = ?" for key in fields)
+    if increment:
+        assignments += f", {increment} = {increment} + 1"
+    claimable = f"(status IN ({', '.join('?' * len(statuses))}) OR (status = 'running' AND updated < ?))"
+    claimable_params = (*statuses, now - stale_seconds)
+    if job_id is None:
+        target = f"(SELECT id FROM {table} WHERE {claimable} ORDER BY created LIMIT 1)"
+        params = (*fields.values(), *claimable_params)
+    else:
+        target = f"? AND {claimable}"
+        params = (*fields.values(), job_id, *claimable_params)
+    # UPDATE 한 문장으로 고르고 표시하므로 여러 스레드/프로세스가 같은 작업을 맡지 않음
+    query(f"UPDATE {table} SET {assignments} WHERE id = {target}", params)
+    rows = query(f"SELECT * FROM {table} WHERE claim = ?", (claim,))
+    return rows[0] if rows else None
+
+def update_job(query, table, job_id, claim, **fields):
+    # 다른 곳에서 작업을 넘겨받았으면(claim이 바뀜) 아무것도 쓰지 않음. fields가 없으면 살아 있다는 기록만 남김
+    fields['updated'] = time.time()
+    assignments = ', '.join(f"{key} = ?" for key in fields)
+    query(f"UPDATE {table} SET {assignments} WHERE id = ? AND claim = ?", (*fields.values(), job_id, claim))
+
+def claim_upload_job():
+    """대기 중이거나 워커가 죽어 멈춘 작업 하나를 이 워커 몫으로 가져옵니다. 없으면 None."""
+    return claim_job(job_query, 'upload_jobs', UPLOAD_JOB_STALE_SECONDS, increment='attempts')
+
+def update_upload_job(job_id, claim, **fields):
+    update_job(job_query, 'upload_jobs', job_id, claim, **fields)
+
+def finish_upload_job(job_id, claim, status, message, messages=()):
+    update_upload_job(job_id, claim, status=status, message=message, messages=json.dumps(list(messages)))
+    shutil.rmtree(os.path.join(UPLOAD_JOB_DIR, job_id), ignore_errors=True)
+
+def run_upload_job(job, upload):
+    job_id, claim = job['id'], job['claim']
+    if job['attempts'] > UPLOAD_JOB_MAX_ATTEMPTS:
+        finish_upload_job(job_id, claim, 'failed', '여러 번 다시 시도했지만 업로드를 끝내지 못했습니다.')
+        return
+
+    payload = json.loads(job['payload'])
+    job_dir = os.path.join(UPLOAD_JOB_DIR, job_id)
+    files = {}
+
+    def progress(path, status):
+        # 진행 상황 기록이 워커가 살아 있다는 신호도 겸함 (updated 갱신)
+        files[path] = status
+        update_upload_job(job_id, claim, files=json.dumps(files))
+
+    streams = []
+    try:
+        with open(os.path.join(job_dir, payload['html']), 'rb') as html_file:
+            html_content = html_file.read().decode('utf-8')
+        images = []
+        for original_name, image_filename, stored_name in payload['images']:
+            streams.append(open(os.path.join(job_dir, stored_name), 'rb'))
+            images.append((original_name, image_filename, streams[-1]))
+        success_message, messages = upload(payload['html_filename'], html_content, images, payload['form'], progress)
+    except GithubException as e:
+        finish_upload_job(job_id, claim, 'failed', f"GitHub 업로드 중 오류 발생: {github_error_message(e)}")
+        return
+    except Exception as e:
+        logger.exception("업로드 작업 %s 실행 중 오류 발생", job_id)
+        finish_upload_job(job_id, claim, 'failed', f"업로드 중 오류 발생: {e}")
+        return
+    finally:
+        for stream in streams:
+            stream.close()
+    finish_upload_job(job_id, claim, 'done', success_message, messages)
+
+def upload_job_worker(upload):
+    while True:
+        _job_wakeup.clear()
+        try:
+            job = claim_upload_job()
+            if job is not None:
+                run_upload_job(job, upload)
+                continue
+        except Exception:
+            logger.exception("업로드 작업 대기열 처리 중 오류 발생")
+        # 다른 프로세스가 넣은 작업이나 멈춘 작업도 찾도록 알림이 없어도 주기적으로 다시 확인
+        _job_wakeup.wait(5)
+
+def ensure_upload_workers(upload):
+    # 워커 스레드는 처음 필요할 때 시작 (fork한 자식 프로세스에서는 새로 시작)
+    with _job_workers_lock:
+        if _job_workers['pid'] == os.getpid():
+            return
+        _job_workers['pid'] = os.getpid()
+        for _ in range(UPLOAD_JOB_WORKERS):
+            threading.Thread(target=with_app_context(upload_job_worker), args=(upload,), name='upload-job-worker',
+                             daemon=True).start()
@@ -0,0 +1,130 @@
+"""
+성능 계측: /metrics 엔드포인트(Prometheus 형식)와 응답별 Server-Timing 헤더에 쓸 값을 모읍니다.
+"""
+import contextlib
+import os
+import re
+import threading
+import time
+
+from flask import g, has_request_context
+from pymongo import monitoring
+
+# 성능 계측: /metrics 엔드포인트(Prometheus 형식)와 응답별 Server-Timing 헤더. 끄면 계측 비용이 없음
+METRICS_ENABLED = os.getenv('METRICS_ENABLED', 'false').lower() == 'true'
+SERVER_TIMING = os.getenv('SERVER_TIMING', 'false').lower() == 'true'
+
+# span()으로 구간 시간을 재서 METRICS_ENABLED면 /metrics(Prometheus 형식) 히스토그램에,
+# SERVER_TIMING이면 응답의 Server-Timing 헤더에 기록. 둘 다 꺼져 있으면 span()은 아무것도 하지 않음
+# (프로세스마다 따로 집계되므로 여러 워커로 띄우면 워커별 값이 보임)
+TIMING_ENABLED = METRICS_ENABLED or SERVER_TIMING
+METRIC_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_metrics = {'histograms': {}, 'counters': {}, 'gauges': {}}
+_metrics_lock = threading.Lock()
+_no_span = contextlib.nullcontext()
+
+class Span:
+    def __init__(self, name, labels):
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        observe_duration(self.name, time.perf_counter() - self.start, self.labels)
+
+def span(name, **labels):
+    """구간 시간을 재는 컨텍스트 매니저. 계측이 꺼져 있으면 공유 no-op 객체를 돌려줌."""
+    if not TIMING_ENABLED:
+        return _no_span
+    return Span(name, labels)
+
+def metric_key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+def observe_duration(name, seconds, labels):
+    if METRICS_ENABLED:
+        key = metric_key(name, labels)
+        with _metrics_lock:
+            histogram = _metrics['histograms'].get(key)
+            if histogram is None:
+                histogram = _metrics['histograms'][key] = {'buckets': [0] * len(METRIC_BUCKETS), 'count': 0, 'sum': 0.0}
+            for i, bound in enumerate(METRIC_BUCKETS):
+                if seconds <= bound:
+                    histogram['buckets'][i] += 1
+            histogram['count'] += 1
+            histogram['sum'] += seconds
+    # 요청을 처리하는 스레드에서 잰 구간만 Server-Timing에 넣음 (업로드 스레드 풀 등은 제외)
+    if SERVER_TIMING and has_request_context():
+        token = re.sub(r'[^A-Za-z0-9_.-]', '_', '.'.join([name, *map(str, labels.values())]))
+        timings = g.setdefault('server_timing', {})
+        timings[token] = timings.get(token, 0.0) + seconds
+
+def count_metric(name, amount=1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = metric_key(name, labels)
+    with _metrics_lock:
+        _metrics['counters'][key] = _metrics['counters'].get(key, 0) + amount
+
+def set_gauge(name, value, **labels):
+    if not METRICS_ENABLED:
+        return
+    with _metrics_lock:
+        _metrics['gauges'][metric_key(name, labels)] = value
+
+def record_rate_limit(remaining, limit=None):
+    # GitHub 응답 헤더의 남은 요청 수 (x-ratelimit-remaining / x-ratelimit-limit)
+    if remaining is None or int(remaining) < 0:
+        return
+    set_gauge('github_rate_limit_remaining', int(remaining))
+    if limit is not None and int(limit) >= 0:
+        set_gauge('github_rate_limit_limit', int(limit))
+
+class MongoCommandTimer(monitoring.CommandListener):
+    # 명령은 호출한 스레드에서 끝나므로 요청 중의 MongoDB 명령은 Server-Timing에도 들어감
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        observe_duration('mongo_command', event.duration_micros / 1e6, {'command': event.command_name})
+
+    def failed(self, event):
+        observe_duration('mongo_command', event.duration_micros / 1e6, {'command': event.command_name})
+        count_metric('mongo_errors_total', command=event.command_name)
+
+def format_labels(labels, extra=()):
+    pairs = [*labels, *extra]
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+def render_metrics():
+    """지금까지 모은 값을 Prometheus 텍스트 형식으로 만듭니다."""
+    with _metrics_lock:
+        histograms = {key: dict(value, buckets=list(value['buckets'])) for key, value in _metrics['histograms'].items()}
+        counters = dict(_metrics['counters'])
+        gauges = dict(_metrics['gauges'])
+    lines = []
+    typed = set()
+    for (name, labels), histogram in sorted(histograms.items()):
+        metric = f"homeset_{name}_duration_seconds"
+        if metric not in typed:
+            typed.add(metric)
+            lines.append(f"# TYPE {metric} histogram")
+        for bound, count in zip(METRIC_BUCKETS, histogram['buckets']):
+            lines.append(f"{metric}_bucket{format_labels(labels, [('le', bound)])} {count}")
+        lines.append(f"{metric}_bucket{format_labels(labels, [('le', '+Inf')])} {histogram['count']}")
+        lines.append(f"{metric}_sum{format_labels(labels)} {histogram['sum']:.6f}")
+        lines.append(f"{metric}_count{format_labels(labels)} {histogram['count']}")
+    for kind, values in (('counter', counters), ('gauge', gauges)):
+        for (name, labels), value in sorted(values.items()):
+            metric = f"homeset_{name}"
+            if metric not in typed:
+                typed.add(metric)
+                lines.append(f"# TYPE {metric} {kind}")
+            lines.append(f"{metric}{format_labels(labels)} {value}")
+    return '\n'.join(lines) + '\n'
@@ -0,0 +1,171 @@
+"""
+HTML 이미지 경로 재작성: 업로드한 글의 img/source/style에서 이미지 경로를 저장된 경로로 바꿉니다.
+"""
+import html
+import os
+import re
+from html.parser import HTMLParser
+from urllib.parse import unquote
+
+from werkzeug.utils import secure_filename
+
+from homeset.files import ALLOWED_EXTENSIONS_IMAGES, allowed_file
+
+# 문서 전체를 트리로 만들었다가 다시 직렬화하지 않고, HTMLParser 이벤트로 위치만 찾아
+# 바뀌는 속성 값 부분만 원문에 갈아 끼움. 손대지 않은 부분은 바이트 단위로 그대로 남음
+
+# 태그 안의 속성 하나: 이름과 (따옴표 종류별) 값
+ATTRIBUTE_RE = re.compile(r'''([^\s/>"'=]+)(?:\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'=<>`]+)))?''')
+TAG_NAME_RE = re.compile(r'<[a-zA-Z][^\s/>]*')
+CSS_URL_RE = re.compile(r'''url\(\s*(['"]?)(.*?)\1\s*\)''', re.IGNORECASE | re.DOTALL)
+SRCSET_CANDIDATE_RE = re.compile(r'(\s*)([^\s,]+)([^,]*)')
+IMAGE_URL_EXTENSIONS = ALLOWED_EXTENSIONS_IMAGES | {'webp', 'avif'}
+
+def looks_like_image(url):
+    path = url.split('#', 1)[0].split('?', 1)[0]
+    return allowed_file(path, IMAGE_URL_EXTENSIONS)
+
+def escape_attribute(value, quote):
+    # 속성 값을 감싼 따옴표와 &만 이스케이프 (원문의 다른 표기는 건드리지 않음)
+    value = value.replace('&', '&amp;')
+    return value.replace(quote, '&quot;' if quote == '"' else '&#x27;')
+
+def rewrite_srcset(value, resolve):
+    def replace(match):
+        new_url = resolve(match.group(2))
+        if new_url is None:
+            return match.group(0)
+        return f"{match.group(1)}{new_url}{match.group(3)}"
+    return SRCSET_CANDIDATE_RE.sub(replace, value)
+
+def rewrite_css_urls(value, resolve):
+    def replace(match):
+        url = match.group(2).strip()
+        new_url = resolve(url) if looks_like_image(url) else None
+        if new_url is None:
+            return match.group(0)
+        quote = match.group(1)
+        return f"url({quote}{new_url}{quote})"
+    return CSS_URL_RE.sub(replace, value)
+
+class ImagePathRewriter(HTMLParser):
+    """img·source의 src/srcset, style 속성, <style> 안의 url()에서 이미지 경로를 바꿉니다.
+
+    resolve(url)은 새 경로 또는 (바꾸지 않을 때) None을 반환합니다.
+    <source>와 CSS url()은 이미지 확장자를 가진 경로만 resolve에 넘깁니다.
+    srcset_for(url)이 주어지면 srcset이 없는 <img>의 src 뒤에 srcset 속성을 끼워 넣습니다.
+    """
+
+    def __init__(self, html, resolve, srcset_for=None):
+        super().__init__(convert_charrefs=True)
+        self.html = html
+        self.resolve = resolve
+        self.srcset_for = srcset_for
+        self.line_starts = [0] + [m.end() for m in re.finditer('\n', html)]
+        self.edits = []  # (시작, 끝, 바꿀 문자열)
+        self.in_style = False
+
+    def position(self):
+        line, column = self.getpos()
+        return self.line_starts[line - 1] + column
+
+    def rewrite(self):
+        self.feed(self.html)
+        self.close()
+        if not self.edits:
+            return self.html
+        parts = []
+        last = 0
+        for start, end, replacement in sorted(self.edits):
+            parts.append(self.html[last:start])
+            parts.append(replacement)
+            last = end
+        parts.append(self.html[last:])
+        return ''.join(parts)
+
+    def handle_starttag(self, tag, attrs):
+        if tag == 'style':
+            self.in_style = True
+        raw = self.get_starttag_text()
+        start = self.position()
+        if raw is None or not self.html.startswith(raw, start):
+            return
+        name_match = TAG_NAME_RE.match(raw)
+        src_match = None
+        has_srcset = False
+        for match in ATTRIBUTE_RE.finditer(raw, name_match.end() if name_match else 1):
+            name = match.group(1).lower()
+            if name == 'src':
+                src_match = match
+            elif name == 'srcset':
+                has_srcset = True
+            self.rewrite_attribute(tag, match, start)
+        if self.srcset_for and tag == 'img' and src_match and not has_srcset:
+            self.add_srcset(src_match, start)
+
+    def add_srcset(self, src_match, tag_start):
+        group, raw_value = attribute_value(src_match)
+        if group is None:
+            return
+        srcset = self.srcset_for(html.unescape(raw_value))
+        if srcset:
+            position = tag_start + src_match.end()
+            self.edits.append((position, position, f' srcset="{escape_attribute(srcset, chr(34))}"'))
+
+    def handle_endtag(self, tag):
+        if tag == 'style':
+            self.in_style = False
+
+    def handle_data(self, data):
+        if not self.in_style:
+            return
+        new_data = rewrite_css_urls(data, self.resolve)
+        if new_data != data:
+            start = self.position()
+            self.edits.append((start, start + len(data), new_data))
+
+    def rewrite_attribute(self, tag, match, tag_start):
+        name = match.group(1).lower()
+        if name == 'style':
+            rewrite = lambda value: rewrite_css_urls(value, self.resolve)
+        elif tag == 'img' and name == 'src':
+            rewrite = lambda value: self.resolve(value) if value else None
+        elif tag in ('img', 'source') and name == 'srcset':
+            rewrite = lambda value: rewrite_srcset(value, self.resolve)
+        elif tag == 'source' and name == 'src':
+            rewrite = lambda value: self.resolve(value) if looks_like_image(value) else None
+        else:
+            return
+
+        group, raw_value = attribute_value(match)
+        if group is None:
+            return  # 값이 없는 속성
+        value = html.unescape(raw_value)
+        new_value = rewrite(value)
+        if new_value is None or new_value == value:
+            return
+        if group == 4:
+            # 따옴표 없는 값은 큰따옴표로 감싸 바꿈
+            replacement = f'"{escape_attribute(new_value, chr(34))}"'
+        else:
+            replacement = escape_attribute(new_value, '"' if group == 2 else "'")
+        self.edits.append((tag_start + match.start(group), tag_start + match.end(group), replacement))
+
+def attribute_value(match):
+    # ATTRIBUTE_RE 매치에서 (값 그룹 번호, 원문 값). 그룹 2: "값", 3: '값', 4: 따옴표 없음
+    group = next((i for i in (2, 3, 4) if match.group(i) is not None), None)
+    return group, (match.group(group) if group else None)
+
+def rewrite_image_paths(html_content, resolve, srcset_for=None):
+    return ImagePathRewriter(html_content, resolve, srcset_for).rewrite()
+
+def image_reference_key(src):
+    # HTML 안의 이미지 참조(경로, 쿼리 포함)를 업로드된 파일 이름과 비교할 수 있는 형태로 바꿈
+    path = src.split('#', 1)[0].split('?', 1)[0]
+    return secure_filename(os.path.basename(unquote(path)))
+
+def local_image_url(src):
+    # 업로드된 이미지는 /images/<파일 이름> 으로 제공됨 (data: URI와 앵커는 그대로 둠)
+    if not src or src.startswith(('data:', '#')):
+        return None
+    return f"/images/{os.path.basename(src)}"
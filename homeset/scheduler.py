@@ -0,0 +1,321 @@
+"""
+GitHub 요청 예산과 재시도: 이 앱이 보내는 모든 GitHub 요청이 공유하는 토큰 버킷, ETag 캐시,
+요청 예산을 거치는 재시도(github_call_with_retry)를 다룹니다.
+"""
+import contextlib
+import logging
+import os
+import random
+import threading
+import time
+from collections import OrderedDict
+
+import requests
+from github import GithubException
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+
+from homeset.metrics import count_metric, record_rate_limit, span
+
+logger = logging.getLogger(__name__)
+
+# GitHub 오류 재시도 설정
+GITHUB_MAX_RETRIES = int(os.getenv('GITHUB_MAX_RETRIES', '3'))
+GITHUB_BACKOFF_BASE = float(os.getenv('GITHUB_BACKOFF_BASE', '1.0'))
+GITHUB_MAX_BACKOFF = float(os.getenv('GITHUB_MAX_BACKOFF', '60'))
+# GitHub 요청 예산: 프로세스의 모든 GitHub 요청(PyGithub, blob 스트리밍)이 공유하는 토큰 버킷.
+# 초당 요청 수와 순간 최대치, 분당 쓰기 요청 수(GitHub 2차 한도는 콘텐츠 생성 요청을 분당 80개로 제한).
+# 남은 한도가 GITHUB_RATE_LIMIT_RESERVE 이하면 초기화 시각까지 고르게 나눠 쓰고, 업로드는 시작 전에 거절
+GITHUB_REQUESTS_PER_SECOND = float(os.getenv('GITHUB_REQUESTS_PER_SECOND', '10'))
+GITHUB_REQUEST_BURST = int(os.getenv('GITHUB_REQUEST_BURST', '20'))
+GITHUB_WRITES_PER_MINUTE = float(os.getenv('GITHUB_WRITES_PER_MINUTE', '80'))
+GITHUB_RATE_LIMIT_RESERVE = int(os.getenv('GITHUB_RATE_LIMIT_RESERVE', '100'))
+# /pages, /images 제공 중의 GitHub 요청이 차례를 기다릴 최대 시간(초). 넘으면 기다리지 않고 503으로 응답
+GITHUB_SERVE_MAX_WAIT = float(os.getenv('GITHUB_SERVE_MAX_WAIT', '1'))
+# 조건부 GET(If-None-Match)에 쓸 ETag와 응답 본문을 보관할 최대 크기(바이트). 304 응답은 한도를 쓰지 않음
+GITHUB_ETAG_CACHE_BYTES = int(os.getenv('GITHUB_ETAG_CACHE_BYTES', str(8 * 1024 * 1024)))
+
+# 이 앱이 만든 Github 클라이언트의 연결 클래스를 바꿔 끼워(schedule_github_requests) 모든 요청이
+# acquire_github_request()로 토큰을 받은 뒤 나가고, 응답 헤더의 남은 한도/Retry-After를
+# observe_github_response()로 모든 스레드가 공유함. GET은 ETag를 기억해 두었다가 If-None-Match로 보냄
+# (PyGithub이 직접 조건부로 보내는 요청(ref.update() 등)은 304를 그대로 돌려주도록 캐시를 쓰지 않음).
+# 재시도도 이 예산을 거치도록 PyGithub/urllib3의 자체 재시도는 끔(retry=None)
+_github_budget = {
+    'tokens': float(GITHUB_REQUEST_BURST),
+    'write_tokens': float(GITHUB_REQUEST_BURST),
+    'updated': time.monotonic(),
+    'remaining': None,  # x-ratelimit-remaining (요청을 보낼 때마다 1씩 줄여 추정하고 응답으로 바로잡음)
+    'limit': None,
+    'reset': None,  # x-ratelimit-reset (epoch 초)
+    'blocked_until': 0.0,  # Retry-After나 한도 소진으로 모든 요청을 멈출 시각 (epoch 초)
+}
+_github_budget_lock = threading.Lock()
+_etag_cache = OrderedDict()  # URL -> (ETag, 응답 헤더, 본문) (LRU)
+_etag_cache_state = {'bytes': 0}
+_etag_cache_lock = threading.Lock()
+_thread_local = threading.local()  # github_fail_fast()의 대기 한도와 스레드별 requests 세션
+
+def _refill_github_budget():
+    # _github_budget_lock을 쥔 채 호출. 지금의 초당 보충량을 반환
+    budget = _github_budget
+    now = time.monotonic()
+    elapsed = now - budget['updated']
+    budget['updated'] = now
+    if budget['reset'] is not None and time.time() >= budget['reset']:
+        budget.update(remaining=None, reset=None)  # 한도가 초기화됨. 다음 응답에서 다시 알게 됨
+    rate = GITHUB_REQUESTS_PER_SECOND
+    capacity = GITHUB_REQUEST_BURST
+    if budget['remaining'] is not None and budget['reset'] is not None and budget['remaining'] <= GITHUB_RATE_LIMIT_RESERVE:
+        # 남은 한도를 초기화 시각까지 고르게 나눠 씀 (몰아 쓰지 않도록 버킷도 1개로 줄임)
+        rate = min(rate, max(budget['remaining'], 0) / max(budget['reset'] - time.time(), 1.0))
+        capacity = 1
+    budget['tokens'] = min(capacity, budget['tokens'] + elapsed * rate)
+    budget['write_tokens'] = min(GITHUB_REQUEST_BURST, budget['write_tokens'] + elapsed * GITHUB_WRITES_PER_MINUTE / 60)
+    return rate
+
+def github_max_wait():
+    # github_fail_fast() 안이면 그 시간, 아니면 GITHUB_MAX_BACKOFF
+    return getattr(_thread_local, 'github_max_wait', GITHUB_MAX_BACKOFF)
+
+@contextlib.contextmanager
+def github_fail_fast(max_wait):
+    """이 스레드의 GitHub 요청이 한도나 재시도 때문에 max_wait초보다 오래 기다려야 하면 바로 실패하게 합니다."""
+    previous = github_max_wait()
+    _thread_local.github_max_wait = max_wait
+    try:
+        yield
+    finally:
+        _thread_local.github_max_wait = previous
+
+def acquire_github_request(verb):
+    """GitHub 요청 하나를 보낼 차례가 될 때까지 기다립니다.
+
+    github_max_wait()초보다 오래 기다려야 하면 기다리지 않고 GithubException(429)을 올립니다.
+    """
+    write = verb not in ('GET', 'HEAD')
+    max_wait = github_max_wait()
+    while True:
+        with _github_budget_lock:
+            rate = _refill_github_budget()
+            budget = _github_budget
+            wait = budget['blocked_until'] - time.time()
+            if wait <= 0:
+                wait = 0.0
+                if budget['tokens'] < 1:
+                    wait = (1 - budget['tokens']) / rate if rate > 0 else float('inf')
+                if write and budget['write_tokens'] < 1:
+                    wait = max(wait, (1 - budget['write_tokens']) * 60 / GITHUB_WRITES_PER_MINUTE)
+            if wait <= 0:
+                budget['tokens'] -= 1
+                if write:
+                    budget['write_tokens'] -= 1
+                if budget['remaining'] is not None:
+                    budget['remaining'] -= 1
+                return
+        if wait > max_wait:
+            count_metric('github_throttled_total', outcome='rejected')
+            retry_after = str(int(min(wait, 24 * 60 * 60)) + 1)
+            raise GithubException(429, {'message': f"GitHub API 요청 한도가 부족합니다. {retry_after}초 뒤 다시 시도하세요."},
+                                  {'retry-after': retry_after})
+        count_metric('github_throttled_total', outcome='delayed')
+        with span('github_throttle'):
+            time.sleep(wait)
+
+def observe_github_response(status, headers):
+    """응답 헤더(소문자 키)로 남은 한도와 모든 요청을 멈출 시각을 갱신합니다."""
+    remaining = headers.get('x-ratelimit-remaining')
+    limit = headers.get('x-ratelimit-limit')
+    reset = headers.get('x-ratelimit-reset')
+    now = time.time()
+    with _github_budget_lock:
+        budget = _github_budget
+        if remaining is not None:
+            budget['remaining'] = int(remaining)
+        if limit is not None:
+            budget['limit'] = int(limit)
+        if reset is not None:
+            budget['reset'] = float(reset)
+        if status in (403, 429):
+            # 2차 한도(Retry-After)나 한도 소진: 이 스레드만이 아니라 모든 요청을 함께 멈춤
+            if 'retry-after' in headers:
+                budget['blocked_until'] = max(budget['blocked_until'], now + float(headers['retry-after']))
+            elif remaining == '0' and reset is not None:
+                budget['blocked_until'] = max(budget['blocked_until'], float(reset))
+    record_rate_limit(remaining, limit)
+
+def github_headroom():
+    """GitHub API 여유분을 돌려줍니다.
+
+    Returns:
+    - 'remaining', 'limit', 'reset': 서버가 알려 준 남은 요청 수, 한도, 초기화 시각(epoch 초). 모르면 None
+    - 'available': 남은 한도에서 예비분(GITHUB_RATE_LIMIT_RESERVE)을 뺀, 업로드에 쓸 수 있는 요청 수. 모르면 None
+    - 'tokens', 'write_tokens': 지금 기다리지 않고 보낼 수 있는 요청/쓰기 요청 수
+    - 'blocked_for': Retry-After 등으로 모든 요청이 멈춰 있는 남은 시간(초)
+    """
+    with _github_budget_lock:
+        _refill_github_budget()
+        budget = dict(_github_budget)
+    remaining = budget['remaining']
+    return {
+        'remaining': remaining,
+        'limit': budget['limit'],
+        'reset': budget['reset'],
+        'available': None if remaining is None else max(remaining - GITHUB_RATE_LIMIT_RESERVE, 0),
+        'tokens': int(budget['tokens']),
+        'write_tokens': int(budget['write_tokens']),
+        'blocked_for': max(budget['blocked_until'] - time.time(), 0.0),
+    }
+
+def ensure_github_headroom(needed):
+    """요청 needed개를 보낼 여유가 없으면 아무것도 보내기 전에 GithubException(429)을 올립니다.
+
+    업로드가 한도에 걸려 HTML이나 이미지 일부만 올라간 채 멈추지 않도록 시작 전에 확인합니다.
+    """
+    headroom = github_headroom()
+    if headroom['available'] is None or headroom['available'] >= needed:
+        return
+    wait = max((headroom['reset'] or time.time()) - time.time(), 0)
+    raise GithubException(429, {
+        'message': f"GitHub API 한도가 부족합니다 (남은 요청 {headroom['remaining']}개, 필요 {needed}개). "
+                   f"{wait / 60:.0f}분 뒤 다시 시도하세요."
+    }, {'retry-after': str(int(wait) + 1)})
+
+def github_session(adapter=None):
+    """스레드마다 재사용하는 GitHub용 requests 세션 (연결을 다시 맺지 않도록 keep-alive 풀 공유)."""
+    session = getattr(_thread_local, 'session', None)
+    if session is None or getattr(_thread_local, 'session_pid', None) != os.getpid():
+        session = requests.Session()
+        session.auth = Requester.noopAuth  # .netrc를 읽지 않음 (PyGithub과 같음)
+        if adapter is not None:
+            session.mount('https://', adapter)
+            session.mount('http://', adapter)
+        _thread_local.session = session
+        _thread_local.session_pid = os.getpid()
+    return session
+
+def cached_github_response(url):
+    with _etag_cache_lock:
+        entry = _etag_cache.get(url)
+        if entry is not None:
+            _etag_cache.move_to_end(url)
+        return entry
+
+def store_github_response(url, etag, headers, body):
+    size = len(body)
+    if size > GITHUB_ETAG_CACHE_BYTES // 4:
+        return  # 너무 큰 응답(큰 트리 등)은 캐시 전체를 밀어내지 않도록 보관하지 않음
+    with _etag_cache_lock:
+        previous = _etag_cache.pop(url, None)
+        if previous is not None:
+            _etag_cache_state['bytes'] -= len(previous[2])
+        _etag_cache[url] = (etag, headers, body)
+        _etag_cache_state['bytes'] += size
+        while _etag_cache_state['bytes'] > GITHUB_ETAG_CACHE_BYTES:
+            _, (_, _, evicted) = _etag_cache.popitem(last=False)
+            _etag_cache_state['bytes'] -= len(evicted)
+
+class CachedGithubResponse:
+    # 304 대신 PyGithub에 돌려주는 캐시된 200 응답 (httplib 응답 흉내)
+    def __init__(self, headers, body):
+        self.status = 200
+        self.headers = headers
+        self.body = body
+
+    def getheaders(self):
+        return self.headers.items()
+
+    def read(self):
+        return self.body
+
+class ScheduledConnection:
+    """PyGithub 연결 클래스에 섞어 요청 예산, ETag 캐시, 스레드별 세션 재사용을 더합니다."""
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # 바꿔 끼운 연결 클래스는 요청마다 새로 만들어지므로 세션(연결 풀)은 스레드별 것을 씀
+        self.session.close()
+        self.session = github_session(self.adapter)
+
+    def getresponse(self):
+        url = f"{self.protocol}://{self.host}:{self.port}{self.url}"
+        conditional = any(key.lower() in ('if-none-match', 'if-modified-since') for key in self.headers)
+        cacheable = self.verb == 'GET' and not self.stream and not conditional
+        cached = cached_github_response(url) if cacheable else None
+        if cached is not None:
+            self.headers = dict(self.headers, **{'If-None-Match': cached[0]})
+        acquire_github_request(self.verb)
+        response = super().getresponse()
+        headers = {key.lower(): value for key, value in response.getheaders()}
+        observe_github_response(response.status, headers)
+        if cached is not None and response.status == 304:
+            count_metric('github_etag_hits_total')
+            # 본문은 캐시의 것을, 남은 한도 등은 이번 응답의 헤더를 씀
+            return CachedGithubResponse({**cached[1], **headers}, cached[2])
+        if cacheable and response.status == 200 and 'etag' in headers:
+            store_github_response(url, headers['etag'], headers, response.read())
+        return response
+
+    def close(self):
+        pass  # 스레드별 세션은 다음 요청이 재사용
+
+class ScheduledHTTPConnection(ScheduledConnection, HTTPRequestsConnectionClass):
+    pass
+
+class ScheduledHTTPSConnection(ScheduledConnection, HTTPSRequestsConnectionClass):
+    pass
+
+def schedule_github_requests(requester):
+    """이 Requester의 요청만 요청 예산과 ETag 캐시를 거치도록 연결 클래스를 바꿉니다.
+
+    Requester.injectConnectionClasses()는 프로세스의 모든 PyGithub 클라이언트를 바꾸므로 쓰지 않고,
+    같은 클래스 속성을 이 인스턴스에만 덮어씀 (PyGithub의 이름 맹글링된 내부 속성에 의존).
+    """
+    requester._Requester__persist = False  # 연결 객체를 요청마다 새로 만듦 (injectConnectionClasses와 같음)
+    requester._Requester__httpConnectionClass = ScheduledHTTPConnection
+    requester._Requester__httpsConnectionClass = ScheduledHTTPSConnection
+    https = requester.base_url.startswith('https')
+    requester._Requester__connectionClass = ScheduledHTTPSConnection if https else ScheduledHTTPConnection
+
+
+def github_retry_delay(e, attempt):
+    """재시도할 GitHub 오류면 대기 시간(초)을, 아니면 None을 반환합니다."""
+    headers = e.headers or {}
+    data = e.data if isinstance(e.data, dict) else {}
+    message = str(data.get('message', '')).lower()
+    rate_limited = 'retry-after' in headers or headers.get('x-ratelimit-remaining') == '0' or 'rate limit' in message
+    if e.status not in (403, 429) and e.status < 500:
+        return None
+    if e.status in (403, 429) and not rate_limited:
+        return None  # 권한 오류 등은 재시도해도 소용 없음
+
+    if 'retry-after' in headers:
+        delay = float(headers['retry-after'])
+    elif headers.get('x-ratelimit-remaining') == '0' and 'x-ratelimit-reset' in headers:
+        delay = float(headers['x-ratelimit-reset']) - time.time()
+    else:
+        # 지수 백오프 + 지터
+        delay = GITHUB_BACKOFF_BASE * (2 ** attempt) + random.uniform(0, GITHUB_BACKOFF_BASE)
+    if delay > github_max_wait():
+        return None  # 한도 초기화까지 너무 오래 걸리면 요청 시간 안에 끝낼 수 없으므로 포기
+    return max(delay, 0)
+
+def github_call_with_retry(func, *args, **kwargs):
+    operation = getattr(func, '__name__', 'call')
+    for attempt in range(GITHUB_MAX_RETRIES + 1):
+        try:
+            with span('github_request', operation=operation):
+                # 남은 한도는 ScheduledConnection이 응답마다 기록함
+                return func(*args, **kwargs)
+        except GithubException as e:
+            # 실제 GitHub 응답은 연결 계층에서 이미 반영됐지만, 대역(fake)의 오류도 예산에 반영되도록 다시 알림
+            observe_github_response(e.status, {key.lower(): value for key, value in (e.headers or {}).items()})
+            delay = github_retry_delay(e, attempt) if attempt < GITHUB_MAX_RETRIES else None
+            if delay is None:
+                count_metric('github_errors_total', operation=operation, status=e.status)
+                raise
+            count_metric('github_retries_total', operation=operation, status=e.status)
+            logger.warning("GitHub 요청 실패(%s), %.1f초 후 재시도합니다 (%d/%d)", e.status, delay, attempt + 1,
+                           GITHUB_MAX_RETRIES)
+            time.sleep(delay)
+
+def github_error_message(e):
+    data = e.data if isinstance(e.data, dict) else {}
+    return data.get('message', '알 수 없는 오류')
@@ -0,0 +1,134 @@
+"""
+GitHub에 있는 파일의 경로 -> blob SHA 인덱스. 업로드 전 파일마다 get_contents로 조회하는 대신 씁니다.
+"""
+import contextlib
+import hashlib
+import logging
+import os
+import threading
+
+from github import GithubException
+
+from homeset.clients import GITHUB_BRANCH, GITHUB_REPO, get_db, get_repo
+from homeset.files import iter_content_chunks, stream_size
+from homeset.scheduler import github_call_with_retry
+
+logger = logging.getLogger(__name__)
+
+# 경로 -> blob SHA 인덱스를 MongoDB에도 저장해 콜드 스타트 때 트리 조회를 생략할지 여부
+SHA_INDEX_MONGO_CACHE = os.getenv('SHA_INDEX_MONGO_CACHE', 'false').lower() == 'true'
+
+SHA_INDEX_PREFIXES = ('public/pages/', 'public/images/', 'public/compressed/')
+_sha_index = {'repo': None, 'ref': None, 'commit_sha': None, 'paths': None}
+_sha_index_lock = threading.Lock()
+_sha_refresh_lock = threading.Lock()
+
+def git_blob_sha(content):
+    # GitHub(git)가 blob에 붙이는 것과 같은 SHA를 로컬에서 조각 단위로 계산
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    size = len(content) if isinstance(content, bytes) else stream_size(content)
+    digest = hashlib.sha1(b"blob %d\0" % size)
+    for chunk in iter_content_chunks(content):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+def refresh_sha_index():
+    """브랜치 ref를 조건부 요청으로 확인하고, 바뀌었을 때만 재귀 트리 조회 한 번으로 인덱스를 다시 채웁니다.
+
+    GitHub 요청과 재시도 대기는 _sha_index_lock 밖에서 하므로 indexed_sha()를 부르는 쪽은 기다리지 않습니다.
+    갱신끼리는 _sha_refresh_lock으로 한 번에 하나씩만 하고, 그동안 record_github_write()로 인덱스가
+    바뀌었으면 가져온 트리가 그보다 오래됐을 수 있으므로 버립니다 (다음 갱신에서 다시 확인).
+    """
+    repo = get_repo()
+    with _sha_refresh_lock:
+        with _sha_index_lock:
+            if _sha_index['repo'] is not repo:
+                _sha_index.update(repo=repo, ref=None, commit_sha=None, paths=None)
+            ref = _sha_index['ref']
+            known = _sha_index['commit_sha'] if _sha_index['paths'] is not None else None
+
+        if ref is None:
+            ref = github_call_with_retry(repo.get_git_ref, f"heads/{GITHUB_BRANCH}")
+        elif not github_call_with_retry(ref.update):
+            return  # 304 Not Modified: 브랜치가 그대로이므로 인덱스도 그대로 (rate limit에 포함되지 않음)
+        head = ref.object.sha
+
+        paths = None
+        if head != known:
+            paths = load_cached_sha_index(head)
+            if paths is None:
+                tree = github_call_with_retry(repo.get_git_tree, head, recursive=True)
+                paths = {
+                    element.path: element.sha
+                    for element in tree.tree
+                    if element.type == 'blob' and element.path.startswith(SHA_INDEX_PREFIXES)
+                }
+                save_cached_sha_index(head, paths)
+
+        with _sha_index_lock:
+            if _sha_index['repo'] is not repo:
+                return
+            _sha_index['ref'] = ref
+            current = _sha_index['commit_sha'] if _sha_index['paths'] is not None else None
+            if paths is not None and current == known:
+                _sha_index['commit_sha'] = head
+                _sha_index['paths'] = paths
+
+def load_cached_sha_index(commit_sha):
+    if not SHA_INDEX_MONGO_CACHE:
+        return None
+    doc = get_db().sha_index.find_one({'_id': f"{GITHUB_REPO}@{GITHUB_BRANCH}", 'commit_sha': commit_sha})
+    return dict(doc['paths']) if doc else None
+
+def save_cached_sha_index(commit_sha, paths):
+    if not SHA_INDEX_MONGO_CACHE:
+        return
+    # 파일 이름의 '.' 때문에 딕셔너리 대신 [경로, SHA] 쌍의 리스트로 저장
+    get_db().sha_index.replace_one(
+        {'_id': f"{GITHUB_REPO}@{GITHUB_BRANCH}"},
+        {'commit_sha': commit_sha, 'paths': [[path, sha] for path, sha in paths.items()]},
+        upsert=True,
+    )
+
+def indexed_sha(path):
+    # 인덱스에 없거나 인덱스를 아직 불러오지 못했으면 None (네트워크 요청 없음)
+    repo = get_repo()
+    with _sha_index_lock:
+        if _sha_index['repo'] is not repo or _sha_index['paths'] is None:
+            return None
+        return _sha_index['paths'].get(path)
+
+@contextlib.contextmanager
+def locked_sha_index():
+    """인덱스 잠금을 쥔 채 지금 리포지토리의 경로 -> SHA 딕셔너리를 줍니다. 아직 불러오지 못했으면 None.
+
+    여러 경로를 한 시점의 인덱스로 함께 살펴야 할 때 씁니다. with 블록 안에서 GitHub 요청을 보내지 말 것.
+    """
+    repo = get_repo()
+    with _sha_index_lock:
+        yield _sha_index['paths'] if _sha_index['repo'] is repo else None
+
+def record_github_write(changes, commit_sha):
+    """쓰기가 성공한 뒤 인덱스를 갱신합니다. changes: {path: blob SHA, 지운 파일은 None}"""
+    repo = get_repo()
+    with _sha_index_lock:
+        if _sha_index['repo'] is not repo or _sha_index['paths'] is None:
+            return
+        for path, sha in changes.items():
+            if sha is None:
+                _sha_index['paths'].pop(path, None)
+            else:
+                _sha_index['paths'][path] = sha
+        _sha_index['commit_sha'] = commit_sha
+        paths = dict(_sha_index['paths'])
+    try:
+        save_cached_sha_index(commit_sha, paths)
+    except Exception as e:
+        logger.error("SHA 인덱스 캐시 저장 중 오류 발생: %s", e)
+
+def try_refresh_sha_index():
+    try:
+        refresh_sha_index()
+    except GithubException as e:
+        logger.warning("SHA 인덱스 갱신 실패, 파일마다 직접 조회합니다: %s", e)
@@ -0,0 +1,202 @@
+"""
+시뮬레이션 작업: sumul.py, pagesimages/ten_games.py를 프로세스 풀에서 실행하고 결과를 SQLite에 남깁니다.
+"""
+import hashlib
+import importlib
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+
+from github import GithubException
+
+from homeset.jobs import claim_job, sqlite_query, update_job
+from homeset.scheduler import github_error_message
+
+logger = logging.getLogger(__name__)
+
+# 시뮬레이션 작업: POST /simulations/<이름>으로 sumul.py, pagesimages/ten_games.py를 파라미터를 받아 프로세스 풀에서
+# 실행하고 결과 페이지를 /upload와 같은 경로로 게시. (시뮬레이션, 파라미터, 시드)마다 결과를 SQLite에 남겨 다시 계산하지 않음
+SIMULATION_JOBS = os.getenv('SIMULATION_JOBS', 'false').lower() == 'true'
+SIMULATION_JOB_DIR = os.getenv('SIMULATION_JOB_DIR', os.path.join(tempfile.gettempdir(), 'homeset-simulations'))
+SIMULATION_WORKERS = int(os.getenv('SIMULATION_WORKERS', '2'))
+# 실행 중인 작업이 살아 있음을 기록하는 간격(초). 세 번 넘게 기록이 없으면 같은 요청이 왔을 때 다시 실행
+SIMULATION_HEARTBEAT = float(os.getenv('SIMULATION_HEARTBEAT', '30'))
+# 작업 하나의 계산량 상한 (random_fibonacci는 N * trials, ten_games는 max_attempts * 리그 경기 수)
+SIMULATION_MAX_WORK = int(os.getenv('SIMULATION_MAX_WORK', str(10 ** 7)))
+# 받을 수 있는 시드는 0 ~ SIMULATION_SEEDS - 1. 시드마다 글이 하나씩 게시되므로 파라미터당 글 수를 제한
+SIMULATION_SEEDS = int(os.getenv('SIMULATION_SEEDS', '10'))
+
+# 라우트(POST /simulations/<이름>, GET /simulations/jobs/<job_id>)는 api/index.py에 있음.
+# 계산은 프로세스 풀에서, 게시는 작업마다 띄운 스레드에서 함. 계산 결과(보고서 값)도 저장하므로
+# 게시만 실패한 작업은 다시 요청하면 계산 없이 게시만 다시 함
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SIMULATION_SCHEMA = (
+    'CREATE TABLE IF NOT EXISTS simulation_jobs ('
+    ' id TEXT PRIMARY KEY, simulation TEXT NOT NULL, params TEXT NOT NULL, status TEXT NOT NULL,'
+    " result TEXT, filename TEXT, message TEXT, messages TEXT NOT NULL DEFAULT '[]', claim TEXT,"
+    ' created REAL NOT NULL, updated REAL NOT NULL)',
+)
+# 파라미터: (형식, 기본값, 최솟값, 최댓값). 기본값과 범위가 함수면 앞의 파라미터들로 계산 (None이면 제한 없음).
+# 시드는 기본값을 고정해 두어야 같은 요청이 같은 결과(캐시)를 가리킴. work: 파라미터로 계산량을 셈 (SIMULATION_MAX_WORK 이하)
+SIMULATIONS = {
+    'random_fibonacci': {
+        'module': 'sumul',
+        'template': 'random_fibonacci_report.html',
+        'title': 'Random Fibonacci 시뮬레이션',
+        'params': {
+            'N': (int, 100, 1, 100000),
+            'trials': (int, 100, 1, 100000),
+            'seed': (int, 0, 0, lambda params: SIMULATION_SEEDS - 1),
+            'stride': (int, lambda params: max(1, params['N'] // 100), 1, lambda params: params['N']),
+            'confidence': (float, 0.95, 0.5, 0.999),
+        },
+        'work': lambda params: params['N'] * params['trials'],
+    },
+    'ten_games': {
+        'module': 'pagesimages.ten_games',
+        'template': 'ten_games_report.html',
+        'title': '리그 시뮬레이션 결과',
+        'params': {
+            'players': (int, 10, 2, 30),
+            'threshold': (int, 8, 1, lambda params: params['players'] - 1),
+            'count': (int, 3, 0, lambda params: params['players']),
+            'max_attempts': (int, 100000, 1, 10000000),
+            'seed': (int, 0, 0, lambda params: SIMULATION_SEEDS - 1),
+        },
+        'work': lambda params: params['max_attempts'] * params['players'] * (params['players'] - 1) // 2,
+    },
+}
+_simulation_pool = {'pid': None, 'executor': None}
+_simulation_pool_lock = threading.Lock()
+
+def simulation_query(sql, params=()):
+    return sqlite_query(os.path.join(SIMULATION_JOB_DIR, 'simulations.sqlite3'), SIMULATION_SCHEMA, sql, params)
+
+def simulation_params(simulation, values):
+    """요청 값을 simulation(SIMULATIONS의 항목)의 파라미터에 맞게 변환하고 빠진 값은 기본값으로 채웁니다.
+    올바르지 않거나 계산량이 SIMULATION_MAX_WORK를 넘으면 ValueError.
+
+    기본값도 모두 채워 두므로 기본값을 생략한 요청과 적어 보낸 요청은 같은 작업이 됩니다.
+    """
+    spec = simulation['params']
+    unknown = set(values) - set(spec)
+    if unknown:
+        raise ValueError(f"알 수 없는 파라미터입니다: {', '.join(sorted(unknown))}")
+    params = {}
+    for name, (kind, default, minimum, maximum) in spec.items():
+        value = values.get(name)
+        if value is None or value == '':
+            value = default(params) if callable(default) else default
+        try:
+            value = kind(value)
+        except (TypeError, ValueError):
+            raise ValueError(f"{name} 값이 올바르지 않습니다: {value}")
+        minimum = minimum(params) if callable(minimum) else minimum
+        maximum = maximum(params) if callable(maximum) else maximum
+        if value < minimum or (maximum is not None and value > maximum):
+            limit = f"{minimum} 이상" + (f" {maximum} 이하" if maximum is not None else '')
+            raise ValueError(f"{name}은(는) {limit}여야 합니다.")
+        params[name] = value
+    if simulation['work'](params) > SIMULATION_MAX_WORK:
+        raise ValueError(f"계산량이 너무 많습니다 (최대 {SIMULATION_MAX_WORK}). 파라미터를 줄여 주세요.")
+    return params
+
+def simulation_key(name, params):
+    return hashlib.sha256(json.dumps([name, params], sort_keys=True).encode('utf-8')).hexdigest()[:32]
+
+def simulation_module(name):
+    # 시뮬레이션 스크립트는 프로젝트 루트에 있음 (프로세스 풀의 자식 프로세스에서도 호출됨)
+    if PROJECT_ROOT not in sys.path:
+        sys.path.insert(0, PROJECT_ROOT)
+    return importlib.import_module(SIMULATIONS[name]['module'])
+
+def run_simulation(name, params):
+    # 프로세스 풀에서 실행됨. 보고서 템플릿에 넘길 값(JSON으로 저장할 수 있는 값)을 돌려줌
+    return simulation_module(name).simulate_report(**params)
+
+def get_simulation_pool():
+    # 처음 필요할 때 만들고, fork한 자식 프로세스에서는 새로 만듦
+    with _simulation_pool_lock:
+        if _simulation_pool['pid'] != os.getpid():
+            _simulation_pool['pid'] = os.getpid()
+            try:
+                _simulation_pool['executor'] = ProcessPoolExecutor(max_workers=SIMULATION_WORKERS)
+            except (OSError, NotImplementedError) as e:
+                # 서버리스 환경 등에서 프로세스를 띄울 수 없으면 작업 스레드에서 직접 계산
+                logger.warning("시뮬레이션 프로세스 풀을 만들 수 없습니다: %s", e)
+                _simulation_pool['executor'] = None
+        return _simulation_pool['executor']
+
+def update_simulation_job(job_id, claim, **fields):
+    update_job(simulation_query, 'simulation_jobs', job_id, claim, **fields)
+
+def claim_simulation_job(job_id, name, params):
+    """작업을 (없으면 만들어) 이 프로세스 몫으로 표시하고 (작업 행, 새로 맡았는지)를 돌려줍니다.
+
+    끝난 작업이나 다른 곳에서 실행 중인 작업은 맡지 않고 그대로 돌려줍니다. 실패한 작업은 다시 맡습니다.
+    """
+    now = time.time()
+    simulation_query(
+        "INSERT OR IGNORE INTO simulation_jobs (id, simulation, params, status, created, updated)"
+        " VALUES (?, ?, ?, 'queued', ?, ?)", (job_id, name, json.dumps(params, sort_keys=True), now, now))
+    # 같은 요청이 동시에 와도 한 번만 실행됨
+    job = claim_job(simulation_query, 'simulation_jobs', 3 * SIMULATION_HEARTBEAT, job_id=job_id,
+                    statuses=('queued', 'failed'), message='시뮬레이션을 실행하고 있습니다.')
+    if job is not None:
+        return job, True
+    return simulation_query('SELECT * FROM simulation_jobs WHERE id = ?', (job_id,))[0], False
+
+def wait_simulation(job_id, claim, future):
+    # SIMULATION_HEARTBEAT초마다 살아 있다는 기록을 남겨 다른 요청이 이 작업을 다시 실행하지 않게 함
+    while not wait([future], timeout=SIMULATION_HEARTBEAT).done:
+        update_simulation_job(job_id, claim)
+    return future.result()
+
+def run_simulation_job(job_id, claim, name, params, publish, result=None):
+    """시뮬레이션을 계산하고(result가 있으면 그 값을 쓰고) 결과 페이지를 게시한 뒤 작업 상태를 기록합니다.
+
+    publish는 api/index.py의 publish_report와 같은 인자와 반환값을 가진 게시 함수입니다.
+    """
+    spec = SIMULATIONS[name]
+    try:
+        if result is None:
+            executor = get_simulation_pool()
+            if executor is None:
+                # 프로세스 풀을 쓸 수 없으면 스레드에서 계산. 기다리는 동안 살아 있다는 기록은 똑같이 남김
+                with ThreadPoolExecutor(max_workers=1) as thread:
+                    result = wait_simulation(job_id, claim, thread.submit(run_simulation, name, params))
+            else:
+                result = wait_simulation(job_id, claim, executor.submit(run_simulation, name, params))
+            update_simulation_job(job_id, claim, result=json.dumps(result), message='결과 페이지를 게시하고 있습니다.')
+        description = ', '.join(f"{key}={value}" for key, value in params.items())
+        form = {
+            'title': f"{spec['title']} ({description})",
+            'content': description,
+            'date': datetime.now().strftime('%Y-%m-%d'),
+            'password': None,
+        }
+        filename = f"{name}-{job_id[:12]}.html"
+        # 파일마다 진행 상황을 기록해 게시하는 동안에도 살아 있음을 남김
+        success_message, messages = publish(filename, spec['template'], form,
+                                            lambda path, status: update_simulation_job(job_id, claim),
+                                            **result)
+    except GithubException as e:
+        update_simulation_job(job_id, claim, status='failed', message=f"GitHub 업로드 중 오류 발생: {github_error_message(e)}")
+        return
+    except Exception as e:
+        logger.exception("시뮬레이션 작업 %s 실행 중 오류 발생", job_id)
+        if isinstance(e, BrokenProcessPool):
+            # 자식 프로세스가 죽으면(메모리 부족 등) 풀을 더 쓸 수 없으므로 다음 작업 때 새로 만듦
+            with _simulation_pool_lock:
+                _simulation_pool['pid'] = None
+        update_simulation_job(job_id, claim, status='failed', message=f"시뮬레이션 중 오류 발생: {e}")
+        return
+    update_simulation_job(job_id, claim, status='done', filename=filename, message=success_message,
+                          messages=json.dumps(messages))
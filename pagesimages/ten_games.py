@@ -1,14 +1,43 @@
+import argparse
+import os
 import random
-from itertools import combinations
-import json
+import sys
+from collections import Counter
+from datetime import datetime
+from fractions import Fraction
+from itertools import combinations, product
+from math import comb
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)  # 스크립트로 실행해도 프로젝트 루트의 api/를 불러올 수 있도록
+
+REPORT_TEMPLATE = 'ten_games_report.html'
+REPORT_FILENAME = 'simulation_result.html'
+
+# 기본 조건: 10명이 모두 한 번씩 겨룰 때 8승 이상이 정확히 3명
+NUM_PLAYERS = 10
+WIN_THRESHOLD = 8
+HIGH_SCORER_COUNT = 3
+DEAD = -1  # exact_probability에서 남은 경기를 다 이겨도 기준에 못 미치는 선수
+# exact_probability의 상태 수는 참가자 수에 따라 지수적으로 늘어남. 기준 승수를 바꿔 가며 잰 가장 느린 경우:
+# 12명 0.5초, 14명 3.5초, 15명 8.5초, 16명 23초. 넘으면 --exact 대신 --estimate로 추정
+EXACT_MAX_PLAYERS = 14
+EXACT_FALLBACK_TOURNAMENTS = 10**6
+
+
+def make_players(num_players):
+    return [f'Player_{i}' for i in range(1, num_players + 1)]
 
 # 참가자 리스트
-players = [f'Player_{i}' for i in range(1, 11)]
+players = make_players(NUM_PLAYERS)
 
 # 모든 경기 생성 (45경기)
 matches = list(combinations(players, 2))
 
-def simulate_games():
+def simulate_games(players=players, matches=matches):
     # 초기 점수 및 승패 기록 초기화
     scores = {player: 0 for player in players}
     win_loss = {player: {'win': [], 'loss': []} for player in players}
@@ -24,283 +53,224 @@ def simulate_games():
     
     return scores, win_loss
 
-def check_condition(scores):
-    high_scorers = [player for player, score in scores.items() if score >= 8]
-    return len(high_scorers) == 3, high_scorers
+def check_condition(scores, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT):
+    high_scorers = [player for player, score in scores.items() if score >= threshold]
+    return len(high_scorers) == count, high_scorers
 
-def generate_html(scores, win_loss, high_scorers, attempt):
-    # 점수 분포 정렬
-    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
-    
-    # 노드 데이터 생성
-    nodes = []
-    for player, score in sorted_scores:
-        node = {
-            "id": player,
-            "label": f"{player}\n{score}점",
-            "shape": "circle",
-            "color": {
-                "background": "#FFD700" if score >= 8 else "#97C2FC",
-                "border": "#2E8B57",
-                "highlight": {
-                    "background": "#FFD700" if score >= 8 else "#97C2FC",
-                    "border": "#2E8B57"
-                }
-            },
-            "font": {
-                "color": "black",
-                "size": 14,
-                "bold": True
-            }
-        }
-        nodes.append(node)
-    
-    # 간선 데이터 생성
-    edges = []
-    for winner, losers in win_loss.items():
-        for loser in losers['win']:
-            edge = {
-                "from": winner,
-                "to": loser,
-                "arrows": "to",
-                "color": {
-                    "color": "#848484",
-                    "highlight": "#848484"
-                },
-                "width": 1
-            }
-            edges.append(edge)
-    
-    # JSON 직렬화
-    nodes_json = json.dumps(nodes, ensure_ascii=False, indent=4)
-    edges_json = json.dumps(edges, ensure_ascii=False, indent=4)
-    
-    # HTML 템플릿
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="ko">
-    <head>
-        <meta charset="UTF-8">
-        <title>시뮬레이션 결과</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                margin: 20px;
-            }}
-            h1, h2 {{
-                color: #2E8B57;
-            }}
-            table {{
-                width: 100%;
-                border-collapse: collapse;
-                margin-bottom: 30px;
-            }}
-            th, td {{
-                border: 1px solid #dddddd;
-                text-align: left;
-                padding: 8px;
-            }}
-            th {{
-                background-color: #f2f2f2;
-            }}
-            .highlight {{
-                background-color: #FFD700;
-                font-weight: bold;
-            }}
-            .title {{
-                background-color: #2E8B57;
-                color: white;
-                text-align: center;
-                padding: 10px 0;
-                margin-bottom: 20px;
-            }}
-            /* vis.js 네트워크 스타일 */
-            #network {{
-                width: 100%;
-                height: 600px;
-                border: 1px solid lightgray;
-            }}
-        </style>
-        <!-- vis.js 최신 라이브러리 불러오기 -->
-        <script type="text/javascript" src="https://unpkg.com/vis-network@9.4.0/dist/vis-network.min.js"></script>
-        <link href="https://unpkg.com/vis-network@9.4.0/dist/vis-network.min.css" rel="stylesheet" type="text/css" />
-    </head>
-    <body>
-        <div class="title">
-            <h1>조건을 만족하는 시뮬레이션 결과</h1>
-        </div>
-        <p>시도 횟수: {attempt}</p>
-        
-        <h2>점수 분포</h2>
-        <table>
-            <tr>
-                <th>플레이어</th>
-                <th>점수</th>
-            </tr>
+def simulate_scores(num_players, size, rng):
     """
-    
-    # 점수 분포 표 생성
-    for player, score in sorted_scores:
-        if score >= 8:
-            html_content += f"""
-            <tr>
-                <td class="highlight">{player}</td>
-                <td class="highlight">{score}점</td>
-            </tr>
-            """
-        else:
-            html_content += f"""
-            <tr>
-                <td>{player}</td>
-                <td>{score}점</td>
-            </tr>
-            """
-    
-    html_content += """
-        </table>
-        
-        <h2>승패 기록</h2>
-        <table>
-            <tr>
-                <th>플레이어</th>
-                <th>승리</th>
-                <th>패배</th>
-            </tr>
+    리그 size개를 한꺼번에 시뮬레이션합니다.
+
+    combinations(range(num_players), 2) 순서의 경기마다 비트 하나를 뽑아 1이면 앞 선수,
+    0이면 뒤 선수가 이긴 것으로 봅니다. 경기 (i, j)의 행이 i에 +1, j에 -1인 행렬 D를 두면
+    점수 = bits @ D + (선수 p가 뒤 선수인 경기 수 = p)로 행렬곱 한 번에 구해집니다.
+
+    Returns:
+    - (bits, scores): (size, 경기 수) uint8 결과 비트와 (size, num_players) 점수 배열.
     """
-    
-    # 승패 기록 표 생성
-    for player in players:
-        wins = ', '.join(win_loss[player]['win']) if win_loss[player]['win'] else '없음'
-        losses = ', '.join(win_loss[player]['loss']) if win_loss[player]['loss'] else '없음'
-        if scores[player] >= 8:
-            html_content += f"""
-            <tr>
-                <td class="highlight">{player}</td>
-                <td class="highlight">{wins}</td>
-                <td class="highlight">{losses}</td>
-            </tr>
-            """
-        else:
-            html_content += f"""
-            <tr>
-                <td>{player}</td>
-                <td>{wins}</td>
-                <td>{losses}</td>
-            </tr>
-            """
-    
-    html_content += f"""
-        </table>
-        
-        <h2>경기 결과 그래프</h2>
-        <div id="network"></div>
-        
-        <script type="text/javascript">
-            // 노드 및 간선 데이터 로드
-            var nodes = new vis.DataSet({nodes_json});
-            var edges = new vis.DataSet({edges_json});
-            
-            // 네트워크 데이터
-            var data = {{
-                nodes: nodes,
-                edges: edges
-            }};
-            
-            // 네트워크 옵션
-            var options = {{
-                layout: {{
-                    improvedLayout: true,
-                    hierarchical: false
-                }},
-                edges: {{
-                    smooth: {{
-                        type: 'cubicBezier',
-                        forceDirection: 'horizontal',
-                        roundness: 0.4
-                    }},
-                    arrows: {{
-                        to: {{enabled: true, scaleFactor:1}}
-                    }},
-                    color: {{
-                        color: '#848484',
-                        highlight: '#848484'
-                    }}
-                }},
-                physics: {{
-                    stabilization: false,
-                    barnesHut: {{
-                        gravitationalConstant: -30000,
-                        springLength: 250,
-                        springConstant: 0.001
-                    }}
-                }},
-                interaction: {{
-                    hover: true,
-                    tooltipDelay: 200
-                }}
-            }};
-            
-            // 네트워크 생성
-            var container = document.getElementById('network');
-            var network = new vis.Network(container, data, options);
-        </script>
-    </body>
-    </html>
+    pairs = list(combinations(range(num_players), 2))
+    incidence = np.zeros((len(pairs), num_players), dtype=np.float32)
+    for k, (i, j) in enumerate(pairs):
+        incidence[k, i] = 1
+        incidence[k, j] = -1
+    bits = np.unpackbits(rng.integers(0, 256, (size, (len(pairs) + 7) // 8), dtype=np.uint8),
+                         axis=1, count=len(pairs))
+    scores = (bits.astype(np.float32) @ incidence).astype(np.int32) + np.arange(num_players, dtype=np.int32)
+    return bits, scores
+
+
+def estimate_probability(num_players=NUM_PLAYERS, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT,
+                         tournaments=10**6, seed=None, batch_size=2**18):
+    """리그 tournaments개를 시뮬레이션해 조건을 만족한 (횟수, 전체 횟수)를 돌려줍니다."""
+    rng = np.random.default_rng(seed)
+    hits = 0
+    for start in range(0, tournaments, batch_size):
+        _, scores = simulate_scores(num_players, min(batch_size, tournaments - start), rng)
+        hits += int(np.count_nonzero((scores >= threshold).sum(axis=1) == count))
+    return hits, tournaments
+
+
+def find_tournament(players, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT, max_attempts=100000,
+                    seed=None, batch_size=2**16):
     """
-    
-    # HTML 파일로 저장
-    with open("simulation_result.html", "w", encoding="utf-8") as file:
-        file.write(html_content)
-    print("결과가 'simulation_result.html' 파일로 저장되었습니다.")
+    main()의 반복 시도를 한 묶음씩 한꺼번에 시뮬레이션해, 조건을 처음 만족한 리그를
+    simulate_games()와 같은 (scores, win_loss)와 시도 횟수로 돌려줍니다. 없으면 None.
+    """
+    rng = np.random.default_rng(seed)
+    pairs = list(combinations(players, 2))
+    for start in range(0, max_attempts, batch_size):
+        bits, scores = simulate_scores(len(players), min(batch_size, max_attempts - start), rng)
+        found = np.flatnonzero((scores >= threshold).sum(axis=1) == count)
+        if len(found) == 0:
+            continue
+        row = found[0]
+        win_loss = {player: {'win': [], 'loss': []} for player in players}
+        for (first, second), first_won in zip(pairs, bits[row]):
+            winner, loser = (first, second) if first_won else (second, first)
+            win_loss[winner]['win'].append(loser)
+            win_loss[loser]['loss'].append(winner)
+        return dict(zip(players, scores[row].tolist())), win_loss, start + row + 1
+    return None
 
-def main(max_attempts=100000):
-    attempt = 0
-    while attempt < max_attempts:
-        attempt += 1
-        scores, win_loss = simulate_games()
-        condition_met, high_scorers = check_condition(scores)
-        
-        if condition_met:
+
+def exact_probability(num_players=NUM_PLAYERS, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT):
+    """
+    모든 경기가 반반일 때 threshold승 이상인 선수가 정확히 count명일 확률을 정확히 계산합니다.
+
+    선수를 한 명씩 추가하며 새 선수와 기존 선수들의 경기 결과를 정합니다. 선수들은 서로
+    대칭이므로 상태는 기존 선수들의 점수 중복집합이면 충분하고, 다음처럼 합쳐 상태 수를 줄입니다.
+    - threshold 이상인 점수는 threshold 하나로 (더 이길 필요 없음)
+    - 남은 경기를 다 이겨도 threshold에 못 미치는 점수는 DEAD 하나로
+    - threshold 이상이 이미 count명을 넘은 상태는 버림
+    상태마다 경우의 수를 정수로 세므로 결과는 Fraction(경우의 수, 2^경기 수)입니다.
+    상태 수가 참가자 수에 따라 지수적으로 늘어나므로 EXACT_MAX_PLAYERS명을 넘으면 ValueError.
+    """
+    if num_players > EXACT_MAX_PLAYERS:
+        raise ValueError(f"정확한 계산은 참가자 {EXACT_MAX_PLAYERS}명까지만 지원합니다 (요청: {num_players}명)")
+
+    def bucket(score, remaining):
+        if score in (DEAD, threshold):
+            return score
+        if score >= threshold:
+            return threshold
+        return DEAD if score + remaining < threshold else score
+
+    states = {(): 1}  # 정렬된 (점수, 인원) 튜플 -> 경우의 수
+    for m in range(num_players):
+        remaining = num_players - m - 1  # 새 선수를 넣은 뒤 각자에게 남은 경기 수
+        next_states = Counter()
+        for state, ways in states.items():
+            groups = [score for score, _ in state]
+            sizes = [size for _, size in state]
+            # 점수가 같은 무리마다 새 선수를 이긴 인원 수를 고름
+            for winners in product(*(range(size + 1) for size in sizes)):
+                weight = ways
+                new_state = Counter()
+                for score, size, won in zip(groups, sizes, winners):
+                    weight *= comb(size, won)
+                    new_state[bucket(score, remaining)] += size - won
+                    new_state[bucket(score if score == DEAD else score + 1, remaining)] += won
+                new_state[bucket(m - sum(winners), remaining)] += 1
+                if new_state[threshold] > count:
+                    continue
+                next_states[tuple(sorted((score, size) for score, size in new_state.items() if size))] += weight
+        states = next_states
+    favourable = sum(ways for state, ways in states.items() if dict(state).get(threshold, 0) == count)
+    return Fraction(favourable, 2 ** comb(num_players, 2))
+
+def report_context(scores, win_loss, attempt, threshold=WIN_THRESHOLD):
+    """templates/ten_games_report.html에 넘길 값을 만듭니다. 노드/간선은 그래프에 필요한 값만 담습니다."""
+    sorted_scores = sorted(scores.items(), key=lambda x: x[1], reverse=True)
+    nodes = [
+        {"id": player, "label": f"{player}\n{score}점", "group": "high" if score >= threshold else "normal"}
+        for player, score in sorted_scores
+    ]
+    edges = [{"from": winner, "to": loser} for winner, record in win_loss.items() for loser in record['win']]
+    return {
+        'found': True, 'attempt': attempt, 'threshold': threshold, 'scores': scores,
+        'sorted_scores': sorted_scores, 'win_loss': win_loss, 'nodes': nodes, 'edges': edges,
+    }
+
+def write_report(context, output=REPORT_FILENAME):
+    """보고서를 output 파일(또는 '-'이면 표준 출력)에 렌더링되는 대로 씁니다."""
+    # 보고서는 Flask 앱과 같은 Jinja 환경(templates/)으로 렌더링하므로 필요할 때만 api.index를 불러옴
+    from api import index
+    index.write_report(sys.stdout if output == '-' else output, REPORT_TEMPLATE, **context)
+    if output != '-':
+        print(f"결과가 '{output}' 파일로 저장되었습니다.")
+
+def publish_report(context, output=REPORT_FILENAME):
+    """보고서를 사이트의 업로드 경로로 바로 게시합니다 (GITHUB_TOKEN, MONGO_URI 등 환경 변수 필요)."""
+    from api import index
+    form = {'title': '리그 시뮬레이션 결과', 'content': '', 'date': datetime.now().strftime('%Y-%m-%d'), 'password': None}
+    try:
+        success_message, messages = index.publish_report(os.path.basename(output), REPORT_TEMPLATE, form, **context)
+    except index.GithubException as e:
+        print(f"GitHub 업로드 중 오류 발생: {index.github_error_message(e)}")
+        return
+    for message in messages + [success_message]:
+        print(message)
+
+def simulate_report(players=NUM_PLAYERS, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT, max_attempts=100000,
+                    seed=None):
+    """
+    find_tournament로 조건을 만족하는 리그를 찾아 보고서 값을 만듭니다.
+    Flask 앱의 시뮬레이션 작업(/simulations/ten_games)이 프로세스 풀에서 호출합니다.
+    """
+    found = find_tournament(make_players(players), threshold, count, max_attempts, seed)
+    if found is None:
+        return {'found': False, 'max_attempts': max_attempts}
+    scores, win_loss, attempt = found
+    return report_context(scores, win_loss, int(attempt), threshold)
+
+def generate_html(scores, win_loss, attempt, threshold=WIN_THRESHOLD, output=REPORT_FILENAME,
+                  publish=False):
+    context = report_context(scores, win_loss, attempt, threshold)
+    if publish:
+        publish_report(context, output)
+    else:
+        write_report(context, output)
+
+def main(max_attempts=100000, num_players=NUM_PLAYERS, threshold=WIN_THRESHOLD, count=HIGH_SCORER_COUNT,
+         vectorised=False, seed=None, output=REPORT_FILENAME, publish=False):
+    league = make_players(num_players)
+    if vectorised:
+        found = find_tournament(league, threshold, count, max_attempts, seed)
+        if found is not None:
+            scores, win_loss, attempt = found
             print(f"조건을 만족하는 시뮬레이션을 찾았습니다! (시도 횟수: {attempt})")
-            generate_html(scores, win_loss, high_scorers, attempt)
+            generate_html(scores, win_loss, attempt, threshold, output, publish)
             return
+    else:
+        if seed is not None:
+            random.seed(seed)
+        league_matches = list(combinations(league, 2))
+        attempt = 0
+        while attempt < max_attempts:
+            attempt += 1
+            scores, win_loss = simulate_games(league, league_matches)
+            condition_met, _ = check_condition(scores, threshold, count)
+
+            if condition_met:
+                print(f"조건을 만족하는 시뮬레이션을 찾았습니다! (시도 횟수: {attempt})")
+                generate_html(scores, win_loss, attempt, threshold, output, publish)
+                return
     
     # 조건을 만족하지 못한 경우 HTML로 저장
-    html_content = f"""
-    <!DOCTYPE html>
-    <html lang="ko">
-    <head>
-        <meta charset="UTF-8">
-        <title>시뮬레이션 결과</title>
-        <style>
-            body {{
-                font-family: Arial, sans-serif;
-                margin: 20px;
-                text-align: center;
-            }}
-            .title {{
-                background-color: #B22222;
-                color: white;
-                padding: 20px;
-                margin-bottom: 20px;
-            }}
-            p {{
-                font-size: 18px;
-            }}
-        </style>
-    </head>
-    <body>
-        <div class="title">
-            <h1>조건을 만족하는 시뮬레이션 결과가 없습니다.</h1>
-        </div>
-        <p>최대 시도 횟수({max_attempts}) 내에 조건을 만족하는 시뮬레이션 결과가 없습니다.</p>
-    </body>
-    </html>
-    """
-    with open("simulation_result.html", "w", encoding="utf-8") as file:
-        file.write(html_content)
-    print(f"최대 시도 횟수({max_attempts}) 내에 조건을 만족하는 시뮬레이션 결과가 없습니다. 'simulation_result.html' 파일을 확인하세요.")
+    context = {'found': False, 'max_attempts': max_attempts}
+    if publish:
+        publish_report(context, output)
+    else:
+        write_report(context, output)
+    print(f"최대 시도 횟수({max_attempts}) 내에 조건을 만족하는 시뮬레이션 결과가 없습니다.")
 
 # 시뮬레이션 실행
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description='리그전에서 정확히 count명이 threshold승 이상인 경우를 찾습니다.')
+    parser.add_argument('--players', type=int, default=NUM_PLAYERS, help='참가자 수')
+    parser.add_argument('--threshold', type=int, default=WIN_THRESHOLD, help='기준 승수')
+    parser.add_argument('--count', type=int, default=HIGH_SCORER_COUNT, help='기준 승수 이상인 인원')
+    parser.add_argument('--max-attempts', type=int, default=100000, help='최대 시도 횟수')
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--vectorised', action='store_true', help='리그 여러 개를 행렬로 한꺼번에 시뮬레이션')
+    parser.add_argument('--exact', action='store_true',
+                        help=f'조건의 확률을 정확히 계산해 출력 (참가자 {EXACT_MAX_PLAYERS}명까지, 넘으면 --estimate로 추정)')
+    parser.add_argument('--output', default=REPORT_FILENAME, help="보고서 파일 ('-'이면 표준 출력)")
+    parser.add_argument('--publish', action='store_true', help='보고서를 파일 대신 사이트에 바로 게시 (이름은 --output)')
+    parser.add_argument('--estimate', type=int, metavar='TOURNAMENTS', help='리그 TOURNAMENTS개로 확률을 추정해 출력')
+    args = parser.parse_args()
+    if args.exact or args.estimate:
+        if args.exact and args.players > EXACT_MAX_PLAYERS:
+            print(f"오류: 정확한 계산은 참가자 {EXACT_MAX_PLAYERS}명까지만 지원합니다 (요청: {args.players}명). "
+                  f"대신 시뮬레이션으로 추정합니다.", file=sys.stderr)
+            args.estimate = args.estimate or EXACT_FALLBACK_TOURNAMENTS
+        elif args.exact:
+            probability = exact_probability(args.players, args.threshold, args.count)
+            print(f"정확한 확률: {probability} ≈ {float(probability):.10f}")
+        if args.estimate:
+            hits, total = estimate_probability(args.players, args.threshold, args.count, args.estimate, args.seed)
+            p = hits / total
+            print(f"추정 확률: {p:.10f} ± {1.96 * (p * (1 - p) / total) ** 0.5:.10f} (리그 {total}개 중 {hits}개)")
+    else:
+        main(args.max_attempts, args.players, args.threshold, args.count, args.vectorised, args.seed,
+             args.output, args.publish)
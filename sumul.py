@@ -1,5 +1,27 @@
+import argparse
+import json
+import os
 import random
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from statistics import NormalDist
+
+import numpy as np
+
+LN2 = np.log(2.0)
+# Random Fibonacci 수열의 |x_n|^{1/n}이 수렴하는 값 (Viswanath, 2000)
+VISWANATH_CONSTANT = 1.13198824
+# float32 블록 안에서 크기가 최대 φ^k배까지 커질 수 있으므로(φ^128 ≈ 2^89) 넘치지 않게 제한
+MAX_BLOCK_SIZE = 128
+REPORT_TEMPLATE = 'random_fibonacci_report.html'
+RESULT_NAME = 'random_fibonacci'
+# 결과 파일(.npy)의 열. 신뢰 구간이 없는 백엔드(python, numpy)는 halfwidth가 NaN
+RESULT_DTYPE = np.dtype([('n', '<i8'), ('a_n', '<f8'), ('halfwidth', '<f8')])
+# 그래프에 그릴 점 수(LTTB로 줄임)와 보고서 표의 행 수. N이 수백만이어도 페이지 크기가 일정함
+POINT_BUDGET = 1000
+TABLE_ROWS = 100
+CHART_WIDTH = 900
+CHART_HEIGHT = 400
+CHART_MARGIN = 50
 
 def simulate_random_fibonacci(N, trials=1, seed=None):
     """
@@ -45,25 +67,412 @@ def simulate_random_fibonacci(N, trials=1, seed=None):
     
     return a_n_avg
 
-# 파라미터 설정
-N = 100          # 항의 수
-trials = 100   # 시뮬레이션 횟수
-seed = 42        # 재현성을 위한 시드 설정
-
-# 시뮬레이션 실행
-a_n_values = simulate_random_fibonacci(N, trials=trials, seed=seed)
-
-# 그래프 그리기
-plt.figure(figsize=(12, 8))
-plt.plot(range(N+1), a_n_values, 'b-')
-plt.title('Random Fibonacci Sequence: a_n vs n')
-plt.xlabel('n')
-plt.ylabel('a_n')
-plt.grid(True)
-plt.show()
-
-# n 값과 a_n 값을 출력
-print("n\ta_n")
-print("-" * 20)
-for n, a_n in enumerate(a_n_values):
-    print(f"{n}\t{a_n:.6f}")
+
+def random_fibonacci_blocks(N, trials, rng, block_size=MAX_BLOCK_SIZE):
+    """
+    trials개의 시도를 한꺼번에 진행하며 a_2..a_N을 블록 단위로 돌려주는 제너레이터입니다.
+
+    |x_{n+1}| = ||x_n| ± |x_{n-1}||이고 부호는 매번 새로 뽑히므로, 크기만 보면
+    y_{n+1} = y_n + s_n * y_{n-1} (s_n = ±1)과 분포가 같습니다. 각 시도를 열로 두고
+    y를 블록 단위로 float32 행렬에 계산한 뒤, 블록마다 2의 거듭제곱으로 다시 정규화하고
+    그 지수는 따로 더해 두어 큰 정수 없이 log|x_n|을 구합니다. 부호는 rng에서 비트로
+    한꺼번에 뽑습니다.
+
+    Yields:
+    - (n, a_n): n+1..n+len(a_n)번째 항의 a_n을 담은 (항 수, trials) float32 배열.
+      배열은 다음 블록에서 재사용되지 않지만 크므로 필요한 값만 뽑아 쓰세요.
+    """
+    block_size = max(1, min(block_size, MAX_BLOCK_SIZE))
+    # rows[0], rows[1]은 직전 두 항, rows[2:]는 이번 블록에서 계산할 항
+    rows = np.empty((block_size + 2, trials), dtype=np.float32)
+    rows[:2] = 1.0  # x0 = x1 = 1
+    exponent = np.zeros(trials)  # 실제 |x| = rows * 2^exponent
+    signed = np.empty(trials, dtype=np.float32)
+    n = 1
+    while n < N:
+        steps = min(block_size, N - n)
+        bits = np.unpackbits(rng.integers(0, 256, (steps, (trials + 7) // 8), dtype=np.uint8),
+                             axis=1, count=trials)
+        signs = bits.astype(np.float32)
+        signs *= 2
+        signs -= 1
+        for k in range(steps):
+            np.multiply(rows[k], signs[k], out=signed)
+            np.add(signed, rows[k + 1], out=rows[k + 2])
+
+        # a_n = exp((log|y_n| + exponent * ln2) / n)
+        # x_n = 0이면 log가 -inf가 되어 a_n = exp(-inf) = 0 (순수 Python 버전과 같음)
+        with np.errstate(divide='ignore'):
+            logs = np.log(np.abs(rows[2:steps + 2]))
+        logs += (exponent * LN2).astype(np.float32)
+        logs *= (1.0 / np.arange(n + 1, n + steps + 1, dtype=np.float32))[:, None]
+        np.exp(logs, out=logs)
+        yield n, logs
+
+        # 마지막 두 항을 앞으로 옮기고 큰 쪽이 [0.5, 1)이 되도록 2의 거듭제곱으로 나눔 (정확한 연산)
+        rows[:2] = rows[steps:steps + 2]
+        _, e = np.frexp(np.maximum(np.abs(rows[0]), np.abs(rows[1])))
+        rows[:2] = np.ldexp(rows[:2], -e)
+        exponent += e
+        n += steps
+
+
+def simulate_random_fibonacci_numpy(N, trials=1, seed=None, block_size=MAX_BLOCK_SIZE):
+    """
+    simulate_random_fibonacci와 같은 평균 a_n을 NumPy로 모든 시도를 한꺼번에 계산합니다.
+
+    계산 방식은 random_fibonacci_blocks를 보세요. 난수열이 달라 값이 순수 Python 버전과
+    똑같지는 않지만 통계적으로 같은 곡선을 줍니다.
+
+    Parameters:
+    - N: 생성할 항의 수.
+    - trials: 평균을 내기 위한 독립적인 시뮬레이션 횟수.
+    - seed: 재현성을 위한 랜덤 시드 (np.random.default_rng에 전달).
+    - block_size: 정규화 사이에 계산할 항의 수 (최대 MAX_BLOCK_SIZE).
+
+    Returns:
+    - 평균된 a_n 값들의 길이 N+1 배열.
+    """
+    rng = np.random.default_rng(seed)
+    a_n_sum = np.zeros(N + 1)
+    if N >= 1:
+        a_n_sum[1] = trials  # x1 = 1
+    for n, a_n in random_fibonacci_blocks(N, trials, rng, block_size):
+        a_n_sum[n + 1:n + len(a_n) + 1] = a_n.sum(axis=1, dtype=np.float64)
+    return a_n_sum / trials
+
+
+def stride_points(N, stride):
+    """stride 간격의 n (stride, 2*stride, ...)과 마지막 항 N."""
+    return np.unique(np.append(np.arange(stride, N + 1, stride), N)) if N >= 1 else np.arange(0)
+
+
+def simulate_chunk_moments(N, trials, seed_seq, points, block_size=MAX_BLOCK_SIZE):
+    """
+    trials개의 시도를 돌려 points의 각 n에서 a_n의 (개수, 평균, 편차 제곱합)을 계산합니다.
+    프로세스 풀에서 실행되는 작업 단위입니다.
+    """
+    rng = np.random.default_rng(seed_seq)
+    mean = np.zeros(len(points))
+    m2 = np.zeros(len(points))
+    mean[points == 1] = 1.0  # x1 = 1이므로 a_1은 항상 1
+    for n, a_n in random_fibonacci_blocks(N, trials, rng, block_size):
+        lo, hi = np.searchsorted(points, [n + 1, n + len(a_n) + 1])
+        if lo == hi:
+            continue
+        values = a_n[points[lo:hi] - n - 1].astype(np.float64)
+        mean[lo:hi] = values.mean(axis=1)
+        m2[lo:hi] = ((values - mean[lo:hi, None]) ** 2).sum(axis=1)
+    return trials, mean, m2
+
+
+def merge_moments(a, b):
+    """두 (개수, 평균, 편차 제곱합)을 합칩니다 (Welford/Chan의 병렬 합산)."""
+    count_a, mean_a, m2_a = a
+    count_b, mean_b, m2_b = b
+    if count_a == 0:
+        return b
+    count = count_a + count_b
+    delta = mean_b - mean_a
+    return count, mean_a + delta * (count_b / count), m2_a + m2_b + delta ** 2 * (count_a * count_b / count)
+
+
+def load_checkpoint(path):
+    """저장된 (설정, 끝난 묶음 표시, 모멘트)를 읽습니다. 파일이 없으면 None."""
+    try:
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            return params, data['done'].copy(), (int(data['count']), data['mean'].copy(), data['m2'].copy())
+    except FileNotFoundError:
+        return None
+
+
+def save_checkpoint(path, params, done, moments):
+    # 쓰는 도중에 멈춰도 이전 체크포인트가 남도록 임시 파일에 쓴 뒤 바꿔치기
+    count, mean, m2 = moments
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'wb') as file:
+        np.savez(file, params=json.dumps(params, sort_keys=True), done=done, count=count, mean=mean, m2=m2)
+    os.replace(temp_path, path)
+
+
+def run_random_fibonacci(N, trials, seed=None, stride=1, chunk_trials=10000, workers=None,
+                         checkpoint=None, block_size=MAX_BLOCK_SIZE):
+    """
+    trials개의 시도를 chunk_trials개씩 묶어 프로세스 풀에서 나눠 돌리고, stride 간격의 n에서
+    a_n의 평균과 분산을 모읍니다.
+
+    묶음마다 SeedSequence(seed).spawn()으로 만든 독립된 난수열을 쓰므로 결과는 workers 수와
+    상관없이 seed로 정해집니다. 묶음이 끝날 때마다 합친 모멘트를 checkpoint(.npz)에 저장하고,
+    같은 설정으로 다시 실행하면 끝난 묶음은 건너뜁니다 (seed가 None이면 처음 뽑은 엔트로피를 이어 씀).
+
+    Returns:
+    - (points, count, mean, m2): n 배열, 시도 수, a_n 평균 배열, 편차 제곱합 배열.
+      신뢰 구간은 confidence_halfwidth로 계산합니다.
+    """
+    points = stride_points(N, stride)
+    chunk_sizes = [min(chunk_trials, trials - start) for start in range(0, trials, chunk_trials)]
+    params = {'N': N, 'trials': trials, 'seed': seed, 'stride': stride,
+              'chunk_trials': chunk_trials, 'block_size': block_size}
+    done = np.zeros(len(chunk_sizes), dtype=bool)
+    moments = (0, np.zeros(len(points)), np.zeros(len(points)))
+    resumed = load_checkpoint(checkpoint) if checkpoint else None
+    if seed is None:
+        # 시드 없이 시작한 실행도 이어 할 수 있도록 처음 뽑은 엔트로피를 체크포인트에 남김
+        seed = resumed[0]['seed'] if resumed else np.random.SeedSequence().entropy
+        params['seed'] = seed
+    if resumed:
+        saved, done, moments = resumed
+        if saved != params:
+            raise ValueError(f"체크포인트 {checkpoint}의 설정이 다릅니다: {saved} (지금: {params})")
+        print(f"체크포인트에서 이어서 실행: 묶음 {done.sum()}/{len(done)}개 완료됨")
+    children = np.random.SeedSequence(seed).spawn(len(chunk_sizes))
+    pending = [i for i in range(len(chunk_sizes)) if not done[i]]
+
+    def finish(i, result):
+        nonlocal moments
+        moments = merge_moments(moments, result)
+        done[i] = True
+        if checkpoint:
+            save_checkpoint(checkpoint, params, done, moments)
+        print(f"묶음 {done.sum()}/{len(done)}개 완료 (시도 {moments[0]}개)")
+
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(pending) <= 1:
+        for i in pending:
+            finish(i, simulate_chunk_moments(N, chunk_sizes[i], children[i], points, block_size))
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+            futures = {
+                executor.submit(simulate_chunk_moments, N, chunk_sizes[i], children[i], points, block_size): i
+                for i in pending
+            }
+            for future in as_completed(futures):
+                finish(futures[future], future.result())
+    return (points, *moments)
+
+
+def confidence_halfwidth(count, m2, confidence=0.95):
+    """평균의 정규 근사 신뢰 구간 반폭 (z * 표본 표준편차 / sqrt(count))."""
+    if count < 2:
+        return np.full(np.shape(m2), np.nan)
+    z = NormalDist().inv_cdf((1 + confidence) / 2)
+    return z * np.sqrt(m2 / (count - 1) / count)
+
+
+def print_summary(points, count, mean, m2, confidence):
+    """stride 간격의 n마다 평균 a_n과 신뢰 구간, Viswanath 상수와의 차이를 출력합니다."""
+    halfwidth = confidence_halfwidth(count, m2, confidence)
+    print(f"시도 {count}개, {confidence * 100:g}% 신뢰 구간")
+    print(f"{'n':>10}{'a_n':>12}{'±':>12}{'a_n - K':>12}")
+    print("-" * 46)
+    for n, value, error in zip(points, mean, halfwidth):
+        print(f"{n:>10}{value:>12.6f}{error:>12.6f}{value - VISWANATH_CONSTANT:>+12.6f}")
+    print(f"K = {VISWANATH_CONSTANT} (Viswanath 상수)")
+
+
+def lttb_indices(x, y, budget):
+    """
+    Largest-Triangle-Three-Buckets: 꺾은선 (x, y)의 모양을 살리는 점 budget개의 인덱스를 고릅니다.
+
+    첫 점과 마지막 점을 두고 나머지를 budget - 2개 구간으로 나눈 뒤, 구간마다 앞에서 고른 점과
+    다음 구간의 평균점으로 만드는 삼각형의 넓이가 가장 큰 점을 고릅니다.
+    """
+    n = len(x)
+    if budget >= n or budget < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, budget - 1).astype(np.int64)  # 구간 경계 (모든 구간에 점이 하나 이상)
+    selected = np.empty(budget, dtype=np.int64)
+    selected[0], selected[-1] = 0, n - 1
+    previous = 0
+    for i in range(budget - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_start, next_stop = (edges[i + 1], edges[i + 2]) if i + 2 < len(edges) else (n - 1, n)
+        next_x = x[next_start:next_stop].mean()
+        next_y = y[next_start:next_stop].mean()
+        area = np.abs((x[previous] - next_x) * (y[start:stop] - y[previous])
+                      - (x[previous] - x[start:stop]) * (next_y - y[previous]))
+        previous = start + int(np.argmax(area))
+        selected[i + 1] = previous
+    return selected
+
+
+def svg_path(px, py):
+    return 'M' + 'L'.join(f"{a:.1f},{b:.1f}" for a, b in zip(px, py))
+
+
+def chart_context(points, mean, halfwidth=None, budget=POINT_BUDGET, width=CHART_WIDTH, height=CHART_HEIGHT,
+                  margin=CHART_MARGIN):
+    """LTTB로 budget개로 줄인 a_n 꺾은선(과 신뢰 구간 띠)을 SVG 경로 문자열로 만듭니다."""
+    selected = lttb_indices(points, mean, budget)
+    x = np.asarray(points, dtype=np.float64)[selected]
+    y = np.asarray(mean, dtype=np.float64)[selected]
+    error = np.zeros_like(y) if halfwidth is None else np.nan_to_num(np.asarray(halfwidth)[selected])
+    low = min(float((y - error).min()), VISWANATH_CONSTANT)
+    high = max(float((y + error).max()), VISWANATH_CONSTANT)
+    span_x = float(x[-1] - x[0]) or 1.0
+    span_y = (high - low) or 1.0
+
+    def scale_x(values):
+        return margin + (values - x[0]) / span_x * (width - 2 * margin)
+
+    def scale_y(values):
+        return height - margin - (values - low) / span_y * (height - 2 * margin)
+
+    band = None
+    if halfwidth is not None and error.any():
+        band = (svg_path(scale_x(x), scale_y(y + error))
+                + 'L' + svg_path(scale_x(x[::-1]), scale_y((y - error)[::-1]))[1:] + 'Z')
+    ticks = np.linspace(0, 1, 5)
+    return {
+        'width': width, 'height': height, 'margin': margin, 'points': len(selected),
+        'line': svg_path(scale_x(x), scale_y(y)),
+        'band': band,
+        'constant_y': round(float(scale_y(VISWANATH_CONSTANT)), 1),
+        'x_ticks': [[round(float(scale_x(x[0] + t * span_x)), 1), f"{x[0] + t * span_x:.0f}"] for t in ticks],
+        'y_ticks': [[round(float(scale_y(low + t * span_y)), 1), f"{low + t * span_y:.4f}"] for t in ticks],
+    }
+
+
+def report_context(points, mean, halfwidth=None, budget=POINT_BUDGET, table_rows=TABLE_ROWS, **info):
+    """
+    templates/random_fibonacci_report.html에 넘길 값을 만듭니다 (JSON으로 저장할 수 있는 값만).
+    info(N, trials, seed 등)는 그대로 담고, 그래프는 점 budget개로, 표는 고르게 고른 table_rows행으로 줄입니다.
+    """
+    rows = []
+    for i in np.unique(np.linspace(0, len(points) - 1, table_rows).round().astype(np.int64)):
+        error = None if halfwidth is None or np.isnan(halfwidth[i]) else float(halfwidth[i])
+        rows.append([int(points[i]), float(mean[i]), error, float(mean[i] - VISWANATH_CONSTANT)])
+    return dict(info, constant=VISWANATH_CONSTANT, rows=rows, chart=chart_context(points, mean, halfwidth, budget))
+
+
+def simulate_report(N=100, trials=100, seed=42, stride=None, confidence=0.95, chunk_trials=10000):
+    """
+    run_random_fibonacci를 이 프로세스 안에서 돌려 보고서 값을 만듭니다.
+    Flask 앱의 시뮬레이션 작업(/simulations/random_fibonacci)이 프로세스 풀에서 호출합니다.
+    """
+    stride = stride or max(1, N // 100)
+    points, count, mean, m2 = run_random_fibonacci(N, trials, seed=seed, stride=stride,
+                                                   chunk_trials=chunk_trials, workers=1)
+    return report_context(points, mean, confidence_halfwidth(count, m2, confidence), N=N, trials=trials, seed=seed,
+                          stride=stride, count=int(count), confidence=confidence)
+
+
+def save_result(path, points, mean, halfwidth=None, **metadata):
+    """
+    결과를 RESULT_DTYPE 열(n, a_n, halfwidth)을 가진 .npy 하나로, 설정(metadata)은 같은 이름의 .json으로 저장합니다.
+    배열은 파일에 메모리 매핑해 바로 쓰므로 결과를 한 번 더 복사하지 않습니다.
+    """
+    result = np.lib.format.open_memmap(path, mode='w+', dtype=RESULT_DTYPE, shape=(len(points),))
+    result['n'] = points
+    result['a_n'] = mean
+    result['halfwidth'] = np.nan if halfwidth is None else halfwidth
+    result.flush()
+    del result
+    with open(os.path.splitext(path)[0] + '.json', 'w', encoding='utf-8') as file:
+        json.dump(dict(metadata, columns=list(RESULT_DTYPE.names), constant=VISWANATH_CONSTANT), file,
+                  ensure_ascii=False, indent=1)
+
+
+def load_result(path):
+    """save_result로 저장한 (결과 배열, 설정)을 읽습니다. 배열은 메모리 매핑(읽기 전용)이라 필요한 부분만 읽힙니다."""
+    with open(os.path.splitext(path)[0] + '.json', encoding='utf-8') as file:
+        metadata = json.load(file)
+    return np.load(path, mmap_mode='r'), metadata
+
+
+def write_headless(directory, points, mean, halfwidth=None, budget=POINT_BUDGET, **metadata):
+    """
+    화면 없이 결과를 directory에 씁니다: random_fibonacci.npy/.json (전체 결과)과
+    random_fibonacci.html (점 budget개로 줄인 SVG 그래프와 표). HTML은 sync.py나 /upload로 바로 게시할 수 있습니다.
+    """
+    os.makedirs(directory, exist_ok=True)
+    result_path = os.path.join(directory, f"{RESULT_NAME}.npy")
+    report_path = os.path.join(directory, f"{RESULT_NAME}.html")
+    save_result(result_path, points, mean, halfwidth, **metadata)
+    context = report_context(points, mean, halfwidth, budget, **metadata)
+    # 보고서는 Flask 앱과 같은 Jinja 환경(templates/)으로 렌더링. api.index는 Flask/MongoDB/GitHub 모듈을
+    # 불러오므로 보고서를 쓸 때만 불러옴
+    from api import index
+    index.write_report(report_path, REPORT_TEMPLATE, **context)
+    print(f"결과: {result_path} (n {len(points)}개), 보고서: {report_path} (그래프 점 {context['chart']['points']}개)")
+    print(f"a_{points[-1]} = {mean[-1]:.6f} (K = {VISWANATH_CONSTANT})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Random Fibonacci 수열의 평균 a_n = |x_n|^{1/n}을 계산합니다.')
+    parser.add_argument('-N', type=int, default=100, help='항의 수')
+    parser.add_argument('--trials', type=int, default=100, help='시뮬레이션 횟수')
+    parser.add_argument('--seed', type=int, default=42, help='재현성을 위한 시드')
+    parser.add_argument('--backend', choices=('python', 'numpy', 'parallel'), default='python',
+                        help='python: 정확한 정수 연산, numpy: 모든 시도를 행렬로 한꺼번에 계산 (큰 N/trials용), '
+                             'parallel: 여러 프로세스로 나눠 stride 간격의 평균과 신뢰 구간만 계산')
+    parser.add_argument('--no-plot', action='store_true', help='그래프를 그리지 않음')
+    parser.add_argument('--output', metavar='DIR',
+                        help='화면 없이 결과(.npy/.json)와 SVG 그래프 보고서(.html)를 DIR에 씀 (그래프 창과 n별 출력 생략)')
+    parser.add_argument('--point-budget', type=int, default=POINT_BUDGET, help='그래프에 그릴 최대 점 수 (LTTB로 줄임)')
+    parallel = parser.add_argument_group('parallel 백엔드')
+    parallel.add_argument('--stride', type=int, default=None, help='결과를 낼 n 간격 (기본: N/100)')
+    parallel.add_argument('--chunk-trials', type=int, default=10000, help='작업 하나가 맡는 시도 수')
+    parallel.add_argument('--workers', type=int, default=None, help='프로세스 수 (기본: CPU 수)')
+    parallel.add_argument('--checkpoint', help='중간 결과를 저장하고 이어서 실행할 .npz 파일')
+    parallel.add_argument('--confidence', type=float, default=0.95, help='신뢰 수준')
+    args = parser.parse_args()
+    N = args.N
+
+    if args.backend == 'parallel':
+        stride = args.stride or max(1, N // 100)
+        points, count, mean, m2 = run_random_fibonacci(
+            N, args.trials, seed=args.seed, stride=stride, chunk_trials=args.chunk_trials,
+            workers=args.workers, checkpoint=args.checkpoint)
+        halfwidth = confidence_halfwidth(count, m2, args.confidence)
+        if args.output:
+            write_headless(args.output, points, mean, halfwidth, args.point_budget, N=N, trials=args.trials,
+                           seed=args.seed, backend=args.backend, stride=stride, count=int(count),
+                           confidence=args.confidence)
+            return
+        if not args.no_plot:
+            import matplotlib.pyplot as plt
+            shown = lttb_indices(points, mean, args.point_budget)
+            plt.figure(figsize=(12, 8))
+            plt.plot(points[shown], mean[shown], 'b-')
+            plt.fill_between(points[shown], (mean - halfwidth)[shown], (mean + halfwidth)[shown], color='b', alpha=0.2)
+            plt.axhline(VISWANATH_CONSTANT, color='r', linestyle='--')
+            plt.title('Random Fibonacci Sequence: a_n vs n')
+            plt.xlabel('n')
+            plt.ylabel('a_n')
+            plt.grid(True)
+            plt.show()
+        print_summary(points, count, mean, m2, args.confidence)
+        return
+
+    # 시뮬레이션 실행
+    simulate = simulate_random_fibonacci_numpy if args.backend == 'numpy' else simulate_random_fibonacci
+    a_n_values = simulate(N, trials=args.trials, seed=args.seed)
+    if args.output:
+        # a_0은 정의되지 않으므로 n = 1부터 씀
+        write_headless(args.output, np.arange(1, N + 1), np.asarray(a_n_values[1:], dtype=np.float64), None,
+                       args.point_budget, N=N, trials=args.trials, seed=args.seed, backend=args.backend)
+        return
+
+    # 그래프 그리기 (점이 많으면 LTTB로 point_budget개만)
+    if not args.no_plot:
+        import matplotlib.pyplot as plt
+        shown = lttb_indices(np.arange(N + 1), np.asarray(a_n_values, dtype=np.float64), args.point_budget)
+        plt.figure(figsize=(12, 8))
+        plt.plot(shown, np.asarray(a_n_values)[shown], 'b-')
+        plt.title('Random Fibonacci Sequence: a_n vs n')
+        plt.xlabel('n')
+        plt.ylabel('a_n')
+        plt.grid(True)
+        plt.show()
+
+    # n 값과 a_n 값을 출력
+    print("n\ta_n")
+    print("-" * 20)
+    for n, a_n in enumerate(a_n_values):
+        print(f"{n}\t{a_n:.6f}")
+
+
+if __name__ == '__main__':
+    main()
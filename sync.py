@@ -0,0 +1,227 @@
+"""
+로컬 폴더의 HTML과 이미지를 GitHub과 MongoDB에 한 번에 게시합니다.
+
+api/index.py와 homeset/ 패키지의 업로드 경로(이미지 해시/최적화, HTML 이미지 경로 재작성, 일괄 커밋)를 그대로 사용하며,
+폴더 안의 매니페스트 파일(.homeset-sync.json)에 파일별 크기, 수정 시각, sha256을 기록해 두고
+바뀐 파일만 다시 올립니다. 크기와 수정 시각이 그대로인 파일은 내용을 읽지도 않습니다.
+
+- HTML은 자신이 바뀌었거나, 참조하는 이미지가 바뀌었을 때만 다시 올립니다.
+- 바뀐 파일은 모두 하나의 커밋에 담기고(GITHUB_COMMIT_MODE=batch), 이미지 blob은 병렬로 올라갑니다.
+- 글 문서는 bulk_write 한 번으로 upsert합니다. 새 글의 제목은 HTML의 <title>(없으면 파일 이름)이고,
+  이미 있는 글의 제목/내용/날짜는 건드리지 않습니다.
+- 로컬에서 지운 파일은 매니페스트에서만 빠지고 GitHub에서는 지우지 않습니다.
+
+실행: python sync.py pagesimages [--dry-run] [--message "커밋 메시지"]
+"""
+import argparse
+import html
+import json
+import os
+import re
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+from github import GithubException
+from werkzeug.utils import secure_filename
+
+from api import index
+from homeset import clients, commits, scheduler, sha_index
+from homeset.files import ALLOWED_EXTENSIONS_HTML, ALLOWED_EXTENSIONS_IMAGES, allowed_file, hash_stream
+
+MANIFEST_NAME = '.homeset-sync.json'
+TITLE_RE = re.compile(r'<title[^>]*>(.*?)</title>', re.IGNORECASE | re.DOTALL)
+
+
+def load_manifest(path):
+    try:
+        with open(path, encoding='utf-8') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(path, manifest):
+    # 쓰는 도중에 멈춰도 이전 매니페스트가 남도록 임시 파일에 쓴 뒤 바꿔치기
+    temp_path = f"{path}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as file:
+        json.dump(manifest, file, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+def scan_directory(directory):
+    """폴더 안의 HTML/이미지 파일을 {상대 경로: os.stat 결과}로 모읍니다."""
+    found = {}
+    allowed = ALLOWED_EXTENSIONS_HTML | ALLOWED_EXTENSIONS_IMAGES
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = [name for name in dirs if not name.startswith('.') and name != '__pycache__']
+        for name in files:
+            if allowed_file(name, allowed):
+                path = os.path.join(root, name)
+                found[os.path.relpath(path, directory).replace(os.sep, '/')] = os.stat(path)
+    return found
+
+
+def file_sha256(path):
+    with open(path, 'rb') as file:
+        return hash_stream(file)
+
+
+def detect_changes(directory, files, manifest):
+    """크기/수정 시각이 바뀐 파일만 해시해, 내용이 실제로 바뀐 파일의 {상대 경로: sha256}을 돌려줍니다."""
+    suspects = [
+        relpath for relpath, stat in files.items()
+        if relpath not in manifest
+        or manifest[relpath]['size'] != stat.st_size
+        or manifest[relpath]['mtime_ns'] != stat.st_mtime_ns
+    ]
+    with ThreadPoolExecutor(max_workers=clients.GITHUB_UPLOAD_WORKERS) as executor:
+        digests = executor.map(lambda relpath: file_sha256(os.path.join(directory, relpath)), suspects)
+        changed = {}
+        for relpath, digest in zip(suspects, digests):
+            if manifest.get(relpath, {}).get('sha256') != digest:
+                changed[relpath] = digest
+            else:
+                # 내용은 같고 수정 시각만 바뀜: 다음번에는 다시 해시하지 않도록 기록만 갱신
+                manifest[relpath].update(size=files[relpath].st_size, mtime_ns=files[relpath].st_mtime_ns)
+    return changed
+
+
+def html_title(html_content, default):
+    match = TITLE_RE.search(html_content)
+    title = html.unescape(match.group(1)).strip() if match else ''
+    return title or default
+
+
+def sync(directory, dry_run=False, commit_message=None):
+    manifest_path = os.path.join(directory, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+    files = scan_directory(directory)
+    changed = detect_changes(directory, files, manifest)
+
+    html_files = {}    # 안전한 HTML 파일 이름 -> 상대 경로
+    image_files = {}   # HTML에서 참조하는 이미지 이름 -> 상대 경로
+    for relpath in sorted(files):
+        filename = secure_filename(os.path.basename(relpath))
+        target = html_files if allowed_file(filename, ALLOWED_EXTENSIONS_HTML) else image_files
+        if filename in target:
+            print(f"이름이 겹쳐 건너뜁니다: {relpath} ({target[filename]}와 같은 이름)")
+            continue
+        target[filename] = relpath
+    changed_images = {name for name, relpath in image_files.items() if relpath in changed}
+    pending_html = [
+        (filename, relpath) for filename, relpath in html_files.items()
+        if relpath in changed or changed_images & set(manifest[relpath].get('images', []))
+    ]
+
+    if not pending_html and not changed_images:
+        print("바뀐 파일이 없습니다.")
+        save_manifest(manifest_path, {relpath: entry for relpath, entry in manifest.items() if relpath in files})
+        return
+    print(f"HTML {len(pending_html)}개, 이미지 {len(changed_images)}개를 올립니다.")
+    if dry_run:
+        for filename, relpath in pending_html:
+            print(f"  HTML  {relpath}")
+        for name in sorted(changed_images):
+            print(f"  이미지 {image_files[name]}")
+        return
+
+    sha_index.try_refresh_sha_index()
+    streams = {name: open(os.path.join(directory, image_files[name]), 'rb') for name in sorted(changed_images)}
+    try:
+        staged = index.stage_images([(image_files[name], name, stream) for name, stream in streams.items()])
+
+        # 바뀌지 않은 이미지는 매니페스트에 기록된 게시 경로를 그대로 사용
+        image_urls = {}
+        image_srcsets = {}
+        for name, relpath in image_files.items():
+            entry = manifest.get(relpath)
+            if name not in changed_images and entry and 'path' in entry:
+                image_urls[name] = entry['path']
+                if entry.get('srcset'):
+                    image_srcsets[name] = entry['srcset']
+        image_urls.update(staged['urls'])
+        image_srcsets.update(staged['srcsets'])
+
+        uploads = []
+        posts = []
+        for filename, relpath in pending_html:
+            with open(os.path.join(directory, relpath), 'rb') as file:
+                html_content = file.read().decode('utf-8')
+            referenced = set()
+            modified_html = index.rewrite_post_html(html_content, image_urls, image_srcsets, referenced)
+            uploads.append((f"public/pages/{filename}", modified_html, False))
+            posts.append((filename, relpath, html_content, sorted(referenced & set(image_files))))
+
+        message = commit_message or f"Sync {os.path.basename(os.path.abspath(directory))}: {len(uploads)} pages"
+        failed = commits.upload_files_to_github(uploads + staged['uploads'], message)
+    finally:
+        for stream in streams.values():
+            stream.close()
+
+    _, uploaded_hashes, failures = index.uploaded_image_entries(staged, failed)
+    for original_name, e in failures:
+        print(f"{original_name} 업로드 중 오류 발생: {scheduler.github_error_message(e)}")
+    failed_images = {relpath for relpath, _ in failures}  # stage_images에 원래 이름으로 상대 경로를 넘김
+
+    # 글 문서를 한 번에 upsert. image_hashes는 각 글이 참조하는 이미지만 담음
+    hash_entries = {entry['name']: entry for entry in uploaded_hashes}
+    for name, relpath in image_files.items():
+        entry = manifest.get(relpath)
+        if (index.CONTENT_ADDRESSED_IMAGES and name not in hash_entries and name not in changed_images
+                and entry and 'path' in entry):
+            hash_entries[name] = {key: entry[key] for key in ('sha256', 'path', 'srcset') if key in entry}
+            hash_entries[name]['name'] = name
+    documents = []
+    for filename, relpath, html_content, referenced in posts:
+        name = os.path.splitext(filename)[0]
+        fields = {
+            'filename': filename,
+            'images': referenced,
+            'image_hashes': [hash_entries[image] for image in referenced if image in hash_entries],
+        }
+        insert_fields = {'title': html_title(html_content, name), 'content': '', 'date': index.parse_date(None)}
+        documents.append((name, fields, insert_fields))
+    if documents:
+        inserted, modified = index.bulk_upsert_posts(documents)
+        print(f"MongoDB: 새 글 {inserted}개, 갱신 {modified}개")
+
+    # 올라간 파일만 매니페스트에 기록 (실패한 이미지와 그 이미지를 참조하는 HTML은 다음 실행 때 다시 시도)
+    def stat_fields(relpath):
+        return {'size': files[relpath].st_size, 'mtime_ns': files[relpath].st_mtime_ns}
+
+    for filename, relpath, _, referenced in posts:
+        if f"public/pages/{filename}" in failed or failed_images & {image_files[image] for image in referenced}:
+            continue
+        digest = changed.get(relpath) or manifest[relpath]['sha256']
+        manifest[relpath] = {'sha256': digest, 'images': referenced, **stat_fields(relpath)}
+    for name in changed_images:
+        relpath = image_files[name]
+        if relpath in failed_images:
+            continue
+        manifest[relpath] = {'sha256': changed[relpath], 'path': staged['urls'][name], **stat_fields(relpath)}
+        if name in staged['srcsets']:
+            manifest[relpath]['srcset'] = staged['srcsets'][name]
+    save_manifest(manifest_path, {relpath: entry for relpath, entry in manifest.items() if relpath in files})
+    print("완료")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 폴더의 HTML과 이미지를 GitHub과 MongoDB에 게시합니다.')
+    parser.add_argument('directory', help='게시할 폴더 (예: pagesimages)')
+    parser.add_argument('--dry-run', action='store_true', help='올릴 파일 목록만 출력')
+    parser.add_argument('--message', help='커밋 메시지')
+    args = parser.parse_args()
+    if not os.path.isdir(args.directory):
+        parser.error(f"폴더가 없습니다: {args.directory}")
+    if not args.dry_run and clients.get_repo() is None:
+        print("GitHub 리포지토리에 접근할 수 없습니다. 환경 변수를 확인하세요.")
+        sys.exit(1)
+    try:
+        sync(args.directory, dry_run=args.dry_run, commit_message=args.message)
+    except GithubException as e:
+        print(f"GitHub 업로드 중 오류 발생: {scheduler.github_error_message(e)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+"""
+pytest 공통 준비: 앱마다 mongomock DB와 FakeRepo(bench/fake_github.py)를 주입해 씁니다.
+
+필요한 패키지는 bench/requirements.txt에 있습니다.
+실행: python -m pytest -q
+"""
+import io
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+from api import index
+import fake_mongo
+from fake_github import FakeRepo
+
+
+@pytest.fixture
+def repo():
+    return FakeRepo()
+
+
+@pytest.fixture
+def app(repo):
+    app = index.create_app(db=fake_mongo.MongoClient().pages, repo=repo)
+    with app.app_context():
+        yield app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def upload(client):
+    """/upload에 글 하나를 올리고 JSON 응답을 돌려주는 함수."""
+    def post(filename='post.html', html=b'<html><body>x</body></html>', images=(), **form):
+        data = dict({'title': 'title', 'date': '2024-09-20'}, **form)
+        data['html_file'] = (io.BytesIO(html), filename)
+        data['image_files'] = [(io.BytesIO(content), name) for name, content in images]
+        response = client.post('/upload', data=data, content_type='multipart/form-data',
+                               headers={'X-Requested-With': 'XMLHttpRequest'})
+        assert response.status_code == 200, response.get_json()
+        return response.get_json()
+    return post
@@ -0,0 +1,88 @@
+import hashlib
+import os
+
+import pytest
+
+from api import index
+from homeset import clients
+
+CHUNK = 1000
+HEADERS = {'X-Requested-With': 'XMLHttpRequest'}
+
+
+@pytest.fixture(autouse=True)
+def chunked_uploads(monkeypatch, tmp_path):
+    monkeypatch.setattr(index, 'CHUNKED_UPLOADS', True)
+    monkeypatch.setattr(index, 'CHUNKED_UPLOAD_DIR', str(tmp_path))
+    monkeypatch.setattr(index, 'CHUNKED_UPLOAD_CHUNK_SIZE', CHUNK)
+
+
+def start(client, files, html_sha256=None):
+    html_name, html = files[0]
+    response = client.post('/uploads', headers=HEADERS, json={
+        'html': {'name': html_name, 'size': len(html), 'sha256': html_sha256 or hashlib.sha256(html).hexdigest()},
+        'images': [{'name': name, 'size': len(content)} for name, content in files[1:]],
+    })
+    assert response.status_code == 201, response.get_json()
+    return response.get_json()
+
+
+def put(client, upload, files, file_index, offset):
+    data = files[file_index][1][offset:offset + CHUNK]
+    headers = dict(HEADERS, **{'X-Chunk-SHA256': hashlib.sha256(data).hexdigest()})
+    return client.put(f"{upload['status_url']}/{file_index}?offset={offset}", data=data, headers=headers)
+
+
+def missing(client, upload):
+    return [entry['missing'] for entry in client.get(upload['status_url']).get_json()['files']]
+
+
+def finalize(client, upload):
+    return client.post(upload['finalize_url'], data={'title': 'T', 'date': '2024-01-02'}, headers=HEADERS)
+
+
+def test_finalize_with_missing_chunk_returns_409_then_resumes(client, repo):
+    html = b'<html><body>' + b'<p>x</p>' * 300 + b'<img src="a.png"></body></html>'
+    files = [('post.html', html), ('a.png', os.urandom(2500))]
+    upload = start(client, files)
+    for file_index, (_, content) in enumerate(files):
+        for offset in range(0, len(content), CHUNK):
+            if (file_index, offset) != (0, CHUNK):
+                assert put(client, upload, files, file_index, offset).status_code == 200
+
+    response = finalize(client, upload)
+    assert response.status_code == 409
+    assert response.get_json()['missing'] == {'0': [CHUNK]}
+    assert missing(client, upload) == [[CHUNK], []]
+
+    # 빠진 조각만 다시 보내면 finalize가 성공하고 받은 조각은 지워짐
+    assert put(client, upload, files, 0, CHUNK).status_code == 200
+    assert finalize(client, upload).status_code == 200
+    assert client.get(upload['status_url']).status_code == 404
+    assert clients.get_collection().find_one({'name': 'post'})['title'] == 'T'
+    assert repo.commit_count == 1
+
+
+def test_identical_chunks_are_stored_once(client):
+    image = os.urandom(CHUNK)
+    files = [('post.html', b'<html></html>'), ('a.png', image), ('b.png', image)]
+    upload = start(client, files)
+    assert put(client, upload, files, 1, 0).get_json()['duplicate'] is False
+    assert put(client, upload, files, 2, 0).get_json()['duplicate'] is True
+
+
+def test_whole_file_hash_mismatch_asks_for_the_file_again(client):
+    files = [('post.html', b'<html>hello</html>')]
+    upload = start(client, files, html_sha256='0' * 64)
+    put(client, upload, files, 0, 0)
+    assert finalize(client, upload).status_code == 409
+    assert missing(client, upload) == [[0]]
+
+
+def test_corrupted_chunk_is_rejected(client):
+    files = [('post.html', b'<html>hello</html>')]
+    upload = start(client, files)
+    headers = dict(HEADERS, **{'X-Chunk-SHA256': hashlib.sha256(files[0][1]).hexdigest()})
+    response = client.put(f"{upload['status_url']}/0?offset=0", data=b'<html>jello</html>', headers=headers)
+    assert response.status_code == 400
+    assert missing(client, upload) == [[0]]
@@ -0,0 +1,45 @@
+from xml.dom import minidom
+
+from homeset import clients, feeds
+
+
+def feed_names(app):
+    return [entry['name'] for entry in clients.get_db().feeds.find_one({'_id': 'feed'})['entries']]
+
+
+def sitemap_names(app):
+    return sorted(entry['name'] for entry in clients.get_db().feeds.find_one({'_id': 'sitemap'})['entries'])
+
+
+def test_upload_updates_feed_and_sitemap(app, upload):
+    for i in range(3):
+        upload(f'p{i}.html', title=f'글 {i}', date=f'2024-0{i + 1}-01')
+    assert feed_names(app) == ['p2', 'p1', 'p0']
+    assert sitemap_names(app) == ['p0', 'p1', 'p2']
+
+    upload('p0.html', title='글 0 수정', date='2024-05-01')
+    assert feed_names(app) == ['p0', 'p2', 'p1']
+    assert sitemap_names(app) == ['p0', 'p1', 'p2']
+
+
+def test_feed_refills_when_post_moves_out(monkeypatch, app, upload):
+    monkeypatch.setattr(feeds, 'FEED_SIZE', 2)
+    for i in range(3):
+        upload(f'p{i}.html', date=f'2024-0{i + 1}-01')
+    assert feed_names(app) == ['p2', 'p1']
+    # p2의 날짜를 가장 오래된 것으로 고치면 피드 밖에 있던 p0이 그 자리를 채움
+    upload('p2.html', date='2020-01-01')
+    assert feed_names(app) == ['p1', 'p0']
+
+
+def test_feed_and_sitemap_responses(client, upload):
+    upload('p0.html', title='a & <b>', content='내용')
+    response = client.get('/feed.xml')
+    assert response.status_code == 200 and response.mimetype == 'application/atom+xml'
+    feed = minidom.parseString(response.data)
+    assert [node.firstChild.data for node in feed.getElementsByTagName('title')][1:] == ['a & <b>']
+    assert client.get('/feed.xml', headers={'If-None-Match': response.headers['ETag']}).status_code == 304
+
+    sitemap = minidom.parseString(client.get('/sitemap.xml').data)
+    locations = [node.firstChild.data for node in sitemap.getElementsByTagName('loc')]
+    assert locations[1:] == ['http://localhost/pages/p0.html']
@@ -0,0 +1,80 @@
+from datetime import datetime
+
+from api import index
+from homeset import clients
+
+
+def hashes(*names):
+    return [{'name': name, 'sha256': name * 4, 'path': f'/images/{name}'} for name in names]
+
+
+def stored(name):
+    return clients.get_collection().find_one({'name': name})
+
+
+def test_upsert_post_reports_insert_then_update(app):
+    assert index.upsert_post('post', {'title': 'first'}) is True
+    assert index.upsert_post('post', {'title': 'second'}) is False
+    assert clients.get_collection().count_documents({'name': 'post'}) == 1
+    assert stored('post')['title'] == 'second'
+
+
+def test_upsert_post_merges_image_hashes(app):
+    assert index.upsert_post('post', {'title': 't'}, hashes('a.png', 'b.png')) is True
+    new_b = [{'name': 'b.png', 'sha256': 'new', 'path': '/images/new'}]
+    assert index.upsert_post('post', {'title': 't'}, new_b + hashes('c.png')) is False
+    entries = {entry['name']: entry for entry in stored('post')['image_hashes']}
+    # 이번에 없는 a.png는 남고, 이번에 다시 올린 b.png는 새 항목으로 바뀜
+    assert sorted(entries) == ['a.png', 'b.png', 'c.png']
+    assert entries['a.png']['path'] == '/images/a.png'
+    assert entries['b.png']['sha256'] == 'new'
+
+
+def test_upsert_post_stores_dollar_values_literally(app):
+    index.upsert_post('post', {'title': '$100', 'content': '$title'}, hashes('a.png'))
+    document = stored('post')
+    assert (document['title'], document['content']) == ('$100', '$title')
+
+
+def test_bulk_upsert_posts_counts_and_keeps_insert_fields(app):
+    posts = [(f'post{i}', {'filename': f'post{i}.html'}, {'title': f'글 {i}', 'content': ''}) for i in range(3)]
+    assert index.bulk_upsert_posts(posts) == (3, 0)
+    clients.get_collection().update_one({'name': 'post0'}, {'$set': {'title': '고친 제목'}})
+    posts[0] = ('post0', {'filename': 'renamed.html'}, {'title': '덮어쓰면 안 됨', 'content': ''})
+    assert index.bulk_upsert_posts(posts, batch_size=2) == (0, 1)
+    document = stored('post0')
+    assert (document['title'], document['filename']) == ('고친 제목', 'renamed.html')
+
+
+def insert_dated_posts(count):
+    # 날짜가 같은 글이 셋씩 있어 페이지 경계에서 _id로 순서가 정해져야 함
+    for i in range(count):
+        clients.get_collection().insert_one(
+            {'name': f'post{i}', 'title': f'글 {i}', 'filename': f'post{i}.html', 'date': datetime(2024, 1, 1 + i // 3)})
+    clients.get_collection().insert_one({'name': 'legacy', 'title': '날짜 없음', 'filename': 'legacy.html'})
+
+
+def test_keyset_pagination_walks_every_post_once(app):
+    insert_dated_posts(8)
+    pages, cursor = [], None
+    while True:
+        posts, next_cursor = index.find_posts_page(cursor, page_size=3)
+        pages.append([post['name'] for post in posts])
+        if next_cursor is None:
+            break
+        cursor = index.decode_cursor(next_cursor)
+    assert pages == [['post7', 'post6', 'post5'], ['post4', 'post3', 'post2'], ['post1', 'post0']]
+
+
+def test_posts_api_follows_next_cursor(app, client):
+    insert_dated_posts(index.POSTS_PAGE_SIZE + 2)
+    first = client.get('/api/posts').get_json()
+    second = client.get('/api/posts', query_string={'cursor': first['next_cursor']}).get_json()
+    names = [post['name'] for post in first['posts'] + second['posts']]
+    assert len(first['posts']) == index.POSTS_PAGE_SIZE and second['next_cursor'] is None
+    assert sorted(names) == sorted(f'post{i}' for i in range(index.POSTS_PAGE_SIZE + 2))
+
+
+def test_invalid_cursor_is_rejected(client):
+    assert client.get('/api/posts', query_string={'cursor': 'not-a-cursor'}).status_code == 400
+    assert client.get('/posts', query_string={'cursor': 'not-a-cursor'}).status_code == 302
@@ -0,0 +1,50 @@
+import os
+
+import pytest
+
+from homeset import rewriter
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DOCUMENTS = ('pagesimages/simulation_result.html', 'pagesimages/coin_reverse.html', 'test.html', 'upload.html')
+TRICKY = (
+    '<!DOCTYPE html>\n<p>a &amp; b &lt;c&gt;</p>\n'
+    '<IMG SRC=assets/a.png alt="사진" width=320>\n'
+    "<img alt='x' src='../b.svg'/>\n"
+    '<img\n  data-x="1"\n  src="c.jpg"\n>\n'
+    '<script>document.write("<img src=\'not-an-image.png\'>")</script>\n'
+    '<!-- <img src="comment.png"> -->\n'
+    '<img src="data:image/png;base64,AAAA"><img src="#anchor"><img>\n'
+)
+
+
+def read(name):
+    with open(os.path.join(ROOT, name), encoding='utf-8') as file:
+        return file.read()
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_unchanged_paths_keep_document_byte_identical(name):
+    html_content = read(name)
+    assert rewriter.rewrite_image_paths(html_content, lambda url: None) == html_content
+
+
+def test_only_img_src_values_change():
+    rewritten = rewriter.rewrite_image_paths(TRICKY, rewriter.local_image_url)
+    # 따옴표 없는 값은 바꿀 때 따옴표를 붙임
+    expected = (TRICKY.replace('assets/a.png', '"/images/a.png"')
+                .replace("'../b.svg'", "'/images/b.svg'")
+                .replace('"c.jpg"', '"/images/c.jpg"'))
+    assert rewritten == expected
+
+
+@pytest.mark.parametrize('name', DOCUMENTS)
+def test_matches_beautifulsoup_rewrite(name):
+    bs4 = pytest.importorskip('bs4')
+    html_content = read(name)
+    soup = bs4.BeautifulSoup(html_content, 'html.parser')
+    for img in soup.find_all('img'):
+        if img.get('src'):
+            img['src'] = f"/images/{os.path.basename(img['src'])}"
+    rewritten = rewriter.rewrite_image_paths(html_content, rewriter.local_image_url)
+    assert str(bs4.BeautifulSoup(rewritten, 'html.parser')) == str(soup)
@@ -0,0 +1,32 @@
+import os
+
+from homeset import clients, commits
+
+
+def images(count):
+    return [(f'photo{i}.png', os.urandom(256)) for i in range(count)]
+
+
+def test_batch_upload_is_one_commit(monkeypatch, repo, upload):
+    monkeypatch.setattr(commits, 'GITHUB_COMMIT_MODE', 'batch')
+    upload(html=b'<html><body><img src="img/photo0.png"></body></html>', images=images(5))
+    # SHA 인덱스 2번 + blob 5번 + ref/커밋 조회, 트리, 커밋, ref 이동
+    assert (repo.commit_count, repo.total_calls) == (1, 5 + 7)
+    stored = clients.get_collection().find_one({'name': 'post'})
+    assert len(stored['images']) == 5
+    photo0 = next(entry['path'] for entry in stored['image_hashes'] if entry['name'] == 'photo0.png')
+    assert f'src="{photo0}"'.encode() in repo.read_file('public/pages/post.html')
+
+
+def test_per_file_upload_commits_each_file(monkeypatch, repo, upload):
+    monkeypatch.setattr(commits, 'GITHUB_COMMIT_MODE', 'per_file')
+    upload(images=images(5))
+    assert (repo.commit_count, repo.total_calls) == (6, 5 + 3)
+
+
+def test_unchanged_upload_makes_no_commit(monkeypatch, repo, upload):
+    monkeypatch.setattr(commits, 'GITHUB_COMMIT_MODE', 'batch')
+    files = images(2)
+    upload(images=files)
+    upload(images=files)
+    assert repo.commit_count == 1